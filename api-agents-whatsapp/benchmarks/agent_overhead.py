@@ -0,0 +1,105 @@
+"""
+Benchmark: overhead de preparação do agente por requisição
+
+Compara:
+1. Antes → Agent(model=OpenAIChat(...), tools, output_schema) criado a cada requisição
+2. Depois → agente emprestado do AgentPool (apenas troca das ferramentas)
+
+Nenhuma chamada ao LLM é feita: o objetivo é medir apenas o custo de
+construção/preparação. Para que o custo do cliente HTTP também apareça,
+o cliente OpenAI é criado (get_async_client) em ambos os cenários,
+como acontece na primeira chamada real.
+
+Uso:
+    uv run python benchmarks/agent_overhead.py --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agno.agent import Agent  # noqa: E402
+from agno.models.openai import OpenAIChat  # noqa: E402
+from agno.tools.mcp import MCPTools  # noqa: E402
+
+from api_agents_whatsapp.agent_pool import AgentPool  # noqa: E402
+from api_agents_whatsapp.config import settings  # noqa: E402
+from api_agents_whatsapp.models import AgentResponse  # noqa: E402
+
+
+def fake_tools():
+    """Toolkits MCP sem conexão, com funções fictícias registradas"""
+    tools = []
+    for server, names in [
+        ("projetos_lei", ["buscar_projetos", "detalhar_projeto", "noticias_recentes"]),
+        ("users", ["obter_usuario", "registrar_opiniao"]),
+    ]:
+        toolkit = MCPTools(transport="streamable-http", url=f"http://{server}.invalid/mcp")
+        for name in names:
+            toolkit.functions[name] = None
+        tools.append(toolkit)
+    return tools
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def report(label, samples):
+    print(
+        f"{label:<28} média={statistics.mean(samples) * 1e6:8.1f}µs "
+        f"p50={percentile(samples, 0.50) * 1e6:8.1f}µs "
+        f"p95={percentile(samples, 0.95) * 1e6:8.1f}µs"
+    )
+
+
+def bench_per_request(requests, tools):
+    samples = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        agent = Agent(
+            model=OpenAIChat(id=settings.agent_model, api_key=settings.openai_api_key),
+            tools=tools,
+            markdown=True,
+            output_schema=AgentResponse,
+        )
+        agent.model.get_async_client()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+async def bench_pool(requests, tools):
+    pool = AgentPool(size=4)
+    pool.start()
+    samples = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        async with pool.lease(tools) as agent:
+            agent.model.get_async_client()
+            samples.append(time.perf_counter() - started_at)
+    return samples, pool.get_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    tools = fake_tools()
+    before = bench_per_request(args.requests, tools)
+    after, status = asyncio.run(bench_pool(args.requests, tools))
+
+    print(f"Requisições: {args.requests}")
+    report("Antes (Agent por requisição)", before)
+    report("Depois (AgentPool)", after)
+    print(f"Pool: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark: AgentService.process_message com cassetes de LLM e MCP
+
+Mede o serviço completo (fast-path, roteadores, pools, agendador, agno,
+cliente MCP) sem chamar a OpenAI nem a API da Câmara:
+1. --record → roda o corpus uma vez contra a OpenAI e os servidores MCP
+   reais e grava cada troca HTTP (benchmarks/cassettes/)
+2. Reprodução → roda o corpus N vezes com as respostas gravadas, com a
+   latência gravada (--latency recorded), escalada (--latency-scale) ou
+   zero (--latency zero, mede só o overhead do serviço)
+
+Relatório: throughput, latência p50/p95/p99, tempo médio por etapa
+(fila, setup MCP, LLM, ferramentas) e, com --allocations, memória
+alocada por requisição (tracemalloc, em passada separada).
+
+Para que a reprodução seja determinística, a memória de conversa, a
+execução de contingência, as cotas por usuário e os limites RPM/TPM do
+agendador ficam desligados, e o cache semântico só é usado com --semantic-cache.
+
+Uso:
+    # Uma vez, com OPENAI_API_KEY e os servidores MCP no ar
+    uv run python benchmarks/agent_replay.py --record
+    # Sem rede
+    uv run python benchmarks/agent_replay.py --repeat 5 --concurrency 4
+    uv run python benchmarks/agent_replay.py --latency zero --allocations
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from cassettes import Cassette, install  # noqa: E402
+
+from api_agents_whatsapp.config import settings  # noqa: E402
+from api_agents_whatsapp.models import AgentRequest  # noqa: E402
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def load_corpus(path):
+    """Perguntas do corpus como AgentRequest (ids fixos → prompts idênticos na reprodução)"""
+    with open(path, encoding="utf-8") as file:
+        items = json.load(file)
+    requests = []
+    for index, item in enumerate(items):
+        preferences = {"topics": item["topics"]} if item.get("topics") else None
+        requests.append(AgentRequest(
+            user_message=item["message"],
+            user_id=f"55859{index:08d}@c.us",
+            session_id=f"bench-{item['id']}",
+            message_type=item.get("message_type", "text"),
+            user_preferences=preferences,
+        ))
+    return requests
+
+
+def configure(service, semantic_cache):
+    """Desliga o que torna a execução dependente de tempo ou de histórico"""
+    settings.semantic_cache_enabled = semantic_cache
+    settings.debug_timings = True  # Tempos por etapa em response.timings
+    service.session_memory.enabled = False
+    service.hedger.enabled = False
+    service.user_quotas.enabled = False
+    service.scheduler.requests_per_minute = 0
+    service.scheduler.tokens_per_minute = 0
+
+
+async def timed(service, request):
+    started_at = time.perf_counter()
+    try:
+        response = await service.process_message(request)
+        return time.perf_counter() - started_at, response.timings or {}, None
+    except Exception as e:
+        return time.perf_counter() - started_at, {}, e
+
+
+async def run_pass(service, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with semaphore:
+            return await timed(service, request)
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(one(request) for request in requests))
+    return results, time.perf_counter() - started_at
+
+
+async def measure_allocations(service, requests):
+    """Memória alocada por requisição (pico e retida), uma requisição por vez"""
+    tracemalloc.start()
+    peaks, retained = [], []
+    try:
+        for request in requests:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await timed(service, request)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return peaks, retained
+
+
+def report(results, wall_seconds, args, corpus_size):
+    latencies = [seconds for seconds, _, _ in results]
+    errors = [error for _, _, error in results if error is not None]
+    timings = [t for _, t, error in results if error is None]
+    agent = [t for t in timings if t.get("path") == "agent"]
+
+    latency_label = "zero" if args.latency == "zero" else f"gravada ×{args.latency_scale}"
+    print(
+        f"Requisições: {len(results)} ({corpus_size} perguntas × {args.repeat}) "
+        f"| Concorrência: {args.concurrency} | Latência: {latency_label}"
+    )
+    print(f"Throughput: {len(results) / wall_seconds:.1f} req/s | Erros: {len(errors)}")
+    print(
+        f"Latência       média={statistics.mean(latencies) * 1000:8.1f}ms "
+        f"p50={percentile(latencies, 0.50) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:8.1f}ms"
+    )
+    paths = Counter(t.get("path", "?") for t in timings)
+    print(f"Caminhos: {', '.join(f'{path}={count}' for path, count in paths.most_common())}")
+    if agent:
+        def mean_ms(field):
+            return statistics.mean(t[field] for t in agent) * 1000
+
+        print(
+            f"Etapas (média, agente): fila {mean_ms('queue_wait_seconds'):.1f}ms "
+            f"| MCP {mean_ms('mcp_setup_seconds'):.1f}ms "
+            f"| LLM {mean_ms('llm_seconds'):.1f}ms "
+            f"({statistics.mean(len(t['llm_turns']) for t in agent):.1f} turnos) "
+            f"| ferramentas {mean_ms('tool_seconds'):.1f}ms "
+            f"({statistics.mean(len(t['tool_calls']) for t in agent):.1f} chamadas)"
+        )
+    for error in errors[:3]:
+        print(f"  ❌ {error!r}")
+
+
+async def main_async(args):
+    from api_agents_whatsapp.services import agent_service
+
+    cassette = Cassette(
+        args.cassettes,
+        servers={settings.mcp_projetos_lei_url: "projetos_lei", settings.mcp_users_url: "users"},
+    )
+    if args.record:
+        cassette.reset()
+        install(cassette, "record")
+    else:
+        if not cassette.load():
+            sys.exit(f"Nenhum cassete em {args.cassettes}; grave antes com --record")
+        install(cassette, "replay", latency_scale=0.0 if args.latency == "zero" else args.latency_scale)
+
+    requests = load_corpus(args.corpus)
+    configure(agent_service, args.semantic_cache)
+    await agent_service.startup()
+    try:
+        if args.record:
+            results, wall_seconds = await run_pass(agent_service, requests, concurrency=1)
+            failed = sum(1 for _, _, error in results if error is not None)
+            print(
+                f"Gravado em {args.cassettes}: {cassette.recorded['llm']} trocas LLM, "
+                f"{cassette.recorded['mcp']} trocas MCP | {len(requests)} perguntas "
+                f"em {wall_seconds:.1f}s | Falhas: {failed}"
+            )
+            return
+
+        for _ in range(args.warmup):
+            await run_pass(agent_service, requests, args.concurrency)
+        results, wall_seconds = await run_pass(agent_service, requests * args.repeat, args.concurrency)
+        report(results, wall_seconds, args, len(requests))
+
+        if args.allocations:
+            peaks, retained = await measure_allocations(agent_service, requests)
+            print(
+                f"Memória/req    pico média={statistics.mean(peaks) / 1024:8.1f}KiB "
+                f"p95={percentile(peaks, 0.95) / 1024:8.1f}KiB "
+                f"| retida média={statistics.mean(retained) / 1024:6.1f}KiB"
+            )
+
+        print(
+            f"Cassetes: reproduzidas llm={cassette.replayed['llm']} mcp={cassette.replayed['mcp']} "
+            f"| não gravadas: {len(cassette.misses)}"
+        )
+        for key in sorted(set(cassette.misses))[:5]:
+            print(f"  ⚠️  {key}")
+    finally:
+        await agent_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--record", action="store_true", help="Gravar cassetes (OpenAI e MCP reais)")
+    parser.add_argument("--cassettes", type=Path, default=BENCHMARKS_DIR / "cassettes")
+    parser.add_argument("--corpus", type=Path, default=BENCHMARKS_DIR / "corpus_pt.json")
+    parser.add_argument("--repeat", type=int, default=3, help="Passadas medidas pelo corpus")
+    parser.add_argument("--warmup", type=int, default=1, help="Passadas de aquecimento (não medidas)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", choices=["recorded", "zero"], default="recorded")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Fator sobre a latência gravada")
+    parser.add_argument("--allocations", action="store_true", help="Medir memória alocada por requisição")
+    parser.add_argument("--semantic-cache", action="store_true", help="Manter o cache semântico ligado")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
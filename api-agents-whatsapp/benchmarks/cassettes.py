@@ -0,0 +1,246 @@
+"""
+Cassetes de LLM e MCP para benchmarks determinísticos
+
+Intercepta o transporte HTTP assíncrono do httpx (usado pelo cliente MCP
+streamable-http e pelo SDK da OpenAI; versões recentes do SDK usam o
+httpx2, interceptado também quando instalado). Toda a pilha do serviço
+é exercitada e só a rede é substituída:
+1. Gravação → as requisições seguem para a OpenAI e os servidores MCP;
+   cada troca é salva com o tempo de resposta observado
+2. Reprodução → a resposta gravada é devolvida sem rede, com a latência
+   gravada (realista), escalada ou zero
+
+Chaves:
+- LLM → corpo da requisição (modelo, mensagens, ferramentas) em forma
+  canônica
+- MCP → servidor + método JSON-RPC + parâmetros (o id da mensagem é
+  reescrito na reprodução)
+
+Trocas repetidas com a mesma chave são reproduzidas em ordem (e em ciclo).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(_canonical(value).encode("utf-8")).hexdigest()[:16]
+
+
+def _llm_key_body(body: Dict) -> Dict:
+    """
+    Corpo da requisição ao LLM sem variações entre processos
+
+    O agno monta a lista "required" dos schemas a partir de um set (ordem
+    muda com a randomização de hash), então listas "required" e a ordem
+    das ferramentas são normalizadas.
+    """
+    def normalize(value):
+        if isinstance(value, dict):
+            return {
+                k: sorted(v) if k == "required" and isinstance(v, list) else normalize(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+
+    normalized = normalize(body)
+    if isinstance(normalized.get("tools"), list):
+        normalized["tools"] = sorted(normalized["tools"], key=_canonical)
+    return normalized
+
+
+def _jsonrpc_messages(response_body: str, content_type: str) -> List[Dict]:
+    """Mensagens JSON-RPC de uma resposta MCP (JSON ou SSE)"""
+    if "text/event-stream" in content_type:
+        return [
+            json.loads(line[len("data:"):].strip())
+            for line in response_body.splitlines()
+            if line.startswith("data:") and line[len("data:"):].strip()
+        ]
+    return [json.loads(response_body)] if response_body.strip() else []
+
+
+class Cassette:
+    """Trocas HTTP gravadas (LLM e MCP) em arquivos JSON Lines"""
+
+    def __init__(self, directory: Path, servers: Dict[str, str]):
+        """
+        Args:
+            directory: Pasta dos cassetes (llm.jsonl, mcp.jsonl)
+            servers: URL do servidor MCP → nome estável usado na chave
+        """
+        self.directory = Path(directory)
+        self.servers = {url.rstrip("/"): name for url, name in servers.items()}
+        self.entries: Dict[str, List[Dict]] = defaultdict(list)
+        self.positions: Dict[str, int] = defaultdict(int)
+        self.recorded = defaultdict(int)
+        self.replayed = defaultdict(int)
+        self.misses: List[str] = []
+
+    # Classificação e chaves
+
+    def classify(self, request) -> Optional[str]:
+        if request.url.path.endswith("/chat/completions"):
+            return "llm"
+        if str(request.url).rstrip("/") in self.servers:
+            return "mcp"
+        return None
+
+    def key(self, kind: str, request, body: Dict) -> str:
+        if kind == "llm":
+            return f"llm:{_digest(_llm_key_body(body))}"
+        server = self.servers[str(request.url).rstrip("/")]
+        params = {k: v for k, v in (body.get("params") or {}).items() if k != "_meta"}
+        return f"mcp:{server}:{body.get('method')}:{_digest(params)}"
+
+    # Persistência
+
+    def path(self, kind: str) -> Path:
+        return self.directory / f"{kind}.jsonl"
+
+    def load(self) -> int:
+        total = 0
+        for kind in ("llm", "mcp"):
+            if not self.path(kind).exists():
+                continue
+            with self.path(kind).open(encoding="utf-8") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.entries[entry["key"]].append(entry)
+                    total += 1
+        return total
+
+    def append(self, kind: str, entry: Dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.path(kind).open("a", encoding="utf-8") as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.recorded[kind] += 1
+
+    def reset(self) -> None:
+        for kind in ("llm", "mcp"):
+            self.path(kind).unlink(missing_ok=True)
+
+    # Gravação / reprodução
+
+    async def record(self, http: ModuleType, request, send: Callable):
+        kind = self.classify(request)
+        if kind is None or request.method != "POST":
+            # GET (stream de notificações MCP) e DELETE seguem sem gravação
+            return await send()
+
+        body = json.loads(request.content or b"{}")
+        started_at = time.monotonic()
+        response = await send()
+        raw = await response.aread()
+        elapsed = time.monotonic() - started_at
+
+        if kind == "llm" or "id" in body:
+            content_type = response.headers.get("content-type", "")
+            entry = {
+                "key": self.key(kind, request, body),
+                "status": response.status_code,
+                "content_type": content_type,
+                "elapsed": round(elapsed, 4),
+                "session_id": response.headers.get("mcp-session-id"),
+            }
+            if kind == "llm":
+                entry["body"] = raw.decode("utf-8")
+            else:
+                messages = _jsonrpc_messages(raw.decode("utf-8"), content_type)
+                entry["message"] = next((m for m in messages if m.get("id") == body["id"]), None)
+            self.append(kind, entry)
+
+        # aread() já descomprime o corpo
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        }
+        return http.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=raw,
+            request=request,
+        )
+
+    async def replay(self, http: ModuleType, request, latency_scale: float):
+        kind = self.classify(request)
+        if kind is None:
+            raise RuntimeError(f"Requisição fora dos cassetes: {request.method} {request.url}")
+        if request.method != "POST":
+            # Sem stream de notificações (servidor sem suporte) / encerramento de sessão
+            return http.Response(405 if request.method == "GET" else 200, request=request)
+
+        body = json.loads(request.content or b"{}")
+        if kind == "mcp" and "id" not in body:
+            # Notificação do cliente (ex: notifications/initialized)
+            return http.Response(202, request=request)
+
+        key = self.key(kind, request, body)
+        recorded = self.entries.get(key)
+        if not recorded:
+            self.misses.append(key)
+            return http.Response(
+                599,
+                json={"error": {"message": f"Troca não gravada no cassete ({key}); grave com --record"}},
+                request=request,
+            )
+
+        entry = recorded[self.positions[key] % len(recorded)]
+        self.positions[key] += 1
+        self.replayed[kind] += 1
+        if latency_scale > 0:
+            await asyncio.sleep(entry["elapsed"] * latency_scale)
+
+        headers = {"content-type": entry["content_type"]}
+        if entry.get("session_id"):
+            headers["mcp-session-id"] = entry["session_id"]
+        if kind == "llm":
+            return http.Response(entry["status"], headers=headers, content=entry["body"].encode("utf-8"), request=request)
+
+        message = dict(entry["message"] or {}, id=body["id"])
+        return http.Response(
+            entry["status"],
+            headers={**headers, "content-type": "application/json"},
+            content=_canonical(message).encode("utf-8"),
+            request=request,
+        )
+
+
+def install(cassette: Cassette, mode: str, latency_scale: float = 1.0) -> None:
+    """
+    Substitui o transporte HTTP assíncrono do httpx (e do httpx2) pelo cassete
+
+    Args:
+        cassette: Cassete carregado (reprodução) ou vazio (gravação)
+        mode: "record" ou "replay"
+        latency_scale: Fator sobre a latência gravada (0 = sem latência)
+    """
+    modules = [httpx]
+    try:
+        import httpx2
+        modules.append(httpx2)
+    except ImportError:
+        pass
+
+    for http in modules:
+        original = http.AsyncHTTPTransport.handle_async_request
+
+        async def handle_async_request(transport, request, http=http, original=original):
+            if mode == "record":
+                return await cassette.record(http, request, lambda: original(transport, request))
+            return await cassette.replay(http, request, latency_scale)
+
+        http.AsyncHTTPTransport.handle_async_request = handle_async_request
@@ -0,0 +1,146 @@
+"""
+Pool de agentes pré-construídos
+
+Em vez de criar um Agent (modelo OpenAI + output_schema) a cada
+requisição, mantém N agentes prontos e os empresta com exclusividade,
+isolando o estado de cada execução.
+
+Fluxo:
+1. Startup → constrói N agentes
+2. Requisição → empresta um agente e associa as conexões MCP emprestadas
+3. Fim da requisição → ferramentas são removidas e o agente volta ao pool
+4. Conjunto de ferramentas mudou (ex: deploy de um MCP) → agente é reconstruído
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple, Union
+
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from agno.tools.function import Function
+from agno.tools.mcp import MCPTools
+
+from .config import settings
+from .models import AgentOutput
+from .prompts import SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+def tools_signature(tools: List[MCPTools]) -> Tuple[str, ...]:
+    """Assinatura do conjunto de ferramentas (nomes das funções MCP)"""
+    return tuple(sorted(name for toolkit in tools for name in toolkit.functions))
+
+
+class AgentPoolExhausted(Exception):
+    """Nenhum agente livre (empréstimo sem espera)"""
+
+
+class PooledAgent:
+    """Agente do pool com a assinatura das ferramentas usadas na construção"""
+
+    def __init__(self, agent: Agent, signature: Optional[Tuple[str, ...]] = None):
+        self.agent = agent
+        self.signature = signature
+
+
+class AgentPool:
+    """Pool de agentes Agno reutilizados entre requisições"""
+
+    def __init__(self, size: int, model_id: Optional[str] = None):
+        self.size = size
+        self.model_id = model_id or settings.agent_model
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.builds = 0
+        self.rebuilds = 0
+        self.leases = 0
+        self.lease_seconds_total = 0.0
+        self.exhausted = 0
+
+    def _build_agent(self) -> Agent:
+        """Constrói um agente com modelo e schema de saída"""
+        self.builds += 1
+        return Agent(
+            model=OpenAIChat(
+                id=self.model_id,
+                api_key=settings.openai_api_key,
+            ),
+            system_message=SYSTEM_PROMPT,
+            markdown=True,
+            output_schema=AgentOutput,
+        )
+
+    def start(self) -> None:
+        """Constrói os agentes do pool"""
+        for _ in range(self.size):
+            self.idle.put_nowait(PooledAgent(self._build_agent()))
+        logger.info(f"✅ Pool de agentes iniciado | Agentes: {self.size} | Modelo: {self.model_id}")
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        tools: List[MCPTools],
+        active_tools: Optional[List[Union[MCPTools, Function]]] = None,
+        wait: bool = True
+    ):
+        """
+        Empresta um agente configurado com as ferramentas da requisição
+
+        O agente só é reconstruído quando o conjunto de ferramentas muda;
+        caso contrário apenas as conexões MCP emprestadas são trocadas.
+
+        Args:
+            tools: Conexões MCP emprestadas (conjunto completo)
+            active_tools: Subconjunto exposto ao LLM (padrão: todas)
+            wait: False → falha na hora se não houver agente livre
+
+        Raises:
+            AgentPoolExhausted: Sem agente livre e wait=False
+        """
+        started_at = time.monotonic()
+        if wait:
+            pooled: PooledAgent = await asyncio.wait_for(
+                self.idle.get(),
+                timeout=settings.mcp_pool_lease_timeout_seconds
+            )
+        else:
+            try:
+                pooled = self.idle.get_nowait()
+            except asyncio.QueueEmpty:
+                self.exhausted += 1
+                raise AgentPoolExhausted(f"Nenhum agente livre no pool ({self.model_id})") from None
+
+        try:
+            signature = tools_signature(tools)
+            if pooled.signature is not None and pooled.signature != signature:
+                logger.info(
+                    f"🔄 Ferramentas mudaram ({len(pooled.signature)} → "
+                    f"{len(signature)}), reconstruindo agente"
+                )
+                pooled.agent = self._build_agent()
+                self.rebuilds += 1
+            pooled.signature = signature
+            pooled.agent.set_tools(tools if active_tools is None else active_tools)
+
+            self.leases += 1
+            self.lease_seconds_total += time.monotonic() - started_at
+
+            yield pooled.agent
+        finally:
+            # Não manter referências às conexões MCP devolvidas ao pool
+            pooled.agent.set_tools([])
+            self.idle.put_nowait(pooled)
+
+    def get_status(self) -> Dict:
+        return {
+            "model": self.model_id,
+            "size": self.size,
+            "idle": self.idle.qsize(),
+            "builds": self.builds,
+            "rebuilds": self.rebuilds,
+            "leases": self.leases,
+            "exhausted": self.exhausted,
+            "avg_lease_ms": round(self.lease_seconds_total / self.leases * 1000, 3) if self.leases else 0.0,
+        }
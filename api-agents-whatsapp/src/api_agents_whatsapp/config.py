@@ -3,6 +3,7 @@ Configurações da API de Agentes
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Dict
 
 
 class Settings(BaseSettings):
@@ -21,15 +22,101 @@ class Settings(BaseSettings):
     api_port: int = 5000
     api_host: str = "0.0.0.0"
     debug: bool = False
+    metrics_enabled: bool = True  # Métricas por etapa em GET /metrics (Prometheus)
+    debug_timings: bool = False  # Tempos por etapa no campo `timings` da AgentResponse
     
     # OpenAI
     openai_api_key: str = ""
     agent_model: str = "gpt-4o-mini"
     agent_temperature: float = 0.7
+    agent_pool_size: int = 4  # Agentes pré-construídos reutilizados entre requisições (por modelo)
+    
+    # Roteamento de modelo por complexidade (AGENT_MODEL = nível forte)
+    model_router_enabled: bool = True
+    agent_fast_model: str = "gpt-4.1-nano"
+    model_router_strong_threshold: int = 2  # Pontuação mínima para o modelo forte
+    model_router_long_message_chars: int = 280
+    
+    # Prazo por requisição e execução de contingência (hedging)
+    agent_deadline_seconds: float = 25.0  # Sem X-Request-Deadline-Ms/deadline_ms (orquestrador: 30s)
+    deadline_reserve_seconds: float = 1.0  # Margem para devolver a resposta de contingência
+    hedge_enabled: bool = True
+    hedge_after_seconds: float = 10.0  # Dispara a contingência (modelo rápido) após esse tempo
+    
+    # Agendador do LLM (orçamentos do provedor; 0 = sem limite)
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200000
+    scheduler_max_concurrent: int = 4  # Execuções simultâneas (≤ AGENT_POOL_SIZE)
+    scheduler_queue_timeout_seconds: float = 60.0
+    scheduler_reserved_tokens: int = 1500  # Schemas de tools + saída, somados à estimativa do prompt
+    batch_max_requests: int = 50  # Mensagens por chamada a /process-messages
+    
+    # Cota de tokens por usuário (janelas deslizantes; 0 = sem limite na janela)
+    user_quota_enabled: bool = True
+    user_quota_tokens_per_minute: int = 20000
+    user_quota_tokens_per_hour: int = 200000
+    user_quota_soft_ratio: float = 0.7  # A partir daqui: respostas curtas e modelo rápido
+    user_quota_max_users: int = 10000
+    
+    # Memória de conversa por sessão
+    memory_enabled: bool = True
+    memory_token_budget: int = 600  # Resumo + últimas trocas no prompt
+    memory_summary_max_tokens: int = 200
+    memory_summary_model: str = "gpt-4o-mini"
+    memory_max_sessions: int = 5000
+    memory_session_ttl_seconds: int = 21600
+    agent_max_prompt_tokens: int = 2500  # Mensagem do usuário + contexto (sem prompt de sistema)
+    
+    # Fast-path (respostas locais para saudações/agradecimentos/fora do tema)
+    fast_path_enabled: bool = True
+    fast_path_model_enabled: bool = True  # Modelo local (centróides) quando as regras não decidem
+    fast_path_model_threshold: float = 0.35  # Similaridade mínima (cosseno); só sem palavras de conteúdo
+    fast_path_max_message_chars: int = 80
+    fast_path_conversation_window_seconds: int = 900  # Após resposta do assistente, tudo segue para o agente
+    
+    # Cache semântico de respostas
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold_text: float = 0.85  # Similaridade mínima (cosseno)
+    semantic_cache_threshold_audio: float = 0.82
+    semantic_cache_length_slack: float = 0.75  # Limiar sobe com o tamanho: max(limiar, 1 - slack / palavras)
+    semantic_cache_ttl_seconds: int = 3600  # Acompanha o CACHE_TTL do projetos-lei-mcp
+    semantic_cache_recent_ttl_seconds: int = 900  # Perguntas sobre "hoje", "últimas", etc.
+    semantic_cache_max_entries: int = 2000
+    semantic_cache_max_message_chars: int = 300
+    
+    # Roteador de ferramentas (subconjunto de tools MCP por mensagem)
+    tool_router_enabled: bool = True
+    tool_router_max_message_chars: int = 600  # Acima disso usa todas as ferramentas
     
     # MCP Servers
     mcp_projetos_lei_url: str = "http://localhost:8000/mcp"
     mcp_users_url: str = "http://localhost:8001/mcp"
+    
+    # Pool de conexões MCP
+    mcp_projetos_lei_pool_size: int = 4
+    mcp_users_pool_size: int = 4
+    mcp_timeout_seconds: int = 10
+    mcp_pool_lease_timeout_seconds: float = 10.0  # Espera máxima por conexão livre
+    mcp_pool_health_check_seconds: int = 30
+    mcp_tool_catalog_refresh_seconds: int = 300  # Redescoberta periódica das ferramentas
+    
+    # Cache de resultados das ferramentas MCP (TTL 0 = sem cache)
+    tool_cache_enabled: bool = True
+    tool_cache_default_ttl_seconds: int = 0  # Ferramentas fora de TOOL_CACHE_TTLS (ex: novas, de escrita)
+    tool_cache_max_entries: int = 1000
+    tool_cache_ttls: Dict[str, int] = {
+        "buscar_projetos_recentes": 300,
+        "buscar_projetos_mais_votados": 600,
+        "obter_detalhes_projeto": 1800,
+        "pesquisar_legislacoes_internet": 1800,
+        "buscar_noticias_tema": 600,
+        "buscar_noticias_relacionadas": 600,
+        "listar_topicos_interesse": 3600,
+    }
+    
+    # Pré-busca de projetos recentes pelos tópicos do usuário (usa o cache acima)
+    prefetch_enabled: bool = True
+    prefetch_max_topics: int = 2
     # mcp_audio_url: str = "http://localhost:8001/mcp"
 
 
@@ -0,0 +1,160 @@
+"""
+Prazo por requisição e execuções de contingência (hedging)
+
+O orquestrador desiste da chamada após 30s; uma única completion lenta
+da OpenAI faz o usuário esperar tudo isso para receber um erro.
+1. Prazo → header X-Request-Deadline-Ms ou campo deadline_ms (tempo
+   restante em ms, sem depender do relógio do cliente); padrão
+   AGENT_DEADLINE_SECONDS
+2. Contingência → se a execução passar de HEDGE_AFTER_SECONDS (ou falhar),
+   uma segunda execução é disparada no modelo rápido e vale a que
+   terminar primeiro; a outra é cancelada. A contingência só usa um
+   agente livre: sob carga (todos emprestados pelo agendador) ela é
+   pulada em vez de esperar na fila do pool
+3. Prazo quase esgotado → resposta curta de contingência (partial=true)
+   em vez de erro 500 (no streaming SSE, o que já foi emitido vale como
+   resposta parcial)
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Prazo da requisição esgotado antes da resposta do agente"""
+
+
+class HedgeUnavailable(Exception):
+    """Sem capacidade para a execução de contingência (ela é pulada)"""
+
+
+@dataclass
+class Deadline:
+    """Instante (monotônico) em que a resposta precisa estar pronta"""
+    expires_at: float
+    started_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def start(cls, deadline_ms: Optional[int], default_seconds: float, reserve_seconds: float) -> "Deadline":
+        """
+        Prazo a partir de agora
+
+        Args:
+            deadline_ms: Tempo restante informado pelo cliente (None = padrão)
+            default_seconds: Prazo padrão
+            reserve_seconds: Margem para devolver a resposta antes do prazo do cliente
+        """
+        seconds = deadline_ms / 1000 if deadline_ms else default_seconds
+        now = time.monotonic()
+        return cls(expires_at=now + max(seconds - reserve_seconds, 0.0), started_at=now)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+
+@dataclass
+class HedgeOutcome:
+    """Resultado da execução vencedora"""
+    output: Any
+    winner: str
+    hedged: bool
+
+
+class HedgedRunner:
+    """Executa o agente com contingência após um limiar de latência ou falha"""
+
+    def __init__(self, hedge_after_seconds: float = 10.0, enabled: bool = True):
+        self.hedge_after_seconds = hedge_after_seconds
+        self.enabled = enabled
+        self.runs = 0
+        self.hedged = 0
+        self.fallbacks = 0
+        self.hedge_wins = 0
+        self.skipped = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> HedgeOutcome:
+        """
+        Executa `primary`; dispara `hedge` após hedge_after_seconds ou se
+        `primary` falhar, e retorna o primeiro resultado bem-sucedido.
+        `hedge` levanta HedgeUnavailable quando não há agente livre.
+
+        Raises:
+            A exceção da execução principal, se todas falharem
+        """
+        self.runs += 1
+        primary_task = asyncio.create_task(primary())
+        names = {primary_task: "primary"}
+        can_hedge = self.enabled and hedge is not None
+        error: Optional[BaseException] = None
+        skipped = False
+
+        def start_hedge(reason: str) -> None:
+            logger.info(f"🏁 {reason}, disparando execução de contingência")
+            names[asyncio.create_task(hedge())] = "hedge"
+
+        try:
+            pending = {primary_task}
+            if can_hedge:
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_after_seconds)
+                if not done:
+                    self.hedged += 1
+                    start_hedge(f"Agente sem resposta após {self.hedge_after_seconds:.0f}s")
+                    pending = set(names)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = names[task]
+                        if winner == "hedge":
+                            self.hedge_wins += 1
+                        return HedgeOutcome(task.result(), winner, hedged=len(names) > 1 and not skipped)
+                    if isinstance(task.exception(), HedgeUnavailable):
+                        skipped = True
+                        self.skipped += 1
+                        logger.info(f"⏭️  Contingência pulada: {task.exception()}")
+                        continue
+                    error = error or task.exception()
+                    logger.warning(f"⚠️  Execução {names[task]} falhou: {task.exception()!r}")
+
+                if not pending and can_hedge and len(names) == 1:
+                    # Falha rápida da principal: contingência como fallback
+                    self.fallbacks += 1
+                    start_hedge("Execução principal falhou")
+                    pending = {task for task in names if not task.done()}
+
+            self.failures += 1
+            raise error
+        finally:
+            running = [task for task in names if not task.done()]
+            for task in running:
+                task.cancel()
+            # Aguarda o cancelamento para que os agentes voltem limpos ao pool
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "hedge_after_seconds": self.hedge_after_seconds,
+            "runs": self.runs,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.runs, 3) if self.runs else 0.0,
+            "fallbacks": self.fallbacks,
+            "hedge_wins": self.hedge_wins,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
@@ -0,0 +1,372 @@
+"""
+Respostas rápidas locais (fast-path)
+
+Boa parte das mensagens do WhatsApp é "oi", "obrigado", só emojis ou
+assuntos sem relação com legislação. Essas mensagens são respondidas
+com templates personalizados, sem LLM e sem ferramentas MCP.
+
+Classificação:
+1. Regras → só emojis/símbolos, frases de saudação/agradecimento/despedida,
+   marcadores de assunto fora do tema
+2. Modelo local opcional → centróide mais próximo (hashing vectorizer)
+   treinado com exemplos embutidos, usado quando as regras não decidem.
+   Só confirma saudação/agradecimento/despedida, e só se não sobrar
+   nenhuma palavra de conteúdo ("obrigado, mas e a escala 6x1?" segue
+   para o agente)
+
+Mensagens com qualquer marcador legislativo seguem para o agente.
+Marcadores casam com palavras inteiras ("lei" não casa com "leite");
+só os radicais listados casam com o início da palavra.
+
+Logo depois de uma resposta do assistente, nada é respondido por
+template: "beleza", "perfeito" ou "👍" podem ser a resposta a uma
+pergunta do agente e seguem para ele (in_conversation).
+"""
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import AgentRequest
+from .text_vectors import HashingVectorizer, normalize
+
+logger = logging.getLogger(__name__)
+
+
+class FastPathCategory(str, Enum):
+    """Categorias respondidas localmente"""
+    GREETING = "saudacao"
+    THANKS = "agradecimento"
+    FAREWELL = "despedida"
+    EMOJI = "emoji"
+    OFF_TOPIC = "fora_de_tema"
+
+
+# Frases normalizadas (sem acentos) por categoria
+CATEGORY_PHRASES: Dict[FastPathCategory, List[str]] = {
+    FastPathCategory.GREETING: [
+        "bom dia", "boa tarde", "boa noite", "oi", "oii", "oiii", "ola",
+        "opa", "eai", "e ai", "salve", "hey", "alo", "tudo bem", "tudo bom",
+        "como vai", "beleza", "blz",
+    ],
+    FastPathCategory.THANKS: [
+        "obrigado", "obrigada", "obg", "brigado", "brigada", "valeu", "vlw",
+        "muito obrigado", "muito obrigada", "agradeco", "gratidao", "show",
+        "top", "massa", "otimo", "perfeito",
+    ],
+    FastPathCategory.FAREWELL: [
+        "tchau", "ate logo", "ate mais", "ate amanha", "falou", "flw",
+        "boa semana", "bom fim de semana", "fica com deus", "fui",
+    ],
+}
+
+# Palavras que podem acompanhar as frases sem mudar a intenção
+FILLER_WORDS = {
+    "e", "a", "o", "pra", "para", "voce", "vc", "voces", "pessoal", "amigo",
+    "amiga", "ne", "entao", "mesmo", "muito", "tudo", "bem", "ai", "por",
+    "isso", "ta", "sim", "kkk", "kkkk", "rs", "haha", "hehe", "ah",
+}
+
+# Palavras ou frases inteiras
+LEGISLATIVE_MARKERS = [
+    "lei", "leis", "projeto", "projetos", "pl", "pec", "mp", "medida provisoria",
+    "congresso", "camara", "senado", "stf", "voto", "votos", "votar", "votou",
+    "governo", "imposto", "impostos", "direito", "direitos", "reforma",
+    "constituicao", "proposta", "propostas", "salario", "saude", "educacao",
+    "seguranca", "moradia", "auxilio", "beneficio", "noticia", "noticias",
+    "opiniao", "acho", "contra", "a favor",
+]
+
+# Radicais (início da palavra): "deputad" → deputado, deputada, deputados
+LEGISLATIVE_STEMS = (
+    "deputad", "senador", "vereador", "votac", "politic", "aposentad",
+    "tributa", "legisla", "previdenc", "regulament", "legaliz", "proib",
+    "criminaliz", "descriminaliz",
+)
+
+# Sem apostas, loterias, jogo do bicho ou futebol: são temas de projetos de lei
+OFF_TOPIC_MARKERS = [
+    "signo", "signos", "previsao do tempo", "chover", "chuva", "bolo", "bolos",
+]
+
+OFF_TOPIC_STEMS = (
+    "receita", "horoscopo", "piada", "filme", "novela", "musica", "namorad",
+    "figurinha",
+)
+
+# Exemplos do modelo local (categoria "legislacao" = seguir para o agente)
+MODEL_EXAMPLES: Dict[str, List[str]] = {
+    FastPathCategory.GREETING.value: [
+        "oi tudo bem", "ola bom dia", "boa tarde pessoal", "oi boa noite",
+        "e ai como vai", "opa tudo certo", "oi estou aqui",
+    ],
+    FastPathCategory.THANKS.value: [
+        "obrigado pela ajuda", "muito obrigada pela explicacao", "valeu mesmo",
+        "agradeco a resposta", "obrigado entendi tudo", "show de bola obrigado",
+    ],
+    FastPathCategory.FAREWELL.value: [
+        "tchau ate amanha", "ate mais obrigado", "falou ate logo",
+        "boa noite ate amanha", "tenho que ir tchau",
+    ],
+    FastPathCategory.OFF_TOPIC.value: [
+        "me conta uma piada", "qual a receita de bolo de cenoura",
+        "qual o meu signo", "me indica um filme", "vai chover amanha",
+        "qual a novela de hoje",
+    ],
+    "legislacao": [
+        "o que e a pec", "quais os projetos sobre educacao",
+        "o que mudou na aposentadoria", "como votou meu deputado",
+        "explica a reforma tributaria", "tem alguma lei sobre saude",
+        "o que o congresso aprovou", "quero saber sobre o projeto de lei",
+        "eu acho essa lei injusta", "qual a situacao do pl",
+    ],
+}
+
+# Categorias que o modelo local pode confirmar (fora do tema só por regras)
+MODEL_CATEGORIES = (FastPathCategory.GREETING, FastPathCategory.THANKS, FastPathCategory.FAREWELL)
+
+MODEL_LABELS = {category.value for category in MODEL_CATEGORIES}
+
+# Palavras que não mudam a intenção de uma mensagem social (frases, exemplos, neutras)
+SOCIAL_WORDS = FILLER_WORDS | {
+    word
+    for category in MODEL_CATEGORIES
+    for text in CATEGORY_PHRASES[category] + MODEL_EXAMPLES[category.value]
+    for word in text.split()
+}
+
+
+def has_marker(normalized: str, markers: List[str], stems: Tuple[str, ...]) -> bool:
+    """Alguma frase inteira de markers ou palavra iniciada por um radical"""
+    padded = f" {normalized} "
+    if any(f" {marker} " in padded for marker in markers):
+        return True
+    return any(word.startswith(stems) for word in normalized.split())
+
+
+def content_words(normalized: str) -> List[str]:
+    """Palavras fora do vocabulário social ("obrigadoo" conta como "obrigado")"""
+    return [
+        word for word in normalized.split()
+        if word not in SOCIAL_WORDS and re.sub(r"(.)\1+$", r"\1", word) not in SOCIAL_WORDS
+    ]
+
+
+REPLY_TEMPLATES: Dict[FastPathCategory, List[str]] = {
+    FastPathCategory.GREETING: [
+        "Olá! 👋 Eu te ajudo a entender os projetos de lei do Congresso Nacional.",
+        "Oi! 😊 Estou aqui para explicar, de forma simples, o que acontece no Congresso.",
+    ],
+    FastPathCategory.THANKS: [
+        "Por nada! 😊 Fico feliz em ajudar.",
+        "Eu que agradeço! 🙌",
+    ],
+    FastPathCategory.FAREWELL: [
+        "Até mais! 👋 Quando quiser saber de alguma lei, é só mandar mensagem.",
+        "Tchau! Estarei por aqui quando precisar. 😊",
+    ],
+    FastPathCategory.EMOJI: [
+        "😊 Se quiser saber de algum projeto de lei, é só me perguntar!",
+    ],
+    FastPathCategory.OFF_TOPIC: [
+        "Esse assunto eu não consigo responder. 🙏 Eu ajudo com projetos de lei e temas do Congresso Nacional.",
+    ],
+}
+
+
+@dataclass
+class FastPathResult:
+    """Resultado da classificação"""
+    category: Optional[FastPathCategory]
+    confidence: float
+    source: str  # "regras" | "modelo" | "agente"
+
+    @property
+    def handled(self) -> bool:
+        return self.category is not None
+
+
+class NearestCentroidModel:
+    """Modelo mínimo: centróides dos exemplos por categoria"""
+
+    def __init__(self, examples: Dict[str, List[str]], vectorizer: HashingVectorizer):
+        self.vectorizer = vectorizer
+        self.labels = list(examples.keys())
+        centroids = []
+        for label in self.labels:
+            centroid = vectorizer.transform_many(examples[label]).mean(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        self.centroids = np.vstack(centroids)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Categoria mais próxima e similaridade (cosseno)"""
+        scores = self.centroids @ self.vectorizer.transform(text)
+        best = int(np.argmax(scores))
+        return self.labels[best], float(scores[best])
+
+
+class FastPathResponder:
+    """Classificador local + respostas por template"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        model_enabled: bool = True,
+        model_threshold: float = 0.35,
+        max_message_chars: int = 80
+    ):
+        self.enabled = enabled
+        self.model_threshold = model_threshold
+        self.max_message_chars = max_message_chars
+        self.model = (
+            NearestCentroidModel(MODEL_EXAMPLES, HashingVectorizer())
+            if model_enabled else None
+        )
+        self.requests = 0
+        self.handled_by_category: Dict[str, int] = {c.value: 0 for c in FastPathCategory}
+        self.fall_through = 0
+        self.fall_through_in_conversation = 0
+        self.confidence_total = 0.0
+        self.latency_seconds_total = 0.0
+
+    def _match_phrases(self, normalized: str) -> Optional[FastPathCategory]:
+        """Mensagem composta só por frases de uma categoria (+ palavras neutras)"""
+        matched: Optional[FastPathCategory] = None
+        remaining = f" {normalized} "
+        for category, phrases in CATEGORY_PHRASES.items():
+            # Frases mais longas primeiro ("muito obrigado" antes de "obrigado")
+            for phrase in sorted(phrases, key=len, reverse=True):
+                if f" {phrase} " in remaining:
+                    remaining = remaining.replace(f" {phrase} ", " ")
+                    # Despedida/agradecimento prevalecem sobre saudação ("valeu, boa noite")
+                    if matched is None or matched == FastPathCategory.GREETING:
+                        matched = category
+
+        if matched and all(word in FILLER_WORDS for word in remaining.split()):
+            return matched
+        return None
+
+    def classify(self, message: str, in_conversation: bool = False) -> FastPathResult:
+        """
+        Classifica a mensagem (categoria None → seguir para o agente)
+
+        Args:
+            message: Mensagem do usuário
+            in_conversation: Assistente respondeu há pouco nesta sessão
+                (a mensagem pode ser resposta a uma pergunta dele)
+        """
+        if in_conversation:
+            return FastPathResult(None, 1.0, "conversa")
+
+        if not any(c.isalnum() for c in message):
+            return FastPathResult(FastPathCategory.EMOJI, 1.0, "regras")
+
+        if len(message) > self.max_message_chars:
+            return FastPathResult(None, 1.0, "regras")
+
+        normalized = normalize(message)
+
+        if has_marker(normalized, LEGISLATIVE_MARKERS, LEGISLATIVE_STEMS):
+            return FastPathResult(None, 1.0, "regras")
+
+        category = self._match_phrases(normalized)
+        if category:
+            return FastPathResult(category, 0.95, "regras")
+
+        if has_marker(normalized, OFF_TOPIC_MARKERS, OFF_TOPIC_STEMS):
+            return FastPathResult(FastPathCategory.OFF_TOPIC, 0.75, "regras")
+
+        if self.model:
+            label, score = self.model.predict(normalized)
+            if (
+                label in MODEL_LABELS
+                and score >= self.model_threshold
+                and not content_words(normalized)
+            ):
+                return FastPathResult(FastPathCategory(label), score, "modelo")
+            return FastPathResult(None, score, "modelo")
+
+        return FastPathResult(None, 0.0, "regras")
+
+    def _render(self, category: FastPathCategory, request: AgentRequest, audio: bool) -> str:
+        """Template + personalização (tópicos de interesse)"""
+        reply = random.choice(REPLY_TEMPLATES[category])
+
+        topics = (request.user_preferences or {}).get("topics") or []
+        if category in (FastPathCategory.GREETING, FastPathCategory.EMOJI, FastPathCategory.OFF_TOPIC):
+            if topics:
+                reply += f" Quer saber as novidades sobre {', '.join(topics[:3])}?"
+            else:
+                reply += " Sobre qual tema você quer saber?"
+
+        if audio:
+            # Resposta em áudio: sem emojis/símbolos
+            reply = "".join(c for c in reply if c.isalnum() or c.isspace() or c in ".,!?;:-")
+            reply = " ".join(reply.split())
+        return reply
+
+    def try_respond(
+        self,
+        request: AgentRequest,
+        audio: bool = False,
+        in_conversation: bool = False
+    ) -> Optional[str]:
+        """
+        Responde localmente se a mensagem for de uma categoria simples
+
+        Args:
+            request: Requisição do agente
+            audio: Se a resposta será enviada em áudio
+            in_conversation: Assistente respondeu há pouco nesta sessão
+
+        Returns:
+            Texto da resposta ou None (seguir para o agente)
+        """
+        if not self.enabled:
+            return None
+
+        started_at = time.perf_counter()
+        result = self.classify(request.user_message, in_conversation)
+        self.requests += 1
+
+        if not result.handled:
+            self.fall_through += 1
+            if result.source == "conversa":
+                self.fall_through_in_conversation += 1
+            logger.info(
+                f"➡️  Fast-path: segue para o agente "
+                f"| Confiança: {result.confidence:.2f} ({result.source})"
+            )
+            return None
+
+        reply = self._render(result.category, request, audio)
+        elapsed = time.perf_counter() - started_at
+        self.handled_by_category[result.category.value] += 1
+        self.confidence_total += result.confidence
+        self.latency_seconds_total += elapsed
+
+        logger.info(
+            f"⚡ Fast-path [{result.category.value}] | Confiança: {result.confidence:.2f} "
+            f"({result.source}) | {elapsed * 1000:.1f}ms"
+        )
+        return reply
+
+    def get_status(self) -> Dict:
+        handled = self.requests - self.fall_through
+        return {
+            "enabled": self.enabled,
+            "model_enabled": self.model is not None,
+            "requests": self.requests,
+            "handled": handled,
+            "handled_by_category": self.handled_by_category,
+            "fall_through": self.fall_through,
+            "fall_through_in_conversation": self.fall_through_in_conversation,
+            "fall_through_rate": round(self.fall_through / self.requests, 3) if self.requests else 0.0,
+            "avg_confidence": round(self.confidence_total / handled, 3) if handled else 0.0,
+            "avg_latency_ms": round(self.latency_seconds_total / handled * 1000, 3) if handled else 0.0,
+        }
@@ -0,0 +1,79 @@
+"""
+Métricas de uso do LLM
+
+Acumula os tokens reportados pelo provedor em cada execução do agente:
+1. Tokens de prompt (entrada) e quantos vieram do cache do provedor
+2. Tokens de saída
+3. Duração e tempo até o primeiro token (quando disponível)
+"""
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageStats:
+    """Contadores agregados de tokens e latência do LLM"""
+
+    def __init__(self):
+        self.runs = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.duration_seconds_total = 0.0
+        self.ttft_seconds_total = 0.0
+        self.ttft_samples = 0
+        self.last: Dict = {}
+
+    def record(self, response_output) -> Optional[Dict]:
+        """
+        Registra as métricas de uma execução do agente
+
+        Args:
+            response_output: RunOutput do agno
+
+        Returns:
+            Métricas da execução (ou None se o provedor não as enviou)
+        """
+        metrics = getattr(response_output, "metrics", None)
+        if metrics is None:
+            return None
+
+        run = {
+            "input_tokens": metrics.input_tokens or 0,
+            "cached_input_tokens": metrics.cache_read_tokens or 0,
+            "output_tokens": metrics.output_tokens or 0,
+            "duration_seconds": metrics.duration or 0.0,
+            "ttft_seconds": metrics.time_to_first_token,
+        }
+
+        self.runs += 1
+        self.input_tokens += run["input_tokens"]
+        self.cached_input_tokens += run["cached_input_tokens"]
+        self.output_tokens += run["output_tokens"]
+        self.duration_seconds_total += run["duration_seconds"]
+        if run["ttft_seconds"] is not None:
+            self.ttft_seconds_total += run["ttft_seconds"]
+            self.ttft_samples += 1
+        self.last = run
+
+        logger.info(
+            f"📊 Tokens: entrada {run['input_tokens']} "
+            f"(cache {run['cached_input_tokens']}) | saída {run['output_tokens']} "
+            f"| Duração: {run['duration_seconds']:.2f}s"
+        )
+        return run
+
+    def get_status(self) -> Dict:
+        return {
+            "runs": self.runs,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "cache_hit_ratio": round(self.cached_input_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            "output_tokens": self.output_tokens,
+            "avg_input_tokens": round(self.input_tokens / self.runs, 1) if self.runs else 0.0,
+            "avg_output_tokens": round(self.output_tokens / self.runs, 1) if self.runs else 0.0,
+            "avg_duration_seconds": round(self.duration_seconds_total / self.runs, 3) if self.runs else 0.0,
+            "avg_ttft_seconds": round(self.ttft_seconds_total / self.ttft_samples, 3) if self.ttft_samples else None,
+            "last_run": self.last,
+        }
@@ -2,11 +2,13 @@
 API de Agentes para gerar mensagens do WhatsApp
 """
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .routes import router
+from .services import agent_service
 
 # Configurar logging
 logging.basicConfig(
@@ -15,11 +17,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await agent_service.startup()
+    yield
+    await agent_service.shutdown()
+
+
 # Inicializar FastAPI
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description="API de Agentes Agno para gerar respostas a mensagens do WhatsApp",
+    lifespan=lifespan,
 )
 
 # CORS
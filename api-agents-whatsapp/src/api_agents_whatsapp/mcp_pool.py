@@ -0,0 +1,469 @@
+"""
+Pool de conexões MCP
+
+Mantém sessões MCP (streamable-http) abertas desde a inicialização,
+em vez de criar MCPTools novos a cada requisição.
+
+Fluxo:
+1. Startup → abre N conexões por servidor MCP
+2. Requisição → empresta uma conexão de cada servidor (lease)
+3. Fim da requisição → conexão volta ao pool (se uma chamada de
+   ferramenta compartilhada ainda usa a sessão, só quando ela terminar)
+4. Background → health check (ping) das conexões ociosas e reconexão
+5. Background → atualização do catálogo de ferramentas (tool_catalog)
+6. Chamadas de ferramentas → memoizadas por (servidor, ferramenta, args) (tool_cache)
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+
+from agno.tools.function import Function
+from agno.tools.mcp import MCPTools
+from agno.utils.mcp import get_entrypoint_for_tool
+from mcp import types
+
+from .config import settings
+from .tool_cache import ToolResultCache
+from .tool_catalog import ServerCatalog, ToolCatalog
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LeasedTools:
+    """Conexões MCP emprestadas para uma requisição"""
+    tools: List[MCPTools]
+    setup_seconds: float
+
+
+class CatalogMCPTools(MCPTools):
+    """
+    MCPTools que registra as ferramentas a partir do catálogo
+
+    Só chama list_tools quando o servidor ainda não está no catálogo.
+    Também escuta a notificação tools/list_changed do servidor.
+    """
+
+    def __init__(
+        self,
+        server_name: str,
+        catalog: ToolCatalog,
+        on_list_changed: Optional[Callable[[], None]] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.server_name = server_name
+        self.catalog = catalog
+        self.tool_cache = tool_cache
+        self.on_list_changed = on_list_changed
+        self.catalog_version: Optional[str] = None
+        # Chamadas compartilhadas (tool_cache) em andamento nesta sessão
+        self.active_calls: Set[asyncio.Task] = set()
+
+    async def initialize(self) -> None:
+        if self.session is not None and self.on_list_changed:
+            # O agno não expõe o message_handler da ClientSession
+            self.session._message_handler = self._handle_message
+        await super().initialize()
+
+    async def _handle_message(self, message) -> None:
+        if (
+            isinstance(message, types.ServerNotification)
+            and isinstance(message.root, types.ToolListChangedNotification)
+        ):
+            logger.info(f"📣 Servidor MCP [{self.server_name}] notificou mudança de ferramentas")
+            self.on_list_changed()
+
+    async def build_tools(self) -> None:
+        """Registra as ferramentas do catálogo (descobre apenas se ausente)"""
+        entry = self.catalog.get(self.server_name)
+        if entry is None:
+            available_tools = await self.session.list_tools()
+            self.catalog.update(self.server_name, available_tools.tools)
+            entry = self.catalog.get(self.server_name)
+        self.apply_catalog(entry)
+
+    def apply_catalog(self, entry: ServerCatalog) -> None:
+        """Recria as funções do toolkit a partir dos schemas do catálogo"""
+        functions = {}
+        for tool in entry.tools:
+            entrypoint = get_entrypoint_for_tool(
+                tool=tool,
+                session=self.session,
+                mcp_tools_instance=self,
+            )
+            if self.tool_cache is not None:
+                entrypoint = self.tool_cache.wrap(
+                    self.server_name, tool.name, entrypoint, tool.inputSchema,
+                    active_calls=self.active_calls,
+                )
+            functions[tool.name] = Function(
+                name=tool.name,
+                description=tool.description,
+                parameters=tool.inputSchema,
+                entrypoint=entrypoint,
+                skip_entrypoint_processing=True,
+            )
+        self.functions = functions
+        self.catalog_version = entry.version
+
+
+class PooledConnection:
+    """
+    Conexão MCP mantida por uma task dedicada
+
+    O transporte streamable-http (anyio) exige que a sessão seja aberta
+    e fechada na mesma task, por isso cada conexão tem a sua.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        catalog: ToolCatalog,
+        on_list_changed: Optional[Callable[[], None]] = None,
+        tool_cache: Optional[ToolResultCache] = None
+    ):
+        self.name = name
+        self.url = url
+        self.catalog = catalog
+        self.on_list_changed = on_list_changed
+        self.tool_cache = tool_cache
+        self.tools: Optional[CatalogMCPTools] = None
+        self.task: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+        self.closing = asyncio.Event()
+
+    @property
+    def initialized(self) -> bool:
+        return self.tools is not None and self.tools.initialized
+
+    def busy_call(self) -> Optional[asyncio.Task]:
+        """Chamada compartilhada que ainda usa a sessão (ou None)"""
+        if self.tools is None:
+            return None
+        return next((task for task in self.tools.active_calls if not task.done()), None)
+
+    async def open(self) -> None:
+        self.ready.clear()
+        self.closing.clear()
+        self.task = asyncio.create_task(self._run())
+        await self.ready.wait()
+
+    async def _run(self) -> None:
+        tools = CatalogMCPTools(
+            server_name=self.name,
+            catalog=self.catalog,
+            on_list_changed=self.on_list_changed,
+            tool_cache=self.tool_cache,
+            transport="streamable-http",
+            url=self.url,
+            timeout_seconds=settings.mcp_timeout_seconds,
+        )
+        try:
+            await tools.connect()  # erros de conexão são logados pelo agno
+            self.tools = tools
+            self.ready.set()
+            await self.closing.wait()
+        finally:
+            self.ready.set()
+            try:
+                await tools.close()
+            except BaseException:
+                pass
+
+    async def close(self) -> None:
+        self.closing.set()
+        if self.task:
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def is_alive(self) -> bool:
+        if not self.initialized:
+            return False
+        try:
+            # Ping em sessão encerrada pelo servidor pode não retornar nunca
+            return await asyncio.wait_for(
+                self.tools.is_alive(),
+                timeout=settings.mcp_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            return False
+
+
+class MCPServerPool:
+    """Pool de conexões para um servidor MCP"""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        size: int,
+        catalog: ToolCatalog,
+        tool_cache: Optional[ToolResultCache] = None
+    ):
+        self.name = name
+        self.url = url
+        self.size = size
+        self.catalog = catalog
+        self.tool_cache = tool_cache
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.connections: List[PooledConnection] = []
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.reconnects = 0
+        self.deferred_releases = 0
+
+    async def start(self) -> None:
+        """Abre todas as conexões do pool"""
+        self.connections = [
+            PooledConnection(self.name, self.url, self.catalog, self._schedule_refresh, self.tool_cache)
+            for _ in range(self.size)
+        ]
+        # A primeira conexão carrega o catálogo; as demais o reutilizam
+        await self.connections[0].open()
+        await asyncio.gather(*(conn.open() for conn in self.connections[1:]))
+
+        for conn in self.connections:
+            self.idle.put_nowait(conn)
+
+        connected = sum(1 for conn in self.connections if conn.initialized)
+        logger.info(f"🔌 Pool MCP [{self.name}] {connected}/{self.size} conexões abertas ({self.url})")
+
+    async def stop(self) -> None:
+        """Fecha todas as conexões"""
+        await asyncio.gather(*(conn.close() for conn in self.connections))
+
+    async def _reconnect(self, conn: PooledConnection) -> None:
+        await conn.close()
+        await conn.open()
+        self.reconnects += 1
+        if conn.initialized:
+            logger.info(f"🔄 Conexão MCP [{self.name}] restabelecida")
+        else:
+            logger.warning(f"⚠️  Falha ao reconectar MCP [{self.name}]")
+
+    async def acquire(self) -> PooledConnection:
+        """Empresta uma conexão (reconecta se estiver fechada)"""
+        conn = await asyncio.wait_for(
+            self.idle.get(),
+            timeout=settings.mcp_pool_lease_timeout_seconds
+        )
+        if not conn.initialized:
+            try:
+                await self._reconnect(conn)
+            except BaseException:
+                self.idle.put_nowait(conn)
+                raise
+
+        # Catálogo mudou desde a última vez → reaplicar schemas
+        entry = self.catalog.get(self.name)
+        if conn.initialized and entry and conn.tools.catalog_version != entry.version:
+            conn.tools.apply_catalog(entry)
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        """
+        Devolve a conexão ao pool
+
+        Uma chamada compartilhada (single-flight) iniciada pela requisição
+        pode continuar para outros chamadores depois que ela terminou:
+        a conexão só volta quando a sessão estiver livre.
+        """
+        if conn.busy_call() is not None:
+            self.deferred_releases += 1
+            logger.info(f"⏳ Conexão MCP [{self.name}] volta ao pool após chamada compartilhada")
+        self._release_when_idle(conn)
+
+    def _release_when_idle(self, conn: PooledConnection, _task: Optional[asyncio.Task] = None) -> None:
+        busy = conn.busy_call()
+        if busy is not None:
+            busy.add_done_callback(functools.partial(self._release_when_idle, conn))
+            return
+        self.idle.put_nowait(conn)
+
+    async def health_check(self) -> None:
+        """Verifica conexões ociosas com ping e reconecta as que caíram"""
+        for _ in range(self.idle.qsize()):
+            try:
+                conn = self.idle.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                if not await conn.is_alive():
+                    await self._reconnect(conn)
+            except Exception as e:
+                logger.error(f"❌ Erro no health check MCP [{self.name}]: {e}")
+            finally:
+                self.idle.put_nowait(conn)
+
+    async def refresh_catalog(self) -> bool:
+        """
+        Redescobre as ferramentas usando uma conexão do pool
+
+        Returns:
+            True se o catálogo mudou
+        """
+        conn = await self.acquire()
+        try:
+            if not conn.initialized:
+                return False
+            available_tools = await conn.tools.session.list_tools()
+            changed = self.catalog.update(self.name, available_tools.tools)
+            if changed and self.tool_cache is not None:
+                # Schemas mudaram (deploy) → resultados antigos podem não valer mais
+                self.tool_cache.invalidate(self.name)
+            return changed
+        finally:
+            self.release(conn)
+
+    def _schedule_refresh(self) -> None:
+        """Agenda atualização (chamado pela notificação list_changed)"""
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self.refresh_catalog())
+
+    def get_status(self) -> Dict:
+        entry = self.catalog.get(self.name)
+        return {
+            "url": self.url,
+            "catalog_version": entry.version if entry else None,
+            "size": self.size,
+            "idle": self.idle.qsize(),
+            "connected": sum(1 for conn in self.connections if conn.initialized),
+            "reconnects": self.reconnects,
+            "deferred_releases": self.deferred_releases,
+        }
+
+
+class MCPPoolManager:
+    """Gerencia os pools dos servidores MCP usados pelo agente"""
+
+    def __init__(self):
+        self.catalog = ToolCatalog()
+        self.tool_cache = ToolResultCache(
+            tool_ttls=settings.tool_cache_ttls,
+            default_ttl_seconds=settings.tool_cache_default_ttl_seconds,
+            max_entries=settings.tool_cache_max_entries,
+            enabled=settings.tool_cache_enabled,
+        )
+        self.pools: Dict[str, MCPServerPool] = {
+            "projetos_lei": MCPServerPool(
+                name="projetos_lei",
+                url=settings.mcp_projetos_lei_url,
+                size=settings.mcp_projetos_lei_pool_size,
+                catalog=self.catalog,
+                tool_cache=self.tool_cache,
+            ),
+            "users": MCPServerPool(
+                name="users",
+                url=settings.mcp_users_url,
+                size=settings.mcp_users_pool_size,
+                catalog=self.catalog,
+                tool_cache=self.tool_cache,
+            ),
+        }
+        self.health_task: Optional[asyncio.Task] = None
+        self.catalog_task: Optional[asyncio.Task] = None
+        self.leases = 0
+        self.setup_seconds_total = 0.0
+        self.last_setup_seconds = 0.0
+
+    async def start(self) -> None:
+        await asyncio.gather(*(pool.start() for pool in self.pools.values()))
+        self.health_task = asyncio.create_task(self._health_loop())
+        self.catalog_task = asyncio.create_task(self._catalog_loop())
+
+    async def stop(self) -> None:
+        for task in (self.health_task, self.catalog_task):
+            if task:
+                task.cancel()
+        for pool in self.pools.values():
+            await pool.stop()
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.mcp_pool_health_check_seconds)
+            for pool in self.pools.values():
+                await pool.health_check()
+
+    async def _catalog_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.mcp_tool_catalog_refresh_seconds)
+            try:
+                await self.refresh_catalog()
+            except Exception as e:
+                logger.error(f"❌ Erro ao atualizar catálogo MCP: {e!r}")
+
+    async def refresh_catalog(self) -> Dict[str, bool]:
+        """Atualiza o catálogo de todos os servidores (nome → mudou)"""
+        names = list(self.pools.keys())
+        results = await asyncio.gather(
+            *(self.pools[name].refresh_catalog() for name in names),
+            return_exceptions=True
+        )
+        changed = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"❌ Falha ao atualizar catálogo MCP [{name}]: {result!r}")
+                changed[name] = False
+            else:
+                changed[name] = result
+        return changed
+
+    @asynccontextmanager
+    async def lease_all(self):
+        """
+        Empresta uma conexão de cada servidor MCP
+
+        Servidores indisponíveis são omitidos (agente segue sem eles).
+        O tempo de espera + reconexão é reportado como setup MCP.
+        """
+        started_at = time.monotonic()
+        tasks = {name: asyncio.ensure_future(pool.acquire()) for name, pool in self.pools.items()}
+        try:
+            await asyncio.wait(tasks.values())
+        except BaseException:
+            # Cancelada no meio: devolve o que já foi (ou ainda vier a ser) emprestado
+            for name, task in tasks.items():
+                task.cancel()
+                task.add_done_callback(functools.partial(self._release_acquired, self.pools[name]))
+            raise
+
+        acquired: Dict[str, PooledConnection] = {}
+        for name, task in tasks.items():
+            if task.exception() is not None:
+                logger.error(f"❌ Sem conexão MCP disponível [{name}]: {task.exception()!r}")
+            else:
+                acquired[name] = task.result()
+
+        setup_seconds = time.monotonic() - started_at
+        self.leases += 1
+        self.setup_seconds_total += setup_seconds
+        self.last_setup_seconds = setup_seconds
+
+        try:
+            yield LeasedTools(
+                tools=[conn.tools for conn in acquired.values() if conn.initialized],
+                setup_seconds=setup_seconds,
+            )
+        finally:
+            for name, conn in acquired.items():
+                self.pools[name].release(conn)
+
+    @staticmethod
+    def _release_acquired(pool: MCPServerPool, task: asyncio.Future) -> None:
+        """Devolve ao pool a conexão de um acquire abandonado"""
+        if not task.cancelled() and task.exception() is None:
+            pool.release(task.result())
+
+    def get_status(self) -> Dict:
+        return {
+            "pools": {name: pool.get_status() for name, pool in self.pools.items()},
+            "leases": self.leases,
+            "avg_setup_ms": round(self.setup_seconds_total / self.leases * 1000, 1) if self.leases else 0.0,
+            "last_setup_ms": round(self.last_setup_seconds * 1000, 1),
+        }
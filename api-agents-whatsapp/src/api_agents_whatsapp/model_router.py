@@ -0,0 +1,153 @@
+"""
+Roteamento de modelo por complexidade
+
+Um único modelo atende de "obrigado" a comparações entre projetos.
+Cada mensagem que chega ao agente recebe uma pontuação com
+características locais, sem chamadas externas:
+1. Tamanho da mensagem
+2. Quantidade de proposições citadas (PL, PEC, MP...) e pedidos de comparação
+3. Ferramentas prováveis (notícias, opinião, perfil além da legislação)
+4. Várias perguntas na mesma mensagem
+5. Modo de resposta → áudio é curto e oral (pontua menos)
+
+Pontuação abaixo do limiar → modelo rápido; a partir dele → modelo forte.
+"""
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Dict, List
+
+from .models import AgentRequest
+from .text_vectors import normalize
+
+logger = logging.getLogger(__name__)
+
+
+class ModelTier(str, Enum):
+    """Níveis de modelo"""
+    FAST = "fast"
+    STRONG = "strong"
+
+
+# "PL 1234/2023", "PEC 45", "MP nº 1.200", "PLP 68"
+BILL_REFERENCE = re.compile(r"\b(?:pl|plp|pec|pdl|mp|mpv)\s*(?:n[ºo°.]?\s*)?\d[\d.]*(?:\s*/\s*\d{2,4})?", re.IGNORECASE)
+
+COMPARISON_MARKERS = ["compar", "diferenca", "versus", " vs ", "melhor ou pior", "qual a relacao"]
+
+# Intenções que adicionam ferramentas (e turnos) além da legislação
+EXTRA_TOOL_INTENTS = {"noticias", "opiniao", "perfil"}
+
+
+@dataclass
+class RoutingDecision:
+    """Modelo escolhido para uma mensagem"""
+    tier: ModelTier
+    model: str
+    score: int
+    features: Dict
+
+
+class ModelRouter:
+    """Escolhe o nível de modelo pela complexidade estimada da mensagem"""
+
+    def __init__(
+        self,
+        fast_model: str,
+        strong_model: str,
+        enabled: bool = True,
+        strong_threshold: int = 2,
+        long_message_chars: int = 280
+    ):
+        self.models = {ModelTier.FAST: fast_model, ModelTier.STRONG: strong_model}
+        self.enabled = enabled
+        self.strong_threshold = strong_threshold
+        self.long_message_chars = long_message_chars
+        self.decisions: Dict[str, int] = {tier.value: 0 for tier in ModelTier}
+        self.latencies: Dict[str, Deque[float]] = {tier.value: deque(maxlen=500) for tier in ModelTier}
+        self.score_total = 0
+
+    def score(self, request: AgentRequest, intents: List[str], audio: bool) -> RoutingDecision:
+        """Pontuação de complexidade e características usadas"""
+        message = request.user_message
+        normalized = f" {normalize(message)} "
+        bills = len({" ".join(m.lower().split()) for m in BILL_REFERENCE.findall(message)})
+        extra_intents = sorted(EXTRA_TOOL_INTENTS & set(intents))
+        features = {
+            "chars": len(message),
+            "bills": bills,
+            "comparison": any(marker in normalized for marker in COMPARISON_MARKERS),
+            "extra_intents": extra_intents,
+            "questions": message.count("?"),
+            "audio": audio,
+        }
+
+        score = 0
+        if features["chars"] > self.long_message_chars:
+            score += 2 if features["chars"] > 2 * self.long_message_chars else 1
+        score += min(bills, 2)
+        score += 1 if features["comparison"] else 0
+        score += len(extra_intents)
+        score += 1 if features["questions"] >= 2 else 0
+        score -= 1 if audio else 0
+
+        tier = ModelTier.STRONG if score >= self.strong_threshold else ModelTier.FAST
+        return RoutingDecision(tier=tier, model=self.models[tier], score=score, features=features)
+
+    def route(
+        self,
+        request: AgentRequest,
+        intents: List[str],
+        audio: bool,
+        force_fast: bool = False
+    ) -> RoutingDecision:
+        """
+        Escolhe o modelo da mensagem
+
+        Args:
+            request: Requisição do agente
+            intents: Intenções detectadas pelo roteador de ferramentas
+            audio: Se a resposta será enviada em áudio
+            force_fast: Usar o modelo rápido sem pontuar (usuário perto do limite de cota)
+        """
+        if self.enabled and force_fast:
+            decision = RoutingDecision(ModelTier.FAST, self.models[ModelTier.FAST], 0, {"quota": True})
+            logger.info(f"🎚️  Modelo: {decision.tier.value} ({decision.model}) | Cota do usuário perto do limite")
+        elif not self.enabled:
+            decision = RoutingDecision(ModelTier.STRONG, self.models[ModelTier.STRONG], 0, {})
+        else:
+            decision = self.score(request, intents, audio)
+            logger.info(
+                f"🎚️  Modelo: {decision.tier.value} ({decision.model}) | Pontuação: {decision.score} "
+                f"| {', '.join(f'{k}={v}' for k, v in decision.features.items())}"
+            )
+
+        self.decisions[decision.tier.value] += 1
+        self.score_total += decision.score
+        return decision
+
+    def record_latency(self, tier: ModelTier, seconds: float) -> None:
+        self.latencies[tier.value].append(seconds)
+        logger.info(f"⏱️  Execução do agente [{tier.value}]: {seconds:.2f}s")
+
+    def get_status(self) -> Dict:
+        total = sum(self.decisions.values())
+        tiers = {}
+        for tier in ModelTier:
+            samples = sorted(self.latencies[tier.value])
+            runs = self.decisions[tier.value]
+            tiers[tier.value] = {
+                "model": self.models[tier],
+                "requests": runs,
+                "share": round(runs / total, 3) if total else 0.0,
+                "avg_latency_seconds": round(sum(samples) / len(samples), 3) if samples else 0.0,
+                "p95_latency_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "strong_threshold": self.strong_threshold,
+            "long_message_chars": self.long_message_chars,
+            "avg_score": round(self.score_total / total, 2) if total else 0.0,
+            "tiers": tiers,
+        }
@@ -2,7 +2,7 @@
 Modelos de dados da API
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from datetime import datetime
 
 
@@ -20,6 +20,36 @@ class AgentRequest(BaseModel):
         default=None,
         description="Preferências do usuário (áudio/texto, tópicos)"
     )
+    recent_history: Optional[List[dict]] = Field(
+        default=None,
+        description="Últimas trocas da sessão (user_message, agent_response), enviadas pelo orquestrador"
+    )
+    deadline_ms: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Tempo máximo (ms) para a resposta; o header X-Request-Deadline-Ms tem precedência"
+    )
+
+
+class SessionTurnRequest(BaseModel):
+    """Troca respondida fora da API (cache do orquestrador) para a memória da sessão"""
+    user_id: str = Field(..., description="ID do usuário no WhatsApp")
+    session_id: str = Field(..., description="ID da sessão de conversa")
+    user_message: str = Field(..., description="Mensagem do usuário")
+    agent_response: str = Field(..., description="Resposta entregue ao usuário")
+
+
+class AgentOutput(BaseModel):
+    """
+    Saída estruturada gerada pelo LLM
+
+    Apenas os campos que o modelo precisa produzir; session_id, user_id
+    e timestamp são preenchidos pelo servidor em AgentResponse.
+    """
+    
+    response_text: str = Field(..., description="Resposta principal (áudio ou texto)")
+    auxiliary_text: str = Field(default="", description="Complementos opcionais, links")
+    should_send_audio: bool = Field(default=False, description="Se a resposta deve ser enviada em áudio")
 
 
 class AgentResponse(BaseModel):
@@ -30,7 +60,35 @@ class AgentResponse(BaseModel):
     response_text: str
     auxiliary_text: str
     should_send_audio: bool = False
+    partial: bool = Field(default=False, description="Resposta de contingência (prazo esgotado)")
     timestamp: datetime = Field(default_factory=datetime.now)
+    timings: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Tempos por etapa e tokens (apenas com DEBUG_TIMINGS=true)"
+    )
+
+
+class BatchAgentRequest(BaseModel):
+    """Lote de mensagens (um ou vários usuários)"""
+    
+    requests: List[AgentRequest] = Field(..., min_length=1, description="Mensagens do lote")
+
+
+class BatchItemResult(BaseModel):
+    """Resultado de uma mensagem do lote"""
+    
+    index: int = Field(..., description="Posição da mensagem no lote")
+    response: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAgentResponse(BaseModel):
+    """Resposta do processamento em lote"""
+    
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    total_seconds: float
 
 
 class HealthResponse(BaseModel):
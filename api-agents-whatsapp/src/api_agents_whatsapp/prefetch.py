@@ -0,0 +1,143 @@
+"""
+Pré-busca de ferramentas pelos tópicos de interesse
+
+As ferramentas só são chamadas depois que o modelo decide, em turnos
+sequenciais LLM → ferramenta → LLM. Como user_preferences["topics"]
+indica o que o usuário acompanha, a chamada mais provável
+(buscar_projetos_recentes por tópico) é disparada junto com o primeiro
+turno do LLM:
+1. Tópicos citados na mensagem vêm primeiro, depois os demais
+2. As chamadas passam pelo cache de ferramentas (tool_cache): quando o
+   modelo pede a mesma busca, recebe o resultado pronto ou aguarda a
+   chamada já em andamento (single-flight), sem nova ida ao MCP
+3. Pré-buscas não concluídas ao fim da requisição são canceladas e
+   aguardadas antes de devolver as conexões MCP ao pool. Se outra
+   requisição aguarda a mesma busca, a chamada compartilhada continua;
+   ela fica em active_calls da sessão e o pool só a devolve quando a
+   chamada termina (mcp_pool.MCPServerPool.release), então nenhuma
+   chamada usa uma sessão já emprestada a outra requisição
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+from agno.tools.function import Function
+from agno.tools.mcp import MCPTools
+
+from .models import AgentRequest
+from .text_vectors import normalize
+from .tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+PREFETCH_TOOL = "buscar_projetos_recentes"
+
+
+@dataclass
+class PrefetchHandle:
+    """Pré-buscas em andamento de uma requisição"""
+    tasks: List[asyncio.Task] = field(default_factory=list)
+
+    async def cancel(self) -> None:
+        """Cancela as pré-buscas pendentes e espera que terminem"""
+        for task in self.tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+class ToolPrefetcher:
+    """Dispara as buscas prováveis em paralelo com o primeiro turno do LLM"""
+
+    def __init__(
+        self,
+        tool_cache: ToolResultCache,
+        enabled: bool = True,
+        max_topics: int = 2,
+        tool_name: str = PREFETCH_TOOL
+    ):
+        self.tool_cache = tool_cache
+        self.enabled = enabled
+        self.max_topics = max_topics
+        self.tool_name = tool_name
+        self.requests = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.seconds_total = 0.0
+
+    def plan(self, request: AgentRequest) -> List[Dict[str, str]]:
+        """Argumentos das buscas a antecipar (tópicos citados na mensagem primeiro)"""
+        topics = [t for t in (request.user_preferences or {}).get("topics") or [] if t]
+        message = normalize(request.user_message)
+        mentioned = [t for t in topics if normalize(t) in message]
+        ordered = mentioned + [t for t in topics if t not in mentioned]
+        return [{"tema": topic} for topic in ordered[:self.max_topics]]
+
+    def start(
+        self,
+        request: AgentRequest,
+        tools: List[Union[MCPTools, Function]]
+    ) -> PrefetchHandle:
+        """
+        Inicia as pré-buscas (não bloqueia)
+
+        Args:
+            request: Requisição do agente
+            tools: Ferramentas expostas ao LLM nesta requisição
+        """
+        handle = PrefetchHandle()
+        if not self.enabled or self.tool_cache.ttl_for(self.tool_name) <= 0:
+            return handle
+
+        function = None
+        for item in tools:
+            candidates = item.functions.values() if isinstance(item, MCPTools) else [item]
+            function = next((f for f in candidates if f.name == self.tool_name), None)
+            if function is not None:
+                break
+        if function is None:
+            return handle
+
+        plan = self.plan(request)
+        if not plan:
+            return handle
+
+        self.requests += 1
+        handle.tasks = [asyncio.create_task(self._prefetch(function, args)) for args in plan]
+        logger.info(f"🔮 Pré-busca: {self.tool_name} para {', '.join(a['tema'] for a in plan)}")
+        return handle
+
+    async def _prefetch(self, function: Function, args: Dict[str, str]) -> None:
+        self.started += 1
+        started_at = time.monotonic()
+        try:
+            await function.entrypoint(_prefetch=True, **args)
+            self.completed += 1
+            self.seconds_total += time.monotonic() - started_at
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"⚠️  Pré-busca falhou ({args}): {e!r}")
+
+    def get_status(self) -> Dict:
+        used = self.tool_cache.prefetch_hits
+        return {
+            "enabled": self.enabled,
+            "tool": self.tool_name,
+            "max_topics": self.max_topics,
+            "requests": self.requests,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "used_by_model": used,
+            "use_rate": round(used / self.started, 3) if self.started else 0.0,
+            "avg_prefetch_ms": round(self.seconds_total / self.completed * 1000, 1) if self.completed else 0.0,
+        }
@@ -0,0 +1,163 @@
+"""
+Prompts do agente
+
+O prompt de sistema é uma constante: o prefixo enviado ao provedor é
+idêntico em toda requisição, o que permite o cache de prompt do
+provedor (OpenAI aplica automaticamente a prefixos a partir de ~1024
+tokens). Tudo que varia por mensagem vai na mensagem do usuário.
+"""
+from typing import List
+
+from .models import AgentRequest
+
+
+SYSTEM_PROMPT = """Your Role: Especialista em legislação brasileira, com foco em traduzir temas complexos do Congresso Nacional para linguagem simples e acessível.
+
+Short basic instruction: Responda perguntas sobre projetos de lei ou temas sociais ligados à legislação, adaptando o conteúdo para diferentes níveis de escolaridade, em áudio ou texto.
+
+What you should do:
+- Analise a dúvida do usuário, que pode ser sobre um projeto de lei específico ou um tema que impacta sua comunidade.
+- Adapte a resposta conforme o formato desejado (áudio ou texto):
+
+✅ **Sempre que o usuário expressar uma opinião ou sentimento (implícito ou explícito), registre isso no MCP, respeitando a intenção original da mensagem.**
+
+▶️ Se `should_send_audio = true`:
+  - Responda com até **1200 caracteres** (ideal: ~800).
+  - Use **linguagem oral**, fluída e explicativa.
+  - No campo `response_text` **Não inclua links, emojis ou caracteres especiais**.
+  - Foque em clareza, tom acessível e exemplos concretos.
+  - O campo `auxiliary_text` pode conter observações ou metadados, inclusive links.
+
+💬 Se `should_send_audio = false` (texto via WhatsApp):
+  - A resposta principal (`response_text`) deve ser **bem estruturada** para leitura fácil:
+     - Use **blocos com quebras de linha**, marcadores simples (como `-`, `•`) e frases curtas.
+     - Destaque partes importantes com **maiúsculas moderadas** se necessário.
+     - Explique os principais pontos de forma direta.
+     - **Inclua links úteis apenas quando realmente necessários** e só no final.
+     - Evite parágrafos longos.
+  - O `auxiliary_text` pode ser omitido ou conter observações adicionais, se útil.
+  - O `auxiliary_text` também pode conter links ou referências adicionais caso referenciado ou necessário.
+
+- Sempre que houver múltiplos projetos de lei relacionados, resuma os 3 principais.
+- Se a pergunta não estiver relacionada à legislação, oriente com empatia, redirecione ou explique brevemente.
+
+Your Goal: Ajudar o cidadão comum a entender melhor o que acontece no Congresso Nacional e como isso impacta sua vida, com foco em **clareza, inclusão e leitura fluida pelo WhatsApp**.
+
+Result: A resposta deve seguir o formato:
+{
+  "response_text": "resposta principal estruturada para áudio ou texto",
+  "auxiliary_text": "complementos opcionais (se necessário)",
+  "should_send_audio": true/false
+}
+
+Constraint:
+- Áudio: até 1200 caracteres, linguagem oral e simples, sem links ou símbolos incomuns.
+- Texto: mais informativo, com estrutura pensada para WhatsApp (blocos curtos, marcadores, links só no final).
+- Linguagem acessível, sem jargões, com explicações e exemplos quando necessário.
+
+Context:
+- Público formado por cidadãos com menor escolaridade, recebendo mensagens via WhatsApp.
+- As perguntas podem envolver leis específicas ou temas sociais que os afetam diretamente.
+- As mensagens podem conter mais de uma intenção (ex: opinião + pergunta).
+"""
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa (~4 caracteres/token) sem tokenizer, para orçamentos"""
+    return len(text) // 4
+
+
+SYSTEM_PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+
+
+# Resposta quando o prazo da requisição se esgota antes do agente
+DEADLINE_FALLBACK_TEXT = (
+    "Essa consulta está levando mais tempo do que o esperado. "
+    "Pode me mandar a pergunta de novo daqui a pouquinho? "
+    "Se puder, cite o número do projeto ou o tema para eu buscar mais rápido."
+)
+
+# Resposta quando o usuário esgota a cota de tokens (user_quota)
+QUOTA_EXCEEDED_TEXT = (
+    "Você fez muitas perguntas em pouco tempo e eu preciso de uma pausa rapidinha. "
+    "Pode me mandar de novo em alguns minutos?"
+)
+
+
+def build_user_prompt(request: AgentRequest, memory_context: str = "", concise: bool = False) -> str:
+    """
+    Constrói a mensagem do usuário com o contexto da requisição
+
+    Ordem: do mais estável (preferências do usuário) ao mais variável
+    (memória da conversa e a mensagem em si).
+
+    Args:
+        request: Requisição do agente
+        memory_context: Resumo + últimas trocas da sessão (session_memory)
+        concise: Pedir resposta curta (usuário perto do limite de cota)
+
+    Returns:
+        Mensagem do usuário para o agente
+    """
+    lines = ["⚙️ INFORMAÇÕES DO USUÁRIO:"]
+
+    # Adicionar preferências do usuário se disponíveis
+    if request.user_preferences:
+        if request.user_preferences.get("topics"):
+            topics = ", ".join(request.user_preferences["topics"])
+            lines.append(f"- Tópicos de interesse: {topics}")
+
+        if request.user_preferences.get("prefer_audio"):
+            lines.append("- Preferência: Respostas em áudio (responda concisamente)")
+
+    if concise:
+        lines.append("- Limite de uso próximo: responda em no máximo 3 frases, use no máximo uma ferramenta")
+
+    lines += [
+        "",
+        "📋 CONTEXTO DA MENSAGEM:",
+        f"- Usuário: {request.user_id}",
+        f"- Session: {request.session_id}",
+        f"- Tipo: {request.message_type}",
+    ]
+
+    if memory_context:
+        lines += ["", "🧠 MEMÓRIA DA CONVERSA:", memory_context]
+
+    lines += [
+        "",
+        "💬 MENSAGEM DO USUÁRIO:",
+        request.user_message,
+        "",
+        "AGORA, responda à mensagem do usuário:",
+    ]
+    return "\n".join(lines)
+
+
+SUMMARY_SYSTEM_PROMPT = """Você resume conversas entre um cidadão e um assistente sobre projetos de lei do Congresso Nacional.
+
+Escreva em português, em no máximo 5 frases curtas, o que o assistente precisa lembrar para continuar a conversa:
+- Projetos de lei, temas e números citados (PL, PEC, MP)
+- O que o usuário quer saber, opiniões e dados pessoais que ele informou
+- O que já foi respondido
+
+Responda apenas com o resumo, sem títulos ou listas."""
+
+SUMMARY_PROMPT_TOKENS = estimate_tokens(SUMMARY_SYSTEM_PROMPT)
+
+
+def build_summary_prompt(summary: str, turns: List) -> str:
+    """
+    Mensagem para atualizar o resumo da conversa
+
+    Args:
+        summary: Resumo anterior (pode ser vazio)
+        turns: Trocas a incorporar (SessionTurn)
+    """
+    lines = []
+    if summary:
+        lines += ["RESUMO ANTERIOR:", summary, ""]
+    lines.append("NOVAS MENSAGENS:")
+    for turn in turns:
+        lines += [f"Usuário: {turn.user_message}", f"Assistente: {turn.agent_response}"]
+    lines += ["", "Escreva o resumo atualizado:"]
+    return "\n".join(lines)
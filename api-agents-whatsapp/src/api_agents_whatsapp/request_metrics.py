@@ -0,0 +1,231 @@
+"""
+Métricas por requisição (formato de texto do Prometheus)
+
+Cada mensagem gera um RequestTrace com o tempo de cada etapa:
+1. Espera na fila do LLM e setup MCP
+2. Cada turno do LLM (chamadas ao modelo) e cada chamada de ferramenta
+3. Tokens de prompt, saída e prompt em cache do provedor
+4. Tempo total e caminho da resposta (fast-path, cache, agente,
+   contingência por prazo, erro)
+
+Os traces alimentam contadores e histogramas expostos em GET /metrics;
+com DEBUG_TIMINGS=true o trace também volta no campo `timings` da
+AgentResponse.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Contador com rótulos"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(total)}")
+        return lines
+
+
+class Histogram:
+    """Histograma com rótulos e buckets cumulativos"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos → [contagem por bucket..., soma, total]
+        self.series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                bucket = _labels(self.labels, values, 'le="%s"' % _number(bound))
+                lines.append(f"{self.name}_bucket{bucket} {count}")
+            bucket = _labels(self.labels, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(round(series[-2], 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+
+@dataclass
+class RequestTrace:
+    """Tempos e tokens de uma mensagem"""
+    started_at: float = field(default_factory=time.monotonic)
+    path: str = "agent"
+    model: Optional[str] = None
+    # None = etapa não executada (ex: resposta local)
+    queue_wait_seconds: Optional[float] = None
+    mcp_setup_seconds: Optional[float] = None
+    llm_turns: List[float] = field(default_factory=list)
+    # (ferramenta, segundos, erro)
+    tool_calls: List[Tuple[str, float, bool]] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": self.path,
+            "model": self.model,
+            "total_seconds": round(self.total_seconds, 3),
+            "queue_wait_seconds": round(self.queue_wait_seconds or 0.0, 3),
+            "mcp_setup_seconds": round(self.mcp_setup_seconds or 0.0, 3),
+            "llm_seconds": round(sum(self.llm_turns), 3),
+            "llm_turns": [round(seconds, 3) for seconds in self.llm_turns],
+            "tool_seconds": round(sum(seconds for _, seconds, _ in self.tool_calls), 3),
+            "tool_calls": [
+                {"tool": name, "seconds": round(seconds, 3), "error": error}
+                for name, seconds, error in self.tool_calls
+            ],
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+        }
+
+
+class RequestMetrics:
+    """Agrega os traces das mensagens em métricas Prometheus"""
+
+    def __init__(self, enabled: bool = True, prefix: str = "agent"):
+        self.enabled = enabled
+        self.requests = Counter(f"{prefix}_requests_total", "Mensagens processadas por caminho de resposta", ["path"])
+        self.request_seconds = Histogram(f"{prefix}_request_seconds", "Tempo total por mensagem", ["path"])
+        self.queue_wait_seconds = Histogram(f"{prefix}_queue_wait_seconds", "Espera na fila do LLM (agendador)")
+        self.mcp_setup_seconds = Histogram(
+            f"{prefix}_mcp_setup_seconds",
+            "Setup MCP por mensagem (empréstimo das conexões)",
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+        )
+        self.llm_turn_seconds = Histogram(f"{prefix}_llm_turn_seconds", "Duração de cada chamada ao modelo", ["model"])
+        self.llm_turns = Counter(f"{prefix}_llm_turns_total", "Chamadas ao modelo", ["model"])
+        self.tool_calls = Counter(f"{prefix}_tool_calls_total", "Chamadas de ferramentas MCP", ["tool", "status"])
+        self.tool_call_seconds = Histogram(f"{prefix}_tool_call_seconds", "Duração das chamadas de ferramentas", ["tool"])
+        self.tokens = Counter(f"{prefix}_llm_tokens_total", "Tokens do LLM por tipo (cached ⊂ prompt)", ["model", "type"])
+
+    def observe_run(self, trace: RequestTrace, response_output) -> None:
+        """
+        Extrai turnos do LLM, ferramentas e tokens da saída do agente
+
+        Args:
+            trace: Trace da mensagem
+            response_output: RunOutput (ou RunCompletedEvent) do agno
+        """
+        trace.model = getattr(response_output, "model", None) or trace.model
+        for message in getattr(response_output, "messages", None) or []:
+            if message.role == "assistant" and message.metrics.duration is not None:
+                trace.llm_turns.append(message.metrics.duration)
+
+        for tool in getattr(response_output, "tools", None) or []:
+            duration = tool.metrics.duration if tool.metrics and tool.metrics.duration else 0.0
+            trace.tool_calls.append((tool.tool_name or "desconhecida", duration, bool(tool.tool_call_error)))
+
+        metrics = getattr(response_output, "metrics", None)
+        if metrics is not None:
+            trace.prompt_tokens += metrics.input_tokens or 0
+            trace.completion_tokens += metrics.output_tokens or 0
+            trace.cached_tokens += metrics.cache_read_tokens or 0
+
+    def finish(self, trace: RequestTrace, path: Optional[str] = None) -> RequestTrace:
+        """Fecha o trace e atualiza as métricas"""
+        if path is not None:
+            trace.path = path
+        trace.total_seconds = time.monotonic() - trace.started_at
+        if not self.enabled:
+            return trace
+
+        self.requests.inc(trace.path)
+        self.request_seconds.observe(trace.total_seconds, trace.path)
+        if trace.queue_wait_seconds is not None:
+            self.queue_wait_seconds.observe(trace.queue_wait_seconds)
+        if trace.mcp_setup_seconds is not None:
+            self.mcp_setup_seconds.observe(trace.mcp_setup_seconds)
+
+        model = trace.model or "desconhecido"
+        for seconds in trace.llm_turns:
+            self.llm_turn_seconds.observe(seconds, model)
+            self.llm_turns.inc(model)
+        for name, seconds, error in trace.tool_calls:
+            self.tool_calls.inc(name, "error" if error else "ok")
+            self.tool_call_seconds.observe(seconds, name)
+        if trace.prompt_tokens or trace.completion_tokens:
+            self.tokens.inc(model, "prompt", amount=trace.prompt_tokens)
+            self.tokens.inc(model, "completion", amount=trace.completion_tokens)
+            self.tokens.inc(model, "cached", amount=trace.cached_tokens)
+
+        if trace.path == "agent":
+            logger.info(
+                f"⏱️  Etapas: fila {trace.queue_wait_seconds or 0.0:.2f}s "
+                f"| MCP {(trace.mcp_setup_seconds or 0.0) * 1000:.0f}ms "
+                f"| LLM {sum(trace.llm_turns):.2f}s ({len(trace.llm_turns)} turnos) "
+                f"| Ferramentas {sum(s for _, s, _ in trace.tool_calls):.2f}s ({len(trace.tool_calls)}) "
+                f"| Total {trace.total_seconds:.2f}s"
+            )
+        return trace
+
+    def render(self) -> str:
+        """Métricas no formato de texto do Prometheus (text/plain; version=0.0.4)"""
+        lines: List[str] = []
+        for metric in (
+            self.requests,
+            self.request_seconds,
+            self.queue_wait_seconds,
+            self.mcp_setup_seconds,
+            self.llm_turns,
+            self.llm_turn_seconds,
+            self.tool_calls,
+            self.tool_call_seconds,
+            self.tokens,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -2,11 +2,25 @@
 Rotas da API de Agentes
 """
 import logging
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from datetime import datetime
-from .models import AgentRequest, AgentResponse, HealthResponse
+from .deadline import DEADLINE_HEADER
+from .prompts import QUOTA_EXCEEDED_TEXT
+from .models import (
+    AgentRequest,
+    AgentResponse,
+    BatchAgentRequest,
+    BatchAgentResponse,
+    HealthResponse,
+    SessionTurnRequest,
+)
+from .scheduler import SchedulerQueueTimeout
 from .services import agent_service
 from .config import settings
+from .streaming import sse_event
+from .user_quota import UserQuotaExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +38,173 @@ async def health_check():
         timestamp=datetime.now(),
         mcp_servers={
             "projetos_lei": settings.mcp_projetos_lei_url,
+            "users": settings.mcp_users_url,
         },
     )
 
 
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """
+    Métricas por etapa no formato do Prometheus: espera na fila, setup
+    MCP, duração de cada turno do LLM, chamadas e duração por ferramenta,
+    tokens de prompt/saída/cache e tempo total por caminho de resposta
+    """
+    return PlainTextResponse(
+        agent_service.request_metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/mcp-pool", tags=["Health"])
+async def mcp_pool_status():
+    """
+    Status do pool de conexões MCP (conexões ociosas, reconexões e
+    tempo médio de setup MCP por requisição)
+    """
+    return agent_service.mcp_pools.get_status()
+
+
+@router.get("/tools", tags=["Health"])
+async def tools_catalog():
+    """
+    Catálogo de ferramentas MCP em uso (schemas, versão por servidor
+    e horário da última atualização)
+    """
+    return agent_service.mcp_pools.catalog.get_status()
+
+
+@router.post("/tools/refresh", tags=["Health"])
+async def refresh_tools_catalog():
+    """
+    Força a redescoberta das ferramentas MCP (ex: após deploy de um servidor)
+    """
+    changed = await agent_service.mcp_pools.refresh_catalog()
+    return {"changed": changed, **agent_service.mcp_pools.catalog.get_status()}
+
+
+@router.get("/tool-cache", tags=["Health"])
+async def tool_cache_status():
+    """
+    Cache de resultados das ferramentas MCP (hits, chamadas remotas,
+    chamadas simultâneas agrupadas e tempo economizado por ferramenta)
+    """
+    return agent_service.mcp_pools.tool_cache.get_stats()
+
+
+@router.get("/prefetch", tags=["Health"])
+async def prefetch_status():
+    """
+    Pré-busca pelos tópicos do usuário (buscas iniciadas, concluídas,
+    canceladas e quantas foram usadas pelo modelo)
+    """
+    return agent_service.prefetcher.get_status()
+
+
+@router.get("/session-memory", tags=["Health"])
+async def session_memory_status():
+    """
+    Memória de conversa (sessões, resumos gerados em background e
+    tamanho médio/máximo do prompt por requisição)
+    """
+    return agent_service.session_memory.get_stats()
+
+
+@router.post("/session-memory/turns", status_code=status.HTTP_204_NO_CONTENT, tags=["Agent"])
+async def record_session_turn(turn: SessionTurnRequest):
+    """
+    Registra na memória da sessão uma troca respondida sem o agente
+    (cache de respostas do orquestrador), para que as próximas
+    mensagens da conversa a tenham no contexto
+    """
+    agent_service.session_memory.record(
+        AgentRequest(user_message=turn.user_message, user_id=turn.user_id, session_id=turn.session_id),
+        turn.agent_response,
+    )
+
+
+@router.get("/fast-path", tags=["Health"])
+async def fast_path_status():
+    """
+    Respostas locais por categoria, confiança média e taxa de mensagens
+    que seguiram para o agente (fall-through)
+    """
+    return agent_service.fast_path.get_status()
+
+
+@router.get("/semantic-cache", tags=["Health"])
+async def semantic_cache_status():
+    """
+    Cache semântico de respostas (hits, similaridade média, entradas
+    expiradas/removidas e latência economizada)
+    """
+    return agent_service.semantic_cache.get_stats()
+
+
+@router.get("/tool-router", tags=["Health"])
+async def tool_router_status():
+    """
+    Seleção de ferramentas por mensagem (intenções detectadas, fallbacks
+    para o conjunto completo e tokens de schema economizados)
+    """
+    return agent_service.tool_router.get_status()
+
+
+@router.get("/llm-usage", tags=["Health"])
+async def llm_usage():
+    """
+    Tokens de entrada (e quantos vieram do cache de prompt do provedor),
+    tokens de saída, duração e tempo até o primeiro token do LLM
+    """
+    return agent_service.llm_usage.get_status()
+
+
+@router.get("/agent-pool", tags=["Health"])
+async def agent_pool_status():
+    """
+    Status dos pools de agentes por nível de modelo (agentes ociosos,
+    construções e reconstruções por mudança no conjunto de ferramentas)
+    """
+    return {tier.value: pool.get_status() for tier, pool in agent_service.agent_pools.items()}
+
+
+@router.get("/model-router", tags=["Health"])
+async def model_router_status():
+    """
+    Roteamento de modelo por complexidade (mensagens por nível,
+    pontuação média e latência média/p95 de cada nível)
+    """
+    return agent_service.model_router.get_status()
+
+
+@router.get("/scheduler", tags=["Health"])
+async def scheduler_status():
+    """
+    Agendador do LLM: uso dos orçamentos RPM/TPM no último minuto,
+    execuções em andamento, fila por usuário e tempo de espera na fila
+    """
+    return agent_service.scheduler.get_status()
+
+
+@router.get("/hedging", tags=["Health"])
+async def hedging_status():
+    """
+    Prazo por requisição e contingência: execuções que passaram do
+    limiar (ou falharam) e dispararam o modelo rápido, quantas ele venceu
+    e respostas de contingência por prazo esgotado
+    """
+    return agent_service.hedger.get_status()
+
+
+@router.get("/user-quotas", tags=["Health"])
+async def user_quotas_status():
+    """
+    Cotas de tokens por usuário: limites por janela, mensagens com
+    atendimento reduzido ou recusadas e os maiores consumidores
+    """
+    return agent_service.user_quotas.get_status()
+
+
 @router.post(
     "/process-message",
     response_model=AgentResponse,
@@ -35,7 +212,10 @@ async def health_check():
     tags=["Agent"],
     summary="Processar mensagem com agente"
 )
-async def process_message(request: AgentRequest):
+async def process_message(
+    request: AgentRequest,
+    deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER, gt=0)
+):
     """
     Processa uma mensagem do usuário através de um agente Agno
     
@@ -46,6 +226,15 @@ async def process_message(request: AgentRequest):
     4. Determinar se a resposta deve ser em áudio
     5. Retornar a resposta com metadados
     
+    **Prazo:** `X-Request-Deadline-Ms` (ou `deadline_ms` no corpo) indica
+    em quanto tempo a resposta precisa chegar. Execuções lentas disparam
+    uma contingência no modelo rápido; se o prazo se esgotar, a resposta
+    é uma mensagem curta com `partial: true` em vez de erro.
+    
+    **Cota por usuário:** perto do limite de tokens do usuário as respostas
+    ficam mais curtas e usam o modelo rápido; no limite, a resposta é 429
+    com `Retry-After` (segundos).
+    
     **Exemplos de uso:**
     
     - Texto simples:
@@ -74,9 +263,23 @@ async def process_message(request: AgentRequest):
     """
     try:
         logger.info(f"📨 Recebida requisição de {request.user_id}")
+        if deadline_ms is not None:
+            request.deadline_ms = deadline_ms
         response = await agent_service.process_message(request)
         return response
         
+    except SchedulerQueueTimeout as e:
+        logger.warning(f"🚦 {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except UserQuotaExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=QUOTA_EXCEEDED_TEXT,
+            headers={"Retry-After": str(round(e.retry_after_seconds))}
+        )
     except Exception as e:
         logger.error(f"❌ Erro ao processar mensagem: {e}")
         raise HTTPException(
@@ -85,6 +288,74 @@ async def process_message(request: AgentRequest):
         )
 
 
+@router.post(
+    "/process-messages",
+    response_model=BatchAgentResponse,
+    status_code=status.HTTP_200_OK,
+    tags=["Agent"],
+    summary="Processar lote de mensagens com agente"
+)
+async def process_messages(batch: BatchAgentRequest):
+    """
+    Processa várias mensagens (de um ou mais usuários) em uma chamada
+    
+    As mensagens passam pelo mesmo agendador de `/process-message`:
+    iniciam conforme o orçamento de requisições/tokens por minuto do
+    modelo, alternando entre usuários. O resultado de cada mensagem
+    traz `response` ou `error`, na ordem do lote.
+    """
+    if len(batch.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Lote com {len(batch.requests)} mensagens (máximo: {settings.batch_max_requests})"
+        )
+    
+    logger.info(f"📨 Recebido lote com {len(batch.requests)} mensagens")
+    return await agent_service.process_messages(batch.requests)
+
+
+@router.post(
+    "/process-message/stream",
+    tags=["Agent"],
+    summary="Processar mensagem com agente (streaming SSE)"
+)
+async def process_message_stream(
+    request: AgentRequest,
+    deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER, gt=0)
+):
+    """
+    Processa uma mensagem emitindo a resposta via server-sent events,
+    para que o TTS e o envio pelo WhatsApp comecem antes do fim da geração
+    
+    **Prazo:** o mesmo de `/process-message` (`X-Request-Deadline-Ms` ou
+    `deadline_ms`), sem execução de contingência. Se o prazo se esgotar,
+    a geração é interrompida e `done` traz `partial: true` com o texto já
+    emitido (ou a mensagem curta de contingência, se nada foi emitido).
+    
+    **Eventos:**
+    
+    - `delta`: trecho novo de `response_text` (`{"text": "..."}`)
+    - `sentence`: frase completa (`{"index": 0, "text": "..."}`)
+    - `done`: resposta completa no formato de `/process-message`, com
+      `should_send_audio`, `auxiliary_text` e o total de frases (`sentences`)
+    - `error`: falha durante o processamento (`{"detail": "..."}`; cota
+      esgotada também traz `retry_after_seconds`)
+    """
+    logger.info(f"📨 Recebida requisição (streaming) de {request.user_id}")
+    if deadline_ms is not None:
+        request.deadline_ms = deadline_ms
+
+    async def events():
+        async for event, data in agent_service.process_message_stream(request):
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/", tags=["Info"])
 async def root():
     """Informações da API"""
@@ -95,6 +366,23 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
+            "mcp_pool": "/mcp-pool",
+            "agent_pool": "/agent-pool",
+            "scheduler": "/scheduler",
+            "hedging": "/hedging",
+            "user_quotas": "/user-quotas",
+            "model_router": "/model-router",
+            "tools": "/tools",
+            "tool_cache": "/tool-cache",
+            "prefetch": "/prefetch",
+            "session_memory": "/session-memory",
+            "llm_usage": "/llm-usage",
+            "tool_router": "/tool-router",
+            "fast_path": "/fast-path",
+            "semantic_cache": "/semantic-cache",
             "process_message": "/process-message",
+            "process_message_stream": "/process-message/stream",
+            "process_messages": "/process-messages",
         },
     }
\ No newline at end of file
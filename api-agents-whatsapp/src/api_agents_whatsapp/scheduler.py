@@ -0,0 +1,253 @@
+"""
+Agendador de execuções do LLM
+
+Toda mensagem que precisa do agente (/process-message, /process-message/stream
+e /process-messages) passa por aqui antes de chamar a OpenAI:
+1. Orçamentos por minuto → requisições (RPM) e tokens (TPM) numa janela
+   deslizante de 60s, reservados pela estimativa e corrigidos pelo uso real
+2. Concorrência máxima → não mais execuções simultâneas que agentes no pool
+3. Fila justa por usuário → round-robin entre usuários com mensagens
+   pendentes, FIFO dentro de cada usuário (um lote grande de um usuário
+   não atrasa os demais)
+
+Sem orçamento disponível, a execução espera a liberação da janela em vez
+de gerar rajadas de 429 no provedor.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerQueueTimeout(Exception):
+    """Mensagem esperou na fila mais que o tempo máximo configurado"""
+
+
+@dataclass
+class Ticket:
+    """Execução aguardando (ou usando) o orçamento do LLM"""
+    user_id: str
+    estimated_tokens: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    throttled: bool = False
+    wait_seconds: float = 0.0
+    # [início, requisições, tokens] na janela deslizante
+    window_entry: Optional[List[float]] = None
+
+
+class RateLimitScheduler:
+    """Fila justa por usuário com orçamentos de RPM/TPM"""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 200000,
+        max_concurrent: int = 4,
+        queue_timeout_seconds: float = 60.0,
+        window_seconds: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrent = max_concurrent
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.window_seconds = window_seconds
+
+        # Ordem do OrderedDict = vez de cada usuário no round-robin
+        self.queues: "OrderedDict[str, Deque[Ticket]]" = OrderedDict()
+        self.window: Deque[List[float]] = deque()
+        self.running = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.enqueued = 0
+        self.dispatched = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.wait_samples: Deque[float] = deque(maxlen=1000)
+        self.wait_seconds_total = 0.0
+        self.estimated_tokens_total = 0
+        self.actual_tokens_total = 0
+
+    def _window_usage(self, now: float) -> List[float]:
+        """Requisições e tokens na janela deslizante"""
+        while self.window and self.window[0][0] <= now - self.window_seconds:
+            self.window.popleft()
+        return [
+            sum(entry[1] for entry in self.window),
+            sum(entry[2] for entry in self.window),
+        ]
+
+    def _budget_wait(self, ticket: Ticket, now: float) -> float:
+        """Segundos até haver orçamento para o ticket (0 = pode iniciar)"""
+        requests, tokens = self._window_usage(now)
+        if not self.window:
+            # Janela vazia: inicia mesmo que a estimativa passe do TPM
+            return 0.0
+        over_rpm = self.requests_per_minute and requests + 1 > self.requests_per_minute
+        over_tpm = self.tokens_per_minute and tokens + ticket.estimated_tokens > self.tokens_per_minute
+        if not (over_rpm or over_tpm):
+            return 0.0
+        return self.window[0][0] + self.window_seconds - now
+
+    def _dispatch(self) -> None:
+        """Inicia as próximas execuções enquanto houver orçamento"""
+        now = time.monotonic()
+        while self.queues and self.running < self.max_concurrent:
+            user_id, queue = next(iter(self.queues.items()))
+            ticket = queue[0]
+
+            if ticket.future.done():
+                # Cancelado (ex: prazo da requisição) antes de sair da fila
+                queue.popleft()
+                if not queue:
+                    del self.queues[user_id]
+                continue
+
+            wait = self._budget_wait(ticket, now)
+            if wait > 0:
+                if not ticket.throttled:
+                    ticket.throttled = True
+                    self.throttled += 1
+                    logger.info(
+                        f"🚦 Orçamento do LLM esgotado, aguardando {wait:.1f}s "
+                        f"| Na fila: {self.queued}"
+                    )
+                self._schedule_wakeup(wait)
+                return
+
+            # Próximo usuário vai para o fim da fila (round-robin)
+            queue.popleft()
+            del self.queues[user_id]
+            if queue:
+                self.queues[user_id] = queue
+
+            ticket.window_entry = [now, 1, ticket.estimated_tokens]
+            self.window.append(ticket.window_entry)
+            self.running += 1
+            ticket.future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._dispatch)
+
+    def _remove(self, ticket: Ticket) -> None:
+        queue = self.queues.get(ticket.user_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self.queues[ticket.user_id]
+
+    def _release(self) -> None:
+        self.running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, estimated_tokens: int):
+        """
+        Aguarda a vez do usuário e orçamento para uma execução do LLM
+
+        Args:
+            user_id: Usuário da mensagem (fila justa)
+            estimated_tokens: Tokens reservados na janela até o uso real
+
+        Raises:
+            SchedulerQueueTimeout: Se a espera passar de queue_timeout_seconds
+        """
+        ticket = Ticket(
+            user_id=user_id,
+            estimated_tokens=estimated_tokens,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self.queues.setdefault(user_id, deque()).append(ticket)
+        self.enqueued += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(ticket.future, timeout=self.queue_timeout_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Iniciado no mesmo instante do timeout/cancelamento:
+                # devolve a vaga e a reserva da janela (nada foi chamado)
+                if ticket.window_entry in self.window:
+                    self.window.remove(ticket.window_entry)
+                self._release()
+            else:
+                self._remove(ticket)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise SchedulerQueueTimeout(
+                    f"Fila do LLM: espera maior que {self.queue_timeout_seconds}s"
+                ) from e
+            raise
+
+        wait_seconds = ticket.wait_seconds = time.monotonic() - ticket.enqueued_at
+        self.dispatched += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_samples.append(wait_seconds)
+        self.estimated_tokens_total += estimated_tokens
+        if wait_seconds >= 0.1:
+            logger.info(f"⏳ Espera na fila do LLM: {wait_seconds:.2f}s ({user_id})")
+
+        try:
+            yield ticket
+        finally:
+            self._release()
+
+    def settle(self, ticket: Ticket, tokens: Optional[int], requests: int = 1) -> None:
+        """
+        Troca a estimativa pelo uso real na janela deslizante
+
+        Args:
+            ticket: Execução concluída
+            tokens: Tokens reportados pelo provedor (None = manter estimativa)
+            requests: Chamadas ao modelo na execução (turnos com ferramentas)
+        """
+        if ticket.window_entry is None:
+            return
+        ticket.window_entry[1] = max(requests, 1)
+        if tokens:
+            ticket.window_entry[2] = tokens
+            self.actual_tokens_total += tokens
+        else:
+            self.actual_tokens_total += ticket.estimated_tokens
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def get_status(self) -> Dict:
+        requests, tokens = self._window_usage(time.monotonic())
+        waits = sorted(self.wait_samples)
+        return {
+            "limits": {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "max_concurrent": self.max_concurrent,
+                "queue_timeout_seconds": self.queue_timeout_seconds,
+            },
+            "budget": {
+                "requests_last_minute": int(requests),
+                "tokens_last_minute": int(tokens),
+                "requests_usage": round(requests / self.requests_per_minute, 3) if self.requests_per_minute else None,
+                "tokens_usage": round(tokens / self.tokens_per_minute, 3) if self.tokens_per_minute else None,
+            },
+            "running": self.running,
+            "queued": self.queued,
+            "queued_users": len(self.queues),
+            "enqueued": self.enqueued,
+            "dispatched": self.dispatched,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+            "avg_queue_wait_seconds": round(self.wait_seconds_total / self.dispatched, 3) if self.dispatched else 0.0,
+            "p95_queue_wait_seconds": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+            "max_queue_wait_seconds": round(waits[-1], 3) if waits else 0.0,
+            "estimated_tokens_total": self.estimated_tokens_total,
+            "actual_tokens_total": self.actual_tokens_total,
+        }
@@ -0,0 +1,254 @@
+"""
+Cache semântico de respostas
+
+Cidadãos fazem as mesmas perguntas sobre os mesmos projetos com
+palavras diferentes. Cada pergunta respondida pelo agente é guardada
+como vetor (hashing vectorizer) em um índice NumPy; uma pergunta nova
+reutiliza a resposta anterior quando:
+1. A similaridade (cosseno) passa do limiar do modo de resposta, que
+   sobe com o tamanho da pergunta: em perguntas longas uma palavra
+   trocada quase não mexe no cosseno
+2. O modo é o mesmo (áudio ou texto)
+3. As palavras-chave são as mesmas: tudo que não é palavra comum,
+   inclusive números e nomes ("PEC 45" ≠ "PEC 46", "proibir celular"
+   ≠ "liberar celular", "aposentadoria rural" ≠ "aposentadoria especial")
+4. Os tópicos de interesse do usuário são os mesmos (entram no prompt)
+5. A entrada não expirou
+
+Validade acompanha o frescor dos dados legislativos: o TTL padrão
+segue o cache do projetos-lei-mcp, e perguntas sobre o que é recente
+("hoje", "últimas", "essa semana") expiram antes.
+
+Mensagens com opinião ou dados pessoais não usam o cache, pois o
+agente precisa registrá-las via MCP. Respostas geradas com a memória
+da sessão no prompt também não são guardadas: dependem da conversa.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+
+from .text_vectors import HashingVectorizer, normalize
+
+logger = logging.getLogger(__name__)
+
+
+ANSWER_MODES = {"text": 0, "audio": 1}
+
+# Perguntas sobre o momento atual (normalizadas, sem acentos)
+RECENT_MARKERS = [
+    "hoje", "ontem", "agora", "ultim", "recente", "essa semana",
+    "esta semana", "este mes", "esse mes", "novidade", "noticia",
+]
+
+# Palavras que podem variar entre perguntas equivalentes (normalizadas)
+COMMON_WORDS = {
+    "a", "o", "as", "os", "um", "uma", "de", "da", "do", "das", "dos", "em",
+    "na", "no", "nas", "nos", "por", "pra", "para", "pro", "com", "sobre",
+    "ao", "aos", "e", "ou", "que", "se", "me", "mim", "eu", "voce", "vc",
+    "meu", "minha", "isso", "esse", "essa", "este", "esta", "ai", "la",
+    "aqui", "tem", "ter", "ha", "existe", "existem", "algum", "alguma",
+    "qual", "quais", "quando", "como", "onde", "quem", "porque", "sabe",
+    "saber", "quero", "queria", "gostaria", "pode", "poderia", "explica",
+    "explicar", "explique", "fala", "falar", "conta", "diz", "dizer", "ja",
+    "ainda", "tambem", "mais", "muito", "ser", "sao", "foi", "estao",
+    "projeto", "lei", "proposta", "tema", "assunto", "situacao", "andamento",
+}
+
+
+def key_terms(normalized: str) -> FrozenSet[str]:
+    """Palavras que precisam coincidir: números, nomes e demais palavras não comuns"""
+    terms = set()
+    for word in normalized.split():
+        if word in COMMON_WORDS:
+            continue
+        # Singular simples: "escolas" = "escola", "celulares" = "celular"
+        if len(word) > 3 and word.endswith("s") and not any(c.isdigit() for c in word):
+            word = word[:-2] if word.endswith(("res", "zes", "les")) else word[:-1]
+        if word not in COMMON_WORDS:
+            terms.add(word)
+    return frozenset(terms)
+
+
+def normalize_topics(topics: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(normalize(topic) for topic in topics or [] if topic)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """Resposta armazenada (o vetor fica na matriz do índice)"""
+    message: str
+    key_terms: FrozenSet[str]
+    topics: FrozenSet[str]
+    response_text: str
+    auxiliary_text: str
+    should_send_audio: bool
+    latency_seconds: float
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """Índice NumPy de perguntas respondidas com busca por cosseno"""
+
+    def __init__(
+        self,
+        vectorizer: HashingVectorizer,
+        max_entries: int = 2000,
+        ttl_seconds: int = 3600,
+        recent_ttl_seconds: int = 900,
+        threshold_text: float = 0.85,
+        threshold_audio: float = 0.8,
+        length_slack: float = 0.75,
+        max_message_chars: int = 300
+    ):
+        """
+        Args:
+            length_slack: Limiar efetivo = max(limiar do modo, 1 - length_slack / palavras)
+        """
+        self.vectorizer = vectorizer
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.thresholds = {"text": threshold_text, "audio": threshold_audio}
+        self.length_slack = length_slack
+        self.max_message_chars = max_message_chars
+
+        self.vectors = np.zeros((max_entries, vectorizer.n_features), dtype=np.float32)
+        self.modes = np.full(max_entries, -1, dtype=np.int8)
+        self.expires_at = np.zeros(max_entries, dtype=np.float64)
+        self.last_used = np.zeros(max_entries, dtype=np.float64)
+        self.entries: List[Optional[SemanticCacheEntry]] = [None] * max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.similarity_total = 0.0
+        self.saved_latency_seconds = 0.0
+
+    def is_cacheable(self, message: str, personal: bool) -> bool:
+        """
+        Verifica se a mensagem pode usar o cache
+
+        Args:
+            message: Mensagem do usuário
+            personal: Se contém opinião ou dados pessoais (registrar via MCP)
+        """
+        if personal or len(message) > self.max_message_chars:
+            self.bypassed += 1
+            return False
+        return True
+
+    def _ttl_for(self, normalized: str) -> int:
+        if any(marker in normalized for marker in RECENT_MARKERS):
+            return self.recent_ttl_seconds
+        return self.ttl_seconds
+
+    def _threshold(self, mode: str, normalized: str) -> float:
+        words = len(normalized.split()) or 1
+        return max(self.thresholds[mode], 1.0 - self.length_slack / words)
+
+    def _live_mask(self, mode: str, now: float) -> np.ndarray:
+        return (self.modes == ANSWER_MODES[mode]) & (self.expires_at > now)
+
+    def get(
+        self,
+        message: str,
+        mode: str,
+        topics: Optional[Iterable[str]] = None
+    ) -> Optional[SemanticCacheEntry]:
+        """Resposta de uma pergunta semelhante para os mesmos tópicos (ou None)"""
+        now = time.monotonic()
+        normalized = normalize(message)
+        live = self._live_mask(mode, now)
+
+        if not live.any():
+            self.misses += 1
+            return None
+
+        scores = self.vectors @ self.vectorizer.transform(normalized)
+        scores[~live] = -1.0
+        terms = key_terms(normalized)
+        user_topics = normalize_topics(topics)
+        threshold = self._threshold(mode, normalized)
+
+        # Melhor candidato com as mesmas palavras-chave e tópicos
+        for slot in np.argsort(scores)[::-1]:
+            score = float(scores[slot])
+            if score < threshold:
+                break
+            entry = self.entries[slot]
+            if entry.key_terms != terms or entry.topics != user_topics:
+                continue
+
+            entry.hits += 1
+            self.last_used[slot] = now
+            self.hits += 1
+            self.similarity_total += score
+            self.saved_latency_seconds += entry.latency_seconds
+            logger.info(
+                f"🧠 Cache semântico: hit | Similaridade: {score:.3f} "
+                f"| Pergunta original: {entry.message[:60]}"
+            )
+            return entry
+
+        self.misses += 1
+        return None
+
+    def _free_slot(self, now: float) -> int:
+        """Slot vazio/expirado ou, se cheio, o menos usado recentemente (LRU)"""
+        free = np.flatnonzero((self.modes < 0) | (self.expires_at <= now))
+        if free.size:
+            return int(free[0])
+        self.evictions += 1
+        return int(np.argmin(self.last_used))
+
+    def set(
+        self,
+        message: str,
+        mode: str,
+        response_text: str,
+        auxiliary_text: str,
+        should_send_audio: bool,
+        latency_seconds: float,
+        topics: Optional[Iterable[str]] = None
+    ) -> None:
+        """Armazena a resposta do agente para a pergunta"""
+        now = time.monotonic()
+        normalized = normalize(message)
+        slot = self._free_slot(now)
+
+        self.vectors[slot] = self.vectorizer.transform(normalized)
+        self.modes[slot] = ANSWER_MODES[mode]
+        self.expires_at[slot] = now + self._ttl_for(normalized)
+        self.last_used[slot] = now
+        self.entries[slot] = SemanticCacheEntry(
+            message=message,
+            key_terms=key_terms(normalized),
+            topics=normalize_topics(topics),
+            response_text=response_text,
+            auxiliary_text=auxiliary_text,
+            should_send_audio=should_send_audio,
+            latency_seconds=latency_seconds,
+        )
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        lookups = self.hits + self.misses
+        return {
+            "entries": int(((self.modes >= 0) & (self.expires_at > now)).sum()),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "recent_ttl_seconds": self.recent_ttl_seconds,
+            "thresholds": self.thresholds,
+            "length_slack": self.length_slack,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "avg_hit_similarity": round(self.similarity_total / self.hits, 3) if self.hits else 0.0,
+            "saved_latency_seconds": round(self.saved_latency_seconds, 2),
+        }
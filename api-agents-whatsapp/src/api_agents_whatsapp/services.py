@@ -1,15 +1,43 @@
 """
 Serviço de agentes para processar mensagens
 """
+import asyncio
 import logging
 import os
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.tools.mcp import MCPTools
+from agno.run.agent import RunCompletedEvent, RunContentEvent
 from agno.tools.mcp import MultiMCPTools
+from .agent_pool import AgentPool, AgentPoolExhausted
 from .config import settings
-from .models import AgentRequest, AgentResponse
+from .deadline import Deadline, HedgedRunner, HedgeOutcome, HedgeUnavailable
+from .fast_path import FastPathResponder
+from .llm_metrics import LLMUsageStats
+from .mcp_pool import MCPPoolManager
+from .model_router import ModelRouter, ModelTier
+from .models import AgentOutput, AgentRequest, AgentResponse, BatchAgentResponse, BatchItemResult
+from .prefetch import ToolPrefetcher
+from .request_metrics import RequestMetrics, RequestTrace
+from .prompts import (
+    DEADLINE_FALLBACK_TEXT,
+    QUOTA_EXCEEDED_TEXT,
+    SUMMARY_PROMPT_TOKENS,
+    SUMMARY_SYSTEM_PROMPT,
+    SYSTEM_PROMPT_TOKENS,
+    build_summary_prompt,
+    build_user_prompt,
+    estimate_tokens,
+)
+from .scheduler import RateLimitScheduler, Ticket
+from .semantic_cache import SemanticAnswerCache
+from .session_memory import SessionMemory, SessionTurn
+from .streaming import ResponseTextStreamer, SentenceSplitter, split_sentences
+from .text_vectors import HashingVectorizer
+from .tool_router import ToolRouter
+from .user_quota import QuotaDecision, UserQuotaExceeded, UserQuotas
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -19,65 +47,327 @@ class AgentService:
     """Gerenciador de agentes Agno com suporte a múltiplos MCPs"""
     
     def __init__(self):
-        self.agent = None
         self.mcp_context = None
-        self._initialize_agent()
+        self.mcp_pools = MCPPoolManager()
+        self.model_router = ModelRouter(
+            fast_model=settings.agent_fast_model,
+            strong_model=settings.agent_model,
+            enabled=settings.model_router_enabled,
+            strong_threshold=settings.model_router_strong_threshold,
+            long_message_chars=settings.model_router_long_message_chars,
+        )
+        # Um pool de agentes por nível de modelo
+        self.agent_pools = {
+            ModelTier.STRONG: AgentPool(size=settings.agent_pool_size, model_id=settings.agent_model),
+        }
+        if settings.model_router_enabled:
+            self.agent_pools[ModelTier.FAST] = AgentPool(
+                size=settings.agent_pool_size,
+                model_id=settings.agent_fast_model,
+            )
+        self.llm_usage = LLMUsageStats()
+        self.fast_path = FastPathResponder(
+            enabled=settings.fast_path_enabled,
+            model_enabled=settings.fast_path_model_enabled,
+            model_threshold=settings.fast_path_model_threshold,
+            max_message_chars=settings.fast_path_max_message_chars,
+        )
+        self.tool_router = ToolRouter(
+            enabled=settings.tool_router_enabled,
+            max_message_chars=settings.tool_router_max_message_chars,
+        )
+        self.semantic_cache = SemanticAnswerCache(
+            vectorizer=HashingVectorizer(),
+            max_entries=settings.semantic_cache_max_entries,
+            ttl_seconds=settings.semantic_cache_ttl_seconds,
+            recent_ttl_seconds=settings.semantic_cache_recent_ttl_seconds,
+            threshold_text=settings.semantic_cache_threshold_text,
+            threshold_audio=settings.semantic_cache_threshold_audio,
+            length_slack=settings.semantic_cache_length_slack,
+            max_message_chars=settings.semantic_cache_max_message_chars,
+        )
+        self.prefetcher = ToolPrefetcher(
+            tool_cache=self.mcp_pools.tool_cache,
+            enabled=settings.prefetch_enabled,
+            max_topics=settings.prefetch_max_topics,
+        )
+        self.session_memory = SessionMemory(
+            summarize=self._summarize_session,
+            token_budget=settings.memory_token_budget,
+            summary_max_tokens=settings.memory_summary_max_tokens,
+            max_sessions=settings.memory_max_sessions,
+            ttl_seconds=settings.memory_session_ttl_seconds,
+            enabled=settings.memory_enabled,
+        )
+        self.scheduler = RateLimitScheduler(
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            max_concurrent=settings.scheduler_max_concurrent,
+            queue_timeout_seconds=settings.scheduler_queue_timeout_seconds,
+        )
+        self.request_metrics = RequestMetrics(enabled=settings.metrics_enabled)
+        self.hedger = HedgedRunner(
+            hedge_after_seconds=settings.hedge_after_seconds,
+            enabled=settings.hedge_enabled,
+        )
+        self.user_quotas = UserQuotas(
+            limits={
+                60: settings.user_quota_tokens_per_minute,
+                3600: settings.user_quota_tokens_per_hour,
+            },
+            soft_ratio=settings.user_quota_soft_ratio,
+            max_users=settings.user_quota_max_users,
+            enabled=settings.user_quota_enabled,
+        )
     
-    def _initialize_agent(self):
-        """Inicializa o agente com modelo OpenAI e ferramentas MCP"""
-        try:
-            logger.info("🚀 Inicializando Agente Agno...")
-            
-            self.agent = Agent(
+    async def startup(self):
+        """Constrói os agentes e abre as conexões MCP persistentes (lifespan)"""
+        logger.info("🚀 Inicializando Agentes Agno...")
+        for pool in self.agent_pools.values():
+            pool.start()
+        await self.mcp_pools.start()
+    
+    async def shutdown(self):
+        """Fecha as conexões MCP (lifespan)"""
+        await self.session_memory.stop()
+        await self.mcp_pools.stop()
+    
+    def _local_response(
+        self,
+        request: AgentRequest,
+        trace: Optional[RequestTrace] = None
+    ) -> Tuple[Optional[AgentResponse], bool]:
+        """
+        Respostas sem LLM: fast-path e cache semântico
+
+        Args:
+            request: Requisição do agente
+            trace: Trace da mensagem (recebe o caminho da resposta local)
+
+        Returns:
+            (resposta local ou None, se a resposta do agente deve ir para o cache)
+        """
+        audio_mode = self._should_send_audio(request, None)
+        
+        # Saudações, agradecimentos e fora do tema: resposta local, sem LLM
+        # ("beleza" logo após uma pergunta do assistente segue para o agente)
+        in_conversation = self.session_memory.has_recent_reply(
+            request, settings.fast_path_conversation_window_seconds
+        )
+        fast_reply = self.fast_path.try_respond(request, audio=audio_mode, in_conversation=in_conversation)
+        if fast_reply is not None:
+            if trace is not None:
+                trace.path = "fast_path"
+            # Resposta local também faz parte da conversa (memória da sessão)
+            self.session_memory.record(request, fast_reply)
+            return AgentResponse(
+                session_id=request.session_id,
+                user_id=request.user_id,
+                response_text=fast_reply,
+                auxiliary_text="",
+                should_send_audio=audio_mode,
+                timestamp=datetime.now(),
+            ), False
+        
+        # Pergunta semelhante já respondida (exceto opinião/dados pessoais)
+        personal = bool({"opiniao", "perfil"} & set(self.tool_router.detect_intents(request.user_message)))
+        # Perguntas que dependem da conversa ("e esse projeto?") também não usam o cache
+        personal = personal or self.session_memory.is_follow_up(request)
+        use_semantic_cache = (
+            settings.semantic_cache_enabled
+            and self.semantic_cache.is_cacheable(request.user_message, personal)
+        )
+        if use_semantic_cache:
+            cached = self.semantic_cache.get(
+                request.user_message,
+                self._answer_mode(request),
+                topics=self._topics(request),
+            )
+            if cached:
+                if trace is not None:
+                    trace.path = "semantic_cache"
+                self.session_memory.record(request, cached.response_text)
+                return AgentResponse(
+                    session_id=request.session_id,
+                    user_id=request.user_id,
+                    response_text=cached.response_text,
+                    auxiliary_text=cached.auxiliary_text,
+                    should_send_audio=cached.should_send_audio,
+                    timestamp=datetime.now(),
+                ), False
+        
+        return None, use_semantic_cache
+    
+    def _build_prompt(self, request: AgentRequest, quota: QuotaDecision) -> Tuple[str, bool]:
+        """
+        Mensagem do usuário + memória da sessão dentro do limite de tokens
+
+        Returns:
+            (prompt, se a memória/histórico da sessão entrou no prompt)
+        """
+        prompt = build_user_prompt(request, concise=quota.degraded)
+        memory_budget = min(
+            settings.memory_token_budget,
+            max(0, settings.agent_max_prompt_tokens - estimate_tokens(prompt))
+        )
+        memory_context, memory_tokens = self.session_memory.build_context(request, memory_budget)
+        if memory_context:
+            prompt = build_user_prompt(request, memory_context, concise=quota.degraded)
+        
+        prompt_tokens = estimate_tokens(prompt)
+        self.session_memory.record_prompt(prompt_tokens, memory_tokens)
+        logger.info(f"📏 Prompt: ~{prompt_tokens} tokens (memória: ~{memory_tokens})")
+        return prompt, bool(memory_context)
+    
+    async def _summarize_session(self, summary: str, turns: List[SessionTurn]) -> str:
+        """Atualiza o resumo da sessão com o modelo de resumo (fora do caminho crítico)"""
+        prompt = build_summary_prompt(summary, turns)
+        estimated = SUMMARY_PROMPT_TOKENS + estimate_tokens(prompt) + settings.memory_summary_max_tokens
+        async with self.scheduler.slot("__memoria__", estimated) as ticket:
+            agent = Agent(
                 model=OpenAIChat(
-                    id=settings.agent_model,
+                    id=settings.memory_summary_model,
                     api_key=settings.openai_api_key,
                 ),
-                markdown=True,
+                system_message=SUMMARY_SYSTEM_PROMPT,
             )
-            logger.info("✅ Agente Agno inicializado com sucesso")
-        except Exception as e:
-            logger.error(f"❌ Erro ao inicializar agente: {e}")
-            raise
+            output = await agent.arun(input=prompt)
+            self._settle(ticket, output)
+        return str(output.content or "")
     
-    async def _setup_mcp_tools(self) -> Optional[MCPTools]:
-        """
-        Configura conexão com servidor MCP de Projetos de Lei
-        
-        Returns:
-            MCPTools conectado ou None se falhar
+    def _answer_mode(self, request: AgentRequest) -> str:
+        return "audio" if self._should_send_audio(request, None) else "text"
+    
+    @staticmethod
+    def _topics(request: AgentRequest) -> List[str]:
+        """Tópicos de interesse (entram no prompt, então separam o cache semântico)"""
+        return (request.user_preferences or {}).get("topics") or []
+    
+    @asynccontextmanager
+    async def _leased_agent(
+        self,
+        request: AgentRequest,
+        quota: QuotaDecision,
+        trace: Optional[RequestTrace] = None
+    ):
         """
-        mcp_tools_list = []
+        Conexões MCP + ferramentas da mensagem + agente pré-construído
 
-        try:
-            logger.info(f"🔌 Conectando ao MCP: {settings.mcp_projetos_lei_url}")
+        Usuário perto do limite de cota vai para o modelo rápido.
+
+        Yields:
+            (agente, função que empresta um agente de contingência do
+            modelo rápido com as mesmas ferramentas, só se houver um livre)
+        """
+        # Emprestar conexões MCP persistentes do pool
+        async with self.mcp_pools.lease_all() as leased:
+            logger.info(f"⏱️  Setup MCP: {leased.setup_seconds * 1000:.0f}ms")
+            if trace is not None:
+                trace.mcp_setup_seconds = leased.setup_seconds
+            
+            if not leased.tools:
+                # Fallback: agente sem ferramentas MCP
+                logger.warning("⚠️  Usando agente sem ferramentas MCP")
+            
+            # Apenas as ferramentas relevantes para a mensagem
+            selection = self.tool_router.select(request.user_message, leased.tools)
             
-            mcp_projetos_lei = MCPTools(
-                transport="streamable-http",
-                url=settings.mcp_projetos_lei_url
+            # Modelo rápido ou forte conforme a complexidade da mensagem
+            decision = self.model_router.route(
+                request,
+                self.tool_router.detect_intents(request.user_message),
+                audio=self._should_send_audio(request, None),
+                force_fast=quota.degraded,
             )
+            if trace is not None:
+                trace.model = decision.model
+            
+            # Buscas prováveis (tópicos do usuário) em paralelo com o LLM
+            prefetch = self.prefetcher.start(request, selection.tools)
+            try:
+                # Emprestar agente pré-construído do pool do modelo escolhido
+                pool = self.agent_pools[decision.tier]
+                # Contingência no modelo rápido (sem roteador: mesmo modelo, nova tentativa)
+                hedge_pool = self.agent_pools.get(ModelTier.FAST, self.agent_pools[ModelTier.STRONG])
+                async with pool.lease(leased.tools, selection.tools) as agent:
+                    started_at = time.monotonic()
+                    # Sem espera: o agendador ocupa o pool inteiro sob carga
+                    yield agent, lambda: hedge_pool.lease(leased.tools, selection.tools, wait=False)
+                    self.model_router.record_latency(decision.tier, time.monotonic() - started_at)
+            finally:
+                # Antes de devolver as conexões MCP (fim do lease_all)
+                await prefetch.cancel()
+    
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Tokens reservados no orçamento antes da execução (corrigidos em _settle)"""
+        return SYSTEM_PROMPT_TOKENS + estimate_tokens(prompt) + settings.scheduler_reserved_tokens
+    
+    def _settle(self, ticket: Ticket, response_output, hedged: bool = False) -> None:
+        """Informa ao agendador os tokens e chamadas ao modelo realmente usados"""
+        metrics = getattr(response_output, "metrics", None)
+        tokens = (metrics.input_tokens or 0) + (metrics.output_tokens or 0) if metrics else None
+        messages = getattr(response_output, "messages", None) or []
+        model_calls = sum(1 for message in messages if getattr(message, "role", None) == "assistant")
+        if hedged:
+            # A execução cancelada também consumiu orçamento (uso real desconhecido)
+            tokens = (tokens or 0) + ticket.estimated_tokens
+            model_calls += 1
+        self.scheduler.settle(ticket, tokens, requests=model_calls)
+    
+    def _build_response(
+        self,
+        request: AgentRequest,
+        response_output,
+        use_semantic_cache: bool,
+        started_at: float
+    ) -> AgentResponse:
+        """Monta a AgentResponse a partir da saída do agente"""
+        logger.info("📥 Resposta recebida do agente")
+        self.llm_usage.record(response_output)
+        try:
+            logger.info(f"Resposta completa: {response_output.content.auxiliary_text}")
+        except Exception:
+            pass
 
-            mcp_tools_list.append(mcp_projetos_lei)
-            logger.info(f"✅ MCP conectado com sucesso")
-        except Exception as e:
-            logger.error(f"❌ Erro ao conectar ao MCP: {e}")
+        # Extrair texto da resposta
+        response_text = self._extract_response_text(response_output)
+
+        auxiliary_text = self._extract_auxiliary_text(response_output)
         
-        try:
-            logger.info(f"🔌 Conectando ao MCP Usuários: {settings.mcp_users_url}")
-            mcp_users = MCPTools(
-                transport="streamable-http",
-                url=settings.mcp_users_url
+        logger.info(f"✅ Resposta recebida: {response_text[:80]}...")
+        
+        # Determinar se deve enviar áudio
+        should_send_audio = self._should_send_audio(request, response_output)
+        
+        # Criar resposta (metadados preenchidos aqui, não pelo LLM)
+        response = AgentResponse(
+            session_id=request.session_id,
+            user_id=request.user_id,
+            response_text=response_text,
+            auxiliary_text=auxiliary_text or "",
+            should_send_audio=should_send_audio,
+            timestamp=datetime.now(),
+        )
+        
+        logger.info(
+            f"✅ Resposta gerada para {request.user_id} "
+            f"(áudio: {should_send_audio})"
+        )
+        
+        self.session_memory.record(request, response.response_text)
+        
+        if use_semantic_cache:
+            self.semantic_cache.set(
+                request.user_message,
+                self._answer_mode(request),
+                response_text=response.response_text,
+                auxiliary_text=response.auxiliary_text,
+                should_send_audio=response.should_send_audio,
+                latency_seconds=time.monotonic() - started_at,
+                topics=self._topics(request),
             )
-            mcp_tools_list.append(mcp_users)
-            logger.info("✅ MCP Usuários conectado")
-        except Exception as e:
-            logger.error(f"❌ Erro ao conectar MCP Usuários: {e}")
-
-        if not mcp_tools_list:
-            logger.warning("⚠️  Nenhum MCP disponível, agente funcionará sem ferramentas")
-            return None
         
-        return mcp_tools_list
+        return response
     
     async def process_message(self, request: AgentRequest) -> AgentResponse:
         """
@@ -89,72 +379,278 @@ class AgentService:
         Returns:
             Resposta do agente com metadados
         """
+        trace = RequestTrace()
         try:
             logger.info(f"🤖 Processando mensagem de {request.user_id}")
             logger.info(f"   Tipo: {request.message_type}")
             logger.info(f"   Conteúdo: {request.user_message[:100]}...")
             
-            # Construir prompt baseado no tipo de mensagem
-            prompt = self._build_prompt(request)
+            started_at = trace.started_at
+            deadline = Deadline.start(
+                request.deadline_ms,
+                default_seconds=settings.agent_deadline_seconds,
+                reserve_seconds=settings.deadline_reserve_seconds,
+            )
+            local_response, use_semantic_cache = self._local_response(request, trace)
+            if local_response is not None:
+                return self._finish_trace(trace, local_response)
             
-            # Configurar ferramentas MCP
-            mcp_tools_list = await self._setup_mcp_tools()
+            # Cota de tokens do usuário (só o que chega ao LLM conta)
+            quota = self.user_quotas.check(request.user_id)
             
-            # Executar agente com context manager se MCP disponível
-            if mcp_tools_list:
-                agent_with_tools = Agent(
-                    model=OpenAIChat(
-                        id=settings.agent_model,
-                        api_key=settings.openai_api_key,
-                    ),
-                    tools=[tool for tool in mcp_tools_list],
-                    markdown=True,
-                    output_schema=AgentResponse
-                )
-                logger.info("📤 Enviando prompt para agente...")
-                response_output = await agent_with_tools.arun(input=prompt)
-            else:
-                # Fallback: usar agente sem tools
-                logger.warning("⚠️  Usando agente sem ferramentas MCP")
-                response_output = await self.agent.arun(input=prompt)
+            # Contexto da mensagem (instruções fixas ficam no prompt de sistema)
+            prompt, with_memory = self._build_prompt(request, quota)
+            # Resposta que usou a conversa não serve para outra sessão
+            use_semantic_cache = use_semantic_cache and not with_memory
             
-            logger.info("📥 Resposta recebida do agente")
             try:
-                logger.info(f"Resposta completa: {response_output.content.auxiliary_text}")
-            except Exception:
-                pass
+                outcome = await asyncio.wait_for(
+                    self._run_agent(request, prompt, quota, trace),
+                    timeout=deadline.remaining()
+                )
+            except asyncio.TimeoutError:
+                if deadline.remaining() > 0:
+                    raise
+                return self._finish_trace(trace, self._deadline_response(request, deadline), path="partial")
+            
+            response = self._build_response(request, outcome.output, use_semantic_cache, started_at)
+            return self._finish_trace(trace, response)
+            
+        except UserQuotaExceeded:
+            self.request_metrics.finish(trace, path="quota")
+            raise
+        except Exception as e:
+            self.request_metrics.finish(trace, path="error")
+            logger.error(f"❌ Erro ao processar mensagem: {e}")
+            logger.exception("Traceback completo:")
+            raise
+    
+    async def _run_agent(
+        self,
+        request: AgentRequest,
+        prompt: str,
+        quota: QuotaDecision,
+        trace: RequestTrace
+    ) -> HedgeOutcome:
+        """
+        Fila do LLM + agente, com contingência se a execução demorar ou falhar
+
+        Usuário perto do limite de cota não tem execução de contingência.
+        """
+        async with self.scheduler.slot(request.user_id, self._estimate_tokens(prompt)) as ticket:
+            trace.queue_wait_seconds = ticket.wait_seconds
+            async with self._leased_agent(request, quota, trace) as (agent, lease_hedge_agent):
+                logger.info("📤 Enviando prompt para agente...")
 
-            # Extrair texto da resposta
-            response_text = self._extract_response_text(response_output)
+                async def hedge():
+                    try:
+                        async with lease_hedge_agent() as hedge_agent:
+                            return await hedge_agent.arun(input=prompt)
+                    except AgentPoolExhausted as e:
+                        raise HedgeUnavailable(str(e)) from e
 
-            auxiliary_text = self._extract_auxiliary_text(response_output)
+                outcome = await self.hedger.run(
+                    lambda: agent.arun(input=prompt),
+                    None if quota.degraded else hedge,
+                )
+            self._settle(ticket, outcome.output, hedged=outcome.hedged)
+        
+        self.request_metrics.observe_run(trace, outcome.output)
+        # A execução de contingência cancelada não é cobrada do usuário
+        self.user_quotas.record(request.user_id, trace.prompt_tokens + trace.completion_tokens)
+        if outcome.winner == "hedge":
+            logger.info("🏁 Resposta da execução de contingência")
+        return outcome
+    
+    def _finish_trace(
+        self,
+        trace: RequestTrace,
+        response: AgentResponse,
+        path: Optional[str] = None
+    ) -> AgentResponse:
+        """Registra as métricas da mensagem (e os tempos na resposta, se DEBUG_TIMINGS)"""
+        self.request_metrics.finish(trace, path)
+        if settings.debug_timings:
+            response.timings = trace.to_dict()
+        return response
+    
+    def _deadline_response(self, request: AgentRequest, deadline: Deadline) -> AgentResponse:
+        """Resposta curta quando o prazo se esgota (não vai para caches nem memória)"""
+        self.hedger.deadline_exceeded += 1
+        logger.warning(
+            f"⌛ Prazo esgotado para {request.user_id} após "
+            f"{time.monotonic() - deadline.started_at:.1f}s, enviando resposta de contingência"
+        )
+        return AgentResponse(
+            session_id=request.session_id,
+            user_id=request.user_id,
+            response_text=DEADLINE_FALLBACK_TEXT,
+            auxiliary_text="",
+            should_send_audio=self._should_send_audio(request, None),
+            partial=True,
+            timestamp=datetime.now(),
+        )
+    
+    async def process_messages(self, requests: List[AgentRequest]) -> BatchAgentResponse:
+        """
+        Processa um lote de mensagens (vários usuários) em paralelo
+        
+        A concorrência real e a ordem entre usuários ficam a cargo do
+        agendador; uma falha não interrompe as demais mensagens.
+        
+        Args:
+            requests: Requisições do lote
+            
+        Returns:
+            Resultado por mensagem, na ordem do lote
+        """
+        logger.info(
+            f"📦 Processando lote de {len(requests)} mensagens "
+            f"({len({r.user_id for r in requests})} usuários)"
+        )
+        started_at = time.monotonic()
+        outcomes = await asyncio.gather(
+            *(self.process_message(request) for request in requests),
+            return_exceptions=True,
+        )
+        
+        results = [
+            BatchItemResult(index=index, error=str(outcome) or type(outcome).__name__)
+            if isinstance(outcome, Exception)
+            else BatchItemResult(index=index, response=outcome)
+            for index, outcome in enumerate(outcomes)
+        ]
+        failed = sum(1 for result in results if result.error is not None)
+        total_seconds = time.monotonic() - started_at
+        logger.info(f"✅ Lote concluído em {total_seconds:.2f}s | Falhas: {failed}")
+        
+        return BatchAgentResponse(
+            results=results,
+            succeeded=len(results) - failed,
+            failed=failed,
+            total_seconds=round(total_seconds, 3),
+        )
+    
+    async def process_message_stream(self, request: AgentRequest) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Processa uma mensagem emitindo a resposta enquanto é gerada
+        
+        Eventos (nome, dados):
+        - delta: trecho novo de response_text
+        - sentence: frase completa (índice + texto), pronta para TTS/envio
+        - done: AgentResponse completa (should_send_audio, auxiliary_text...)
+        - error: falha durante o processamento
+        
+        Mesmo prazo de process_message (sem contingência: as frases já
+        emitidas não podem ser trocadas). Prazo esgotado → execução
+        cancelada e done com partial=true: o texto emitido até ali ou,
+        se nada foi emitido, a resposta curta de contingência.
+        
+        Args:
+            request: Requisição do agente
+        """
+        logger.info(f"🤖 Processando mensagem (streaming) de {request.user_id}")
+        trace = RequestTrace()
+        started_at = trace.started_at
+        deadline = Deadline.start(
+            request.deadline_ms,
+            default_seconds=settings.agent_deadline_seconds,
+            reserve_seconds=settings.deadline_reserve_seconds,
+        )
+        
+        try:
+            local_response, use_semantic_cache = self._local_response(request, trace)
+            if local_response is not None:
+                self._finish_trace(trace, local_response)
+                sentences = split_sentences(local_response.response_text)
+                for index, sentence in enumerate(sentences):
+                    yield "sentence", {"index": index, "text": sentence}
+                yield "done", {**local_response.model_dump(mode="json"), "sentences": len(sentences)}
+                return
             
-            logger.info(f"✅ Resposta recebida: {response_text[:80]}...")
+            quota = self.user_quotas.check(request.user_id)
+            prompt, with_memory = self._build_prompt(request, quota)
+            use_semantic_cache = use_semantic_cache and not with_memory
+            streamer = ResponseTextStreamer()
+            splitter = SentenceSplitter()
+            sentences = 0
+            completed = None
+            timed_out = False
             
-            # Determinar se deve enviar áudio
-            should_send_audio = self._should_send_audio(request, response_output)
+            async with self.scheduler.slot(request.user_id, self._estimate_tokens(prompt)) as ticket:
+                trace.queue_wait_seconds = ticket.wait_seconds
+                async with self._leased_agent(request, quota, trace) as (agent, _):
+                    logger.info("📤 Enviando prompt para agente (streaming)...")
+                    # Com output_schema o agno só emite o conteúdo no final;
+                    # sem o parse, os pedaços do JSON chegam conforme são gerados
+                    agent.parse_response = False
+                    events = agent.arun(input=prompt, stream=True, stream_events=True)
+                    try:
+                        while True:
+                            try:
+                                event = await asyncio.wait_for(events.__anext__(), timeout=deadline.remaining())
+                            except StopAsyncIteration:
+                                break
+                            if isinstance(event, RunContentEvent) and isinstance(event.content, str):
+                                delta = streamer.feed(event.content)
+                                if not delta:
+                                    continue
+                                yield "delta", {"text": delta}
+                                for sentence in splitter.feed(delta):
+                                    yield "sentence", {"index": sentences, "text": sentence}
+                                    sentences += 1
+                            elif isinstance(event, RunCompletedEvent):
+                                completed = event
+                    except asyncio.TimeoutError:
+                        timed_out = True
+                    finally:
+                        await events.aclose()
+                        agent.parse_response = True
+                self._settle(ticket, completed)
             
-            # Criar resposta
-            response = AgentResponse(
-                session_id=request.session_id,
-                user_id=request.user_id,
-                response_text=response_text,
-                auxiliary_text=auxiliary_text,
-                should_send_audio=should_send_audio,
-                timestamp=datetime.now(),
-            )
+            if timed_out:
+                response = self._deadline_response(request, deadline)
+                if streamer.text:
+                    # O que já foi emitido é a resposta (sem cache nem memória)
+                    response.response_text = streamer.text
+                for sentence in splitter.flush() if streamer.text else split_sentences(response.response_text):
+                    yield "sentence", {"index": sentences, "text": sentence}
+                    sentences += 1
+                self._finish_trace(trace, response, path="partial")
+                yield "done", {**response.model_dump(mode="json"), "sentences": sentences}
+                return
             
-            logger.info(
-                f"✅ Resposta gerada para {request.user_id} "
-                f"(áudio: {should_send_audio})"
-            )
+            for sentence in splitter.flush():
+                yield "sentence", {"index": sentences, "text": sentence}
+                sentences += 1
             
-            return response
+            try:
+                output = AgentOutput.model_validate_json(streamer.raw)
+            except ValueError:
+                logger.warning("⚠️  Saída em streaming não é um JSON válido, usando texto extraído")
+                output = AgentOutput(response_text=streamer.text or streamer.raw)
+            
+            if completed is not None:
+                completed.content = output
+            else:
+                completed = RunCompletedEvent(content=output)
+            
+            self.request_metrics.observe_run(trace, completed)
+            self.user_quotas.record(request.user_id, trace.prompt_tokens + trace.completion_tokens)
+            response = self._finish_trace(
+                trace,
+                self._build_response(request, completed, use_semantic_cache, started_at)
+            )
+            yield "done", {**response.model_dump(mode="json"), "sentences": sentences}
             
+        except UserQuotaExceeded as e:
+            self.request_metrics.finish(trace, path="quota")
+            yield "error", {"detail": QUOTA_EXCEEDED_TEXT, "retry_after_seconds": round(e.retry_after_seconds)}
         except Exception as e:
-            logger.error(f"❌ Erro ao processar mensagem: {e}")
+            self.request_metrics.finish(trace, path="error")
+            logger.error(f"❌ Erro ao processar mensagem (streaming): {e}")
             logger.exception("Traceback completo:")
-            raise
+            yield "error", {"detail": str(e)}
     
     def _extract_response_text(self, response_output) -> str:
         """
@@ -174,91 +670,6 @@ class AgentService:
             return response_output.get('response_text', '')
         return str(response_output)
     
-    def _build_prompt(self, request: AgentRequest) -> str:
-        """
-        Constrói o prompt para o agente baseado na requisição
-        
-        Args:
-            request: Requisição do agente
-            
-        Returns:
-            Prompt formatado para o agente
-        """
-        base_prompt = f"""
-Your Role: Especialista em legislação brasileira, com foco em traduzir temas complexos do Congresso Nacional para linguagem simples e acessível.
-
-Short basic instruction: Responda perguntas sobre projetos de lei ou temas sociais ligados à legislação, adaptando o conteúdo para diferentes níveis de escolaridade, em áudio ou texto.
-
-What you should do:
-- Analise a dúvida do usuário, que pode ser sobre um projeto de lei específico ou um tema que impacta sua comunidade.
-- Adapte a resposta conforme o formato desejado (áudio ou texto):
-
-✅ **Sempre que o usuário expressar uma opinião ou sentimento (implícito ou explícito), registre isso no MCP, respeitando a intenção original da mensagem.**
-
-▶️ Se `should_send_audio = true`:
-  - Responda com até **1200 caracteres** (ideal: ~800).
-  - Use **linguagem oral**, fluída e explicativa.
-  - No campo `response_text` **Não inclua links, emojis ou caracteres especiais**.
-  - Foque em clareza, tom acessível e exemplos concretos.
-  - O campo `auxiliary_text` pode conter observações ou metadados, inclusive links.
-
-💬 Se `should_send_audio = false` (texto via WhatsApp):
-  - A resposta principal (`response_text`) deve ser **bem estruturada** para leitura fácil:
-     - Use **blocos com quebras de linha**, marcadores simples (como `-`, `•`) e frases curtas.
-     - Destaque partes importantes com **maiúsculas moderadas** se necessário.
-     - Explique os principais pontos de forma direta.
-     - **Inclua links úteis apenas quando realmente necessários** e só no final.
-     - Evite parágrafos longos.
-  - O `auxiliary_text` pode ser omitido ou conter observações adicionais, se útil.
-  - O `auxiliary_text` também pode conter links ou referências adicionais caso referenciado ou necessário.
-
-- Sempre que houver múltiplos projetos de lei relacionados, resuma os 3 principais.
-- Se a pergunta não estiver relacionada à legislação, oriente com empatia, redirecione ou explique brevemente.
-
-Your Goal: Ajudar o cidadão comum a entender melhor o que acontece no Congresso Nacional e como isso impacta sua vida, com foco em **clareza, inclusão e leitura fluida pelo WhatsApp**.
-
-Result: A resposta deve seguir o formato:
-{{
-  "response_text": "resposta principal estruturada para áudio ou texto",
-  "auxiliary_text": "complementos opcionais (se necessário)",
-  "should_send_audio": true/false
-}}
-
-Constraint:
-- Áudio: até 1200 caracteres, linguagem oral e simples, sem links ou símbolos incomuns.
-- Texto: mais informativo, com estrutura pensada para WhatsApp (blocos curtos, marcadores, links só no final).
-- Linguagem acessível, sem jargões, com explicações e exemplos quando necessário.
-
-Context:
-- Público formado por cidadãos com menor escolaridade, recebendo mensagens via WhatsApp.
-- As perguntas podem envolver leis específicas ou temas sociais que os afetam diretamente.
-- As mensagens podem conter mais de uma intenção (ex: opinião + pergunta).
-"""
-        additional_prompt = f"""
-📋 CONTEXTO DA MENSAGEM:
-- Tipo: {request.message_type}
-- Usuário: {request.user_id}
-- Session: {request.session_id}
-
-💬 MENSAGEM DO USUÁRIO:
-{request.user_message}
-⚙️ INFORMAÇÕES DO USUÁRIO:
-"""
-        base_prompt += additional_prompt
-        
-        # Adicionar preferências do usuário se disponíveis
-        if request.user_preferences:
-            if request.user_preferences.get("topics"):
-                topics = ", ".join(request.user_preferences["topics"])
-                base_prompt += f"\n- Tópicos de interesse: {topics}"
-            
-            if request.user_preferences.get("prefer_audio"):
-                base_prompt += "\n- Preferência: Respostas em áudio (responda concisamente)"
-        
-        base_prompt += "\n\nAGORA, responda à mensagem do usuário:"
-        
-        return base_prompt
-    
     def _extract_auxiliary_text(self, response_output) -> Optional[str]:
         """
         Retorna texto auxiliar para TTS se necessário
@@ -0,0 +1,272 @@
+"""
+Memória de conversa por sessão
+
+Cada session_id guarda as últimas trocas (mensagem + resposta) e um
+resumo acumulado das mais antigas:
+1. Prompt → resumo + trocas mais recentes que cabem no orçamento de
+   tokens (limite rígido; trocas longas são truncadas)
+2. Depois da resposta → a troca é registrada; se a memória passar do
+   orçamento, as trocas mais antigas são resumidas em background, fora
+   do caminho crítico da requisição
+3. Sessão desconhecida (ex: após reinício da API) → semeada com o
+   recent_history enviado pelo orquestrador
+
+Mensagens que dependem da conversa ("e esse projeto?", "explica melhor")
+não usam o cache semântico.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .models import AgentRequest
+from .prompts import estimate_tokens
+from .text_vectors import normalize
+
+logger = logging.getLogger(__name__)
+
+
+# Referências à conversa anterior (normalizadas, sem acentos)
+FOLLOW_UP_MARKERS = [
+    "esse", "essa", "isso", "desse", "dessa", "disso", "nesse", "nessa",
+    "dele", "dela", "o primeiro", "o segundo", "o terceiro", "o ultimo",
+    "anterior", "mais sobre", "explica melhor", "continua", "e ai",
+    "voce falou", "voce disse", "que voce",
+]
+
+
+@dataclass
+class SessionTurn:
+    """Uma troca da conversa"""
+    user_message: str
+    agent_response: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.user_message) + estimate_tokens(self.agent_response)
+
+
+@dataclass
+class SessionState:
+    """Memória de uma sessão"""
+    summary: str = ""
+    turns: Deque[SessionTurn] = field(default_factory=deque)
+    updated_at: float = field(default_factory=time.monotonic)
+    summarizing: bool = False
+
+
+Summarizer = Callable[[str, List[SessionTurn]], Awaitable[str]]
+
+
+class SessionMemory:
+    """Memória por session_id com orçamento de tokens e resumo contínuo"""
+
+    def __init__(
+        self,
+        summarize: Optional[Summarizer] = None,
+        token_budget: int = 600,
+        summary_max_tokens: int = 200,
+        turn_max_tokens: int = 250,
+        max_turns: int = 20,
+        max_sessions: int = 5000,
+        ttl_seconds: int = 21600,
+        enabled: bool = True
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.turn_max_tokens = turn_max_tokens
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self.tasks: Set[asyncio.Task] = set()
+
+        self.seeded = 0
+        self.summaries = 0
+        self.summary_failures = 0
+        self.summary_seconds_total = 0.0
+        self.prompts = 0
+        self.prompt_tokens_total = 0
+        self.prompt_tokens_max = 0
+        self.memory_tokens_total = 0
+
+    def _get(self, session_id: str) -> Optional[SessionState]:
+        state = self.sessions.get(session_id)
+        if state is None:
+            return None
+        if time.monotonic() - state.updated_at > self.ttl_seconds:
+            del self.sessions[session_id]
+            return None
+        self.sessions.move_to_end(session_id)
+        return state
+
+    def _create(self, session_id: str) -> SessionState:
+        state = SessionState()
+        self.sessions[session_id] = state
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return state
+
+    def _state_for(self, request: AgentRequest) -> Optional[SessionState]:
+        """Memória da sessão (semeada pelo recent_history se desconhecida)"""
+        state = self._get(request.session_id)
+        if state is None and request.recent_history:
+            state = self._create(request.session_id)
+            for entry in request.recent_history[-self.max_turns:]:
+                if entry.get("user_message") or entry.get("agent_response"):
+                    state.turns.append(SessionTurn(
+                        user_message=entry.get("user_message") or "",
+                        agent_response=entry.get("agent_response") or "",
+                    ))
+            self.seeded += 1
+        return state
+
+    def has_history(self, request: AgentRequest) -> bool:
+        state = self._state_for(request) if self.enabled else None
+        return bool(state and (state.summary or state.turns))
+
+    def has_recent_reply(self, request: AgentRequest, within_seconds: float) -> bool:
+        """Assistente respondeu nesta sessão há no máximo within_seconds"""
+        state = self._state_for(request) if self.enabled else None
+        return bool(
+            state
+            and state.turns
+            and state.turns[-1].agent_response
+            and time.monotonic() - state.updated_at <= within_seconds
+        )
+
+    def is_follow_up(self, request: AgentRequest) -> bool:
+        """Mensagem que depende do que foi dito antes na sessão"""
+        if not self.has_history(request):
+            return False
+        padded = f" {normalize(request.user_message)} "
+        return any(f" {marker} " in padded for marker in FOLLOW_UP_MARKERS)
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+    def build_context(self, request: AgentRequest, budget: int) -> Tuple[str, int]:
+        """
+        Memória da sessão para o prompt, limitada a `budget` tokens
+
+        Returns:
+            (texto da memória, tokens estimados)
+        """
+        state = self._state_for(request) if self.enabled else None
+        if state is None or budget <= 0:
+            return "", 0
+
+        sections: List[str] = []
+        used = 0
+        header = "Resumo da conversa até aqui: "
+        summary_budget = min(self.summary_max_tokens, budget) - estimate_tokens(header)
+        if state.summary and summary_budget > 0:
+            sections.append(header + self._truncate(state.summary, summary_budget))
+            used += estimate_tokens(sections[0])
+
+        # Trocas mais recentes primeiro, enquanto couberem no orçamento
+        recent: List[str] = []
+        for turn in reversed(state.turns):
+            text = (
+                f"Usuário: {self._truncate(turn.user_message, self.turn_max_tokens // 2)}\n"
+                f"Assistente: {self._truncate(turn.agent_response, self.turn_max_tokens // 2)}"
+            )
+            tokens = estimate_tokens(text)
+            if used + tokens > budget:
+                break
+            recent.append(text)
+            used += tokens
+
+        if recent:
+            sections.append("Últimas mensagens:\n" + "\n".join(reversed(recent)))
+        return "\n".join(sections), used
+
+    def record_prompt(self, prompt_tokens: int, memory_tokens: int) -> None:
+        self.prompts += 1
+        self.prompt_tokens_total += prompt_tokens
+        self.prompt_tokens_max = max(self.prompt_tokens_max, prompt_tokens)
+        self.memory_tokens_total += memory_tokens
+
+    def record(self, request: AgentRequest, agent_response: str) -> None:
+        """Registra a troca e agenda o resumo se a memória passou do orçamento"""
+        if not self.enabled:
+            return
+        state = self._state_for(request) or self._create(request.session_id)
+        state.turns.append(SessionTurn(request.user_message, agent_response))
+        while len(state.turns) > self.max_turns:
+            state.turns.popleft()
+        state.updated_at = time.monotonic()
+
+        turns_tokens = sum(turn.tokens for turn in state.turns)
+        if (
+            self.summarize is not None
+            and not state.summarizing
+            and len(state.turns) > 1
+            and estimate_tokens(state.summary) + turns_tokens > self.token_budget
+        ):
+            state.summarizing = True
+            task = asyncio.create_task(self._refresh_summary(request.session_id, state))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _refresh_summary(self, session_id: str, state: SessionState) -> None:
+        """Resume as trocas mais antigas (mantém as recentes que cabem no orçamento)"""
+        keep_budget = self.token_budget - self.summary_max_tokens
+        keep, used = 0, 0
+        for turn in reversed(state.turns):
+            if used + turn.tokens > keep_budget or keep == len(state.turns) - 1:
+                break
+            keep += 1
+            used += turn.tokens
+        older = list(state.turns)[:len(state.turns) - keep]
+
+        started_at = time.monotonic()
+        try:
+            summary = await self.summarize(state.summary, older)
+            state.summary = self._truncate(summary.strip(), self.summary_max_tokens)
+            # Novas trocas podem ter chegado durante o resumo (entram no fim)
+            for turn in older:
+                if state.turns and state.turns[0] is turn:
+                    state.turns.popleft()
+            elapsed = time.monotonic() - started_at
+            self.summaries += 1
+            self.summary_seconds_total += elapsed
+            logger.info(
+                f"🧠 Memória resumida ({session_id}) | {len(older)} trocas "
+                f"→ ~{estimate_tokens(state.summary)} tokens | {elapsed:.2f}s"
+            )
+        except Exception as e:
+            # O orçamento continua valendo: build_context corta as trocas antigas
+            self.summary_failures += 1
+            logger.warning(f"⚠️  Falha ao resumir memória ({session_id}): {e!r}")
+        finally:
+            state.summarizing = False
+
+    async def stop(self) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "token_budget": self.token_budget,
+            "seeded_from_history": self.seeded,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "summaries_running": len(self.tasks),
+            "avg_summary_seconds": round(self.summary_seconds_total / self.summaries, 3) if self.summaries else 0.0,
+            "prompts": self.prompts,
+            "avg_prompt_tokens": round(self.prompt_tokens_total / self.prompts, 1) if self.prompts else 0.0,
+            "max_prompt_tokens": self.prompt_tokens_max,
+            "avg_memory_tokens": round(self.memory_tokens_total / self.prompts, 1) if self.prompts else 0.0,
+        }
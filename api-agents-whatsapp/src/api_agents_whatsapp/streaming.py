@@ -0,0 +1,131 @@
+"""
+Streaming da resposta do agente
+
+O LLM gera a saída estruturada (AgentOutput) como JSON. Durante o
+streaming, o valor de `response_text` é extraído incrementalmente dos
+pedaços de JSON e dividido em frases, para que o consumidor possa
+sintetizar áudio (TTS) ou enviar mensagens frase a frase.
+"""
+import json
+import re
+from typing import Dict, List
+
+SENTENCE_BOUNDARY = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+
+JSON_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/", "b": "\b",
+    "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Formata um evento server-sent events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class ResponseTextStreamer:
+    """Extrai incrementalmente o campo response_text de um JSON em streaming"""
+
+    KEY = '"response_text"'
+
+    def __init__(self):
+        self.raw = ""
+        self.text = ""
+        self.position = 0
+        self.state = "key"  # key → value_start → value → done
+        self.escape = ""
+        self.high_surrogate = 0
+
+    def _decode_unicode(self, code: int) -> str:
+        # Emojis chegam como par de surrogates (\ud83d\ude00)
+        if 0xD800 <= code <= 0xDBFF:
+            self.high_surrogate = code
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self.high_surrogate:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self.high_surrogate = 0
+        return chr(code)
+
+    def feed(self, chunk: str) -> str:
+        """
+        Adiciona um pedaço do JSON
+
+        Returns:
+            Novos caracteres decodificados de response_text
+        """
+        self.raw += chunk
+        decoded = []
+
+        if self.state == "key":
+            index = self.raw.find(self.KEY, self.position)
+            if index < 0:
+                return ""
+            self.position = index + len(self.KEY)
+            self.state = "value_start"
+
+        if self.state == "value_start":
+            while self.position < len(self.raw):
+                char = self.raw[self.position]
+                self.position += 1
+                if char == '"':
+                    self.state = "value"
+                    break
+
+        while self.state == "value" and self.position < len(self.raw):
+            char = self.raw[self.position]
+            self.position += 1
+
+            if self.escape:
+                self.escape += char
+                if self.escape == "\\u":
+                    continue
+                if self.escape.startswith("\\u"):
+                    if len(self.escape) < 6:
+                        continue
+                    decoded.append(self._decode_unicode(int(self.escape[2:], 16)))
+                else:
+                    decoded.append(JSON_ESCAPES.get(char, char))
+                self.escape = ""
+            elif char == "\\":
+                self.escape = char
+            elif char == '"':
+                self.state = "done"
+            else:
+                decoded.append(char)
+
+        delta = "".join(decoded)
+        self.text += delta
+        return delta
+
+
+class SentenceSplitter:
+    """Divide texto em frases conforme ele chega"""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Adiciona texto e retorna as frases completas"""
+        self.buffer += text
+        sentences = []
+        while True:
+            match = SENTENCE_BOUNDARY.search(self.buffer)
+            if not match:
+                break
+            sentence = self.buffer[:match.end()].strip()
+            self.buffer = self.buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Retorna o restante (última frase sem pontuação final)"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str) -> List[str]:
+    """Divide um texto completo em frases"""
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
@@ -0,0 +1,57 @@
+"""
+Vetores de texto locais (sem rede)
+
+Hashing vectorizer: palavras + trigramas de caracteres mapeados por
+hash (crc32, estável entre processos) para um vetor NumPy de tamanho
+fixo, normalizado (L2). Similaridade = produto escalar (cosseno).
+"""
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos e sem pontuação (números são mantidos)"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class HashingVectorizer:
+    """Vetorizador por hashing de palavras e trigramas de caracteres"""
+
+    def __init__(self, n_features: int = 4096, char_ngram: int = 3):
+        self.n_features = n_features
+        self.char_ngram = char_ngram
+
+    def _features(self, text: str) -> List[str]:
+        words = normalize(text).split()
+        features = [f"w:{word}" for word in words]
+        features += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+        n = self.char_ngram
+        for word in words:
+            padded = f" {word} "
+            features += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        """Vetor normalizado (float32) de um texto"""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for feature in self._features(text):
+            index = zlib.crc32(feature.encode("utf-8")) % self.n_features
+            vector[index] += 1.0
+
+        # Frequência sublinear: palavras repetidas pesam menos
+        np.log1p(vector, out=vector)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def transform_many(self, texts: Iterable[str]) -> np.ndarray:
+        """Matriz (n_textos × n_features) de vetores normalizados"""
+        return np.vstack([self.transform(text) for text in texts])
@@ -0,0 +1,323 @@
+"""
+Cache de resultados das ferramentas MCP
+
+O modelo costuma chamar buscar_projetos_recentes ou obter_detalhes_projeto
+com os mesmos argumentos na mesma execução e em execuções próximas. Cada
+chamada atravessa HTTP até o servidor MCP e dali até a API da Câmara.
+
+Chave: (servidor, ferramenta, argumentos canônicos)
+1. TTL por ferramenta → dados de projetos mudam pouco; ferramentas de
+   escrita ou por usuário (registrar_opiniao, perfil) têm TTL 0 = sem cache
+2. Single-flight → chamadas idênticas simultâneas compartilham uma única
+   chamada remota, que roda em uma task própria: cancelar quem a iniciou
+   não cancela os demais (só é cancelada quando ninguém mais aguarda).
+   A chamada usa a sessão MCP de quem a iniciou; ela fica registrada em
+   active_calls da sessão, e o pool só devolve a conexão quando termina
+3. Erros não são armazenados
+4. Pré-busca (prefetch) → resultados buscados antes do modelo pedir
+   ficam no cache e são contabilizados quando usados
+
+Argumentos omitidos pelo modelo são completados com os valores padrão do
+schema, para que {"tema": "saúde"} e {"tema": "saúde", "limite": 10}
+compartilhem a mesma entrada.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from agno.tools.function import ToolResult
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+# Prefixos das mensagens de erro montadas pelo agno (agno.utils.mcp)
+ERROR_PREFIXES = ("Error", "MCP tool '")
+
+
+def schema_defaults(parameters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Valores padrão declarados no inputSchema da ferramenta"""
+    properties = (parameters or {}).get("properties") or {}
+    return {name: prop["default"] for name, prop in properties.items() if "default" in prop}
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    """Argumentos em forma canônica (chaves ordenadas, espaços normalizados, sem nulos)"""
+    def clean(value):
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [clean(v) for v in value]
+        return value
+
+    return json.dumps(clean(args), sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@dataclass
+class InflightCall:
+    """Chamada remota compartilhada e quantos chamadores a aguardam"""
+    task: asyncio.Task
+    waiters: int = 0
+
+
+@dataclass
+class ToolCallStats:
+    """Contadores por ferramenta"""
+    hits: int = 0
+    remote_calls: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    remote_seconds_total: float = 0.0
+
+    def to_dict(self) -> Dict:
+        lookups = self.hits + self.coalesced + self.remote_calls
+        avg_remote = self.remote_seconds_total / self.remote_calls if self.remote_calls else 0.0
+        return {
+            "hits": self.hits,
+            "remote_calls": self.remote_calls,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "avg_remote_ms": round(avg_remote * 1000, 1),
+            "saved_seconds": round((self.hits + self.coalesced) * avg_remote, 2),
+        }
+
+
+class ToolResultCache:
+    """Memoização (LRU + TTL) e single-flight das chamadas de ferramentas MCP"""
+
+    def __init__(
+        self,
+        tool_ttls: Dict[str, int],
+        default_ttl_seconds: int = 0,
+        max_entries: int = 1000,
+        enabled: bool = True
+    ):
+        self.tool_ttls = tool_ttls
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self.entries: "OrderedDict[CacheKey, Tuple[float, ToolResult]]" = OrderedDict()
+        self.inflight: Dict[CacheKey, InflightCall] = {}
+        self.stats: Dict[str, ToolCallStats] = {}
+        self.evictions = 0
+        self.prefetched: Set[CacheKey] = set()
+        self.prefetch_hits = 0
+
+    def ttl_for(self, tool_name: str) -> int:
+        return self.tool_ttls.get(tool_name, self.default_ttl_seconds)
+
+    def get(self, server: str, tool_name: str, args: Dict[str, Any]) -> Optional[ToolResult]:
+        """Resultado armazenado e válido (ou None), sem chamada remota"""
+        key = (server, tool_name, canonical_args(args))
+        cached = self.entries.get(key)
+        if cached is None:
+            return None
+        expires_at, result = cached
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return result.model_copy()
+
+    def _store(self, key: CacheKey, result: ToolResult, ttl: int) -> None:
+        self.entries[key] = (time.monotonic() + ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        if len(self.prefetched) > self.max_entries:
+            # Pré-buscas nunca usadas que já saíram do cache
+            self.prefetched &= self.entries.keys() | self.inflight.keys()
+
+    async def call(
+        self,
+        server: str,
+        tool_name: str,
+        args: Dict[str, Any],
+        remote: Callable[[], Any],
+        prefetch: bool = False,
+        active_calls: Optional[Set[asyncio.Task]] = None
+    ) -> Any:
+        """
+        Retorna o resultado em cache ou executa a chamada remota
+
+        Args:
+            server: Nome do servidor MCP
+            tool_name: Nome da ferramenta
+            args: Argumentos enviados pelo modelo
+            remote: Coroutine factory que chama o servidor MCP
+            prefetch: Chamada antecipada (não pedida pelo modelo)
+            active_calls: Chamadas em andamento na sessão MCP usada por
+                remote; a chamada compartilhada fica aqui até terminar
+        """
+        ttl = self.ttl_for(tool_name)
+        if not self.enabled or ttl <= 0:
+            return await remote()
+
+        stats = self.stats.setdefault(f"{server}.{tool_name}", ToolCallStats())
+        key = (server, tool_name, canonical_args(args))
+
+        cached = self.get(server, tool_name, args)
+        if cached is not None:
+            if prefetch:
+                return cached
+            stats.hits += 1
+            self._count_prefetch_use(key)
+            logger.info(f"🗃️  Ferramenta {tool_name}: resultado em cache")
+            return cached
+
+        # Chamada idêntica em andamento → aguardar o mesmo resultado
+        pending = self.inflight.get(key)
+        if pending is not None:
+            if prefetch:
+                return None
+            stats.coalesced += 1
+            self._count_prefetch_use(key)
+            result = await self._wait(key, pending)
+            return result.model_copy() if isinstance(result, ToolResult) else result
+
+        if prefetch:
+            self.prefetched.add(key)
+        call = InflightCall(asyncio.create_task(self._remote_call(key, stats, ttl, remote)))
+        self.inflight[key] = call
+        call.task.add_done_callback(lambda task: self._finish(key, call))
+        if active_calls is not None:
+            # Pode sobreviver a quem a iniciou: a sessão MCP segue ocupada
+            active_calls.add(call.task)
+            call.task.add_done_callback(active_calls.discard)
+        return await self._wait(key, call)
+
+    async def _remote_call(
+        self,
+        key: CacheKey,
+        stats: ToolCallStats,
+        ttl: int,
+        remote: Callable[[], Any]
+    ) -> Any:
+        """Chamada remota compartilhada (task própria) + armazenamento do resultado"""
+        started_at = time.monotonic()
+        try:
+            result = await remote()
+        except asyncio.CancelledError:
+            self.prefetched.discard(key)
+            raise
+        except Exception:
+            stats.errors += 1
+            self.prefetched.discard(key)
+            raise
+
+        stats.remote_calls += 1
+        stats.remote_seconds_total += time.monotonic() - started_at
+
+        if isinstance(result, ToolResult):
+            if result.content.startswith(ERROR_PREFIXES):
+                stats.errors += 1
+            else:
+                self._store(key, result, ttl)
+        return result
+
+    async def _wait(self, key: CacheKey, call: InflightCall) -> Any:
+        """Aguarda a chamada compartilhada; o cancelamento só a interrompe se ninguém mais aguarda"""
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Chamadas novas não devem se juntar a uma task cancelada
+                self._forget_inflight(key, call)
+                call.task.cancel()
+                # Só retorna quando a chamada parou de usar a sessão MCP
+                await asyncio.wait([call.task])
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget_inflight(self, key: CacheKey, call: InflightCall) -> None:
+        if self.inflight.get(key) is call:
+            del self.inflight[key]
+
+    def _finish(self, key: CacheKey, call: InflightCall) -> None:
+        self._forget_inflight(key, call)
+        if not call.task.cancelled():
+            # Evita "exception was never retrieved" quando ninguém aguardava
+            call.task.exception()
+
+    def _count_prefetch_use(self, key: CacheKey) -> None:
+        if key in self.prefetched:
+            self.prefetched.discard(key)
+            self.prefetch_hits += 1
+
+    def wrap(
+        self,
+        server: str,
+        tool_name: str,
+        entrypoint: Callable,
+        parameters: Optional[Dict[str, Any]] = None,
+        active_calls: Optional[Set[asyncio.Task]] = None
+    ) -> Callable:
+        """
+        Entrypoint do agno com memoização (mesma assinatura do original)
+
+        O entrypoint retornado aceita `_prefetch=True` para chamadas
+        antecipadas (ver prefetch.py). active_calls é o registro de
+        chamadas da sessão MCP usada pelo entrypoint.
+        """
+        defaults = schema_defaults(parameters)
+
+        async def call_tool(
+            _agno_run_context=None,
+            _agno_agent=None,
+            _agno_team=None,
+            _prefetch: bool = False,
+            **kwargs
+        ):
+            return await self.call(
+                server,
+                tool_name,
+                {**defaults, **kwargs},
+                prefetch=_prefetch,
+                active_calls=active_calls,
+                remote=lambda: entrypoint(
+                    _agno_run_context=_agno_run_context,
+                    _agno_agent=_agno_agent,
+                    _agno_team=_agno_team,
+                    **kwargs,
+                ),
+            )
+
+        return call_tool
+
+    def invalidate(self, server: Optional[str] = None) -> int:
+        """Remove os resultados de um servidor (ou todos)"""
+        keys = [key for key in self.entries if server is None or key[0] == server]
+        for key in keys:
+            del self.entries[key]
+        return len(keys)
+
+    def get_stats(self) -> Dict:
+        tools = {name: stats.to_dict() for name, stats in sorted(self.stats.items())}
+        hits = sum(s.hits + s.coalesced for s in self.stats.values())
+        remote = sum(s.remote_calls for s in self.stats.values())
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "inflight": len(self.inflight),
+            "default_ttl_seconds": self.default_ttl_seconds,
+            "tool_ttls": self.tool_ttls,
+            "hits": hits,
+            "remote_calls": remote,
+            "hit_rate": round(hits / (hits + remote), 3) if hits + remote else 0.0,
+            "saved_seconds": round(sum(t["saved_seconds"] for t in tools.values()), 2),
+            "prefetch_hits": self.prefetch_hits,
+            "tools": tools,
+        }
@@ -0,0 +1,110 @@
+"""
+Catálogo de ferramentas MCP
+
+Os conjuntos de ferramentas dos servidores MCP só mudam em deploy,
+então os schemas são descobertos uma vez (list_tools) e reutilizados
+por todas as conexões do pool, sem nova descoberta por conexão.
+
+Cada servidor tem uma versão (hash dos schemas). O catálogo é
+atualizado periodicamente e quando o servidor envia a notificação
+MCP tools/list_changed; se a versão mudar, as conexões reaplicam o
+catálogo ao serem emprestadas.
+"""
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from mcp.types import Tool
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_version(tools: List[Tool]) -> str:
+    """Hash estável dos schemas das ferramentas"""
+    schemas = sorted(
+        (tool.model_dump(mode="json", exclude_none=True) for tool in tools),
+        key=lambda schema: schema["name"]
+    )
+    raw = json.dumps(schemas, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class ServerCatalog:
+    """Schemas das ferramentas de um servidor MCP"""
+    name: str
+    tools: List[Tool]
+    version: str
+    refreshed_at: datetime
+    changed_at: datetime
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "refreshed_at": self.refreshed_at.isoformat(),
+            "changed_at": self.changed_at.isoformat(),
+            "tools": [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "input_schema": tool.inputSchema,
+                }
+                for tool in self.tools
+            ],
+        }
+
+
+class ToolCatalog:
+    """Catálogo versionado de ferramentas por servidor MCP"""
+
+    def __init__(self):
+        self.servers: Dict[str, ServerCatalog] = {}
+        self.refreshes = 0
+        self.changes = 0
+
+    def get(self, name: str) -> Optional[ServerCatalog]:
+        return self.servers.get(name)
+
+    def update(self, name: str, tools: List[Tool]) -> bool:
+        """
+        Atualiza o catálogo de um servidor
+
+        Returns:
+            True se a versão mudou (ou é a primeira carga)
+        """
+        now = datetime.now()
+        version = catalog_version(tools)
+        current = self.servers.get(name)
+        self.refreshes += 1
+
+        if current and current.version == version:
+            current.refreshed_at = now
+            return False
+
+        self.servers[name] = ServerCatalog(
+            name=name,
+            tools=list(tools),
+            version=version,
+            refreshed_at=now,
+            changed_at=now,
+        )
+
+        if current:
+            self.changes += 1
+            logger.info(
+                f"🔄 Catálogo MCP [{name}] mudou: {current.version} → {version} "
+                f"| Ferramentas: {len(tools)}"
+            )
+        else:
+            logger.info(f"📚 Catálogo MCP [{name}] carregado: {version} | Ferramentas: {len(tools)}")
+        return True
+
+    def get_status(self) -> Dict:
+        return {
+            "servers": {name: entry.to_dict() for name, entry in self.servers.items()},
+            "refreshes": self.refreshes,
+            "changes": self.changes,
+        }
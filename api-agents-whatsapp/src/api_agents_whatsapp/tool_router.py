@@ -0,0 +1,228 @@
+"""
+Roteador de ferramentas por mensagem
+
+Os schemas de todas as ferramentas MCP são reenviados em cada chamada
+ao LLM. O roteador escolhe, por palavras-chave, um de poucos perfis fixos:
+1. consulta → legislacao + noticias (perguntas sobre leis e notícias)
+2. completo → todos os grupos, quando a mensagem traz perfil
+   (autodescrição) ou opinião do usuário
+
+Os schemas fazem parte do prefixo que o provedor guarda em cache
+(prompts.py): cada combinação diferente de ferramentas é um prefixo
+novo. Por isso há só dois perfis, sempre na mesma ordem (por nome),
+em vez de um subconjunto exato por intenção.
+
+Ferramentas fora dos grupos (ex: novas após deploy) são sempre incluídas.
+Mensagens longas (várias intenções) ou roteador desabilitado usam o
+conjunto completo.
+"""
+import json
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Union
+
+from agno.tools.function import Function
+from agno.tools.mcp import MCPTools
+
+logger = logging.getLogger(__name__)
+
+
+TOOL_GROUPS: Dict[str, List[str]] = {
+    "legislacao": [
+        "buscar_projetos_recentes",
+        "buscar_projetos_mais_votados",
+        "obter_detalhes_projeto",
+        "pesquisar_legislacoes_internet",
+    ],
+    "noticias": [
+        "buscar_noticias_tema",
+        "buscar_noticias_relacionadas",
+    ],
+    "perfil": [
+        "obter_ou_criar_usuario",
+        "atualizar_perfil_usuario",
+        "listar_topicos_interesse",
+        "obter_preferencia_audio",
+    ],
+    "opiniao": [
+        "obter_ou_criar_usuario",
+        "registrar_opiniao",
+    ],
+}
+
+# Perfil → grupos expostos ao LLM
+TOOL_PROFILES: Dict[str, List[str]] = {
+    "consulta": ["legislacao", "noticias"],
+    "completo": list(TOOL_GROUPS),
+}
+
+# Intenções que precisam de ferramentas fora do perfil de consulta
+FULL_PROFILE_INTENTS = {"perfil", "opiniao"}
+
+# Marcadores normalizados (minúsculas, sem acentos, números removidos)
+INTENT_MARKERS: Dict[str, List[str]] = {
+    "noticias": [
+        "noticia", "jornal", "imprensa", "midia", "manchete", "novidade",
+        "aconteceu", "repercussao", "ultimas", "saiu na", "falando sobre",
+    ],
+    "perfil": [
+        "meu nome", "me chamo", "tenho anos", "moro em", "eu moro", "sou de",
+        "eu sou", "trabalho como", "trabalho com", "minha profissao",
+        "prefiro audio", "prefiro texto", "prefiro receber", "quero receber",
+        "me interesso", "tenho interesse", "meus temas", "meu perfil",
+    ],
+    "opiniao": [
+        "eu acho", "acho que", "na minha opiniao", "eu penso", "penso que",
+        "sou contra", "sou a favor", "concordo", "discordo", "eu gosto",
+        "nao gosto", "eu apoio", "nao apoio", "absurdo", "vergonha",
+        "injusto", "injustica", "revoltante", "deveria", "nao deveria",
+    ],
+}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e sem números"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(w for w in text.split() if not w.isdigit())
+
+
+def estimate_schema_tokens(function: Function) -> int:
+    """Estimativa (~4 caracteres/token) do schema enviado ao LLM"""
+    schema = {
+        "name": function.name,
+        "description": function.description,
+        "parameters": function.parameters,
+    }
+    return len(json.dumps(schema, ensure_ascii=False)) // 4
+
+
+@dataclass
+class ToolSelection:
+    """Ferramentas escolhidas para uma mensagem"""
+    tools: List[Union[MCPTools, Function]]
+    profile: str = "completo"
+    intents: List[str] = field(default_factory=list)
+    selected: int = 0
+    available: int = 0
+    saved_tokens: int = 0
+    fallback: bool = False
+
+
+class ToolRouter:
+    """Seleção local (palavras-chave) do subconjunto de ferramentas"""
+
+    def __init__(self, enabled: bool = True, max_message_chars: int = 600):
+        self.enabled = enabled
+        self.max_message_chars = max_message_chars
+        self.grouped_tools: Set[str] = {name for names in TOOL_GROUPS.values() for name in names}
+        self.requests = 0
+        self.fallbacks = 0
+        self.intent_counts: Dict[str, int] = {intent: 0 for intent in INTENT_MARKERS}
+        self.profile_counts: Dict[str, int] = {profile: 0 for profile in TOOL_PROFILES}
+        self.selected_total = 0
+        self.available_total = 0
+        self.saved_tokens_total = 0
+
+    def detect_intents(self, message: str) -> List[str]:
+        """Intenções opcionais presentes na mensagem"""
+        normalized = normalize(message)
+        return [
+            intent for intent, markers in INTENT_MARKERS.items()
+            if any(marker in normalized for marker in markers)
+        ]
+
+    def select(self, message: str, toolkits: List[MCPTools]) -> ToolSelection:
+        """
+        Escolhe as ferramentas para a mensagem
+
+        Args:
+            message: Mensagem do usuário
+            toolkits: Conexões MCP emprestadas (conjunto completo)
+
+        Returns:
+            Seleção com as ferramentas e métricas
+        """
+        # Ordem estável: o mesmo perfil gera sempre o mesmo prefixo
+        functions = sorted(
+            (f for toolkit in toolkits for f in toolkit.functions.values()),
+            key=lambda f: f.name,
+        )
+        self.requests += 1
+        self.available_total += len(functions)
+
+        if not self.enabled or not functions or len(message) > self.max_message_chars:
+            return self._fallback(toolkits, functions)
+
+        intents = self.detect_intents(message)
+        for intent in intents:
+            self.intent_counts[intent] += 1
+
+        profile = "completo" if FULL_PROFILE_INTENTS & set(intents) else "consulta"
+        if profile == "completo":
+            return self._fallback(toolkits, functions, intents)
+
+        allowed = {name for group in TOOL_PROFILES[profile] for name in TOOL_GROUPS[group]}
+        selected = [
+            f for f in functions
+            if f.name in allowed or f.name not in self.grouped_tools
+        ]
+
+        if not selected:
+            return self._fallback(toolkits, functions, intents)
+
+        selected_names = {f.name for f in selected}
+        saved_tokens = sum(
+            estimate_schema_tokens(f) for f in functions if f.name not in selected_names
+        )
+        self.selected_total += len(selected)
+        self.saved_tokens_total += saved_tokens
+        self.profile_counts[profile] += 1
+
+        logger.info(
+            f"🧭 Ferramentas: {len(selected)}/{len(functions)} (perfil {profile}) "
+            f"| Intenções: {', '.join(intents) or '-'} | ~{saved_tokens} tokens economizados"
+        )
+        return ToolSelection(
+            tools=selected,
+            profile=profile,
+            intents=intents,
+            selected=len(selected),
+            available=len(functions),
+            saved_tokens=saved_tokens,
+        )
+
+    def _fallback(
+        self,
+        toolkits: List[MCPTools],
+        functions: List[Function],
+        intents: Optional[List[str]] = None
+    ) -> ToolSelection:
+        """Perfil completo, na mesma ordem estável (por nome)"""
+        if intents is None:
+            self.fallbacks += 1
+        self.profile_counts["completo"] += 1
+        self.selected_total += len(functions)
+        return ToolSelection(
+            tools=list(functions) if functions else list(toolkits),
+            intents=intents or [],
+            selected=len(functions),
+            available=len(functions),
+            fallback=intents is None,
+        )
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "fallbacks": self.fallbacks,
+            "intents": self.intent_counts,
+            "profiles": self.profile_counts,
+            "avg_tools_selected": round(self.selected_total / self.requests, 2) if self.requests else 0.0,
+            "avg_tools_available": round(self.available_total / self.requests, 2) if self.requests else 0.0,
+            "saved_tokens_total": self.saved_tokens_total,
+            "avg_saved_tokens": round(self.saved_tokens_total / self.requests, 1) if self.requests else 0.0,
+        }
@@ -0,0 +1,180 @@
+"""
+Cotas de tokens por usuário
+
+O agendador divide o orçamento do modelo entre usuários em round-robin,
+mas um usuário mandando mensagens longas sem parar ainda consome uma
+fatia grande dos tokens por minuto. Cada user_id tem o uso contabilizado
+(tokens reais do provedor) em janelas deslizantes (minuto e hora):
+1. Abaixo de USER_QUOTA_SOFT_RATIO do limite → atendimento normal
+2. Entre a faixa suave e o limite → degradação: respostas curtas,
+   modelo rápido e sem execução de contingência
+3. Limite atingido → recusa (429) até a janela liberar
+
+Fast-path e cache semântico não consomem cota.
+"""
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaLevel(str, Enum):
+    """Situação do usuário em relação à cota"""
+    NORMAL = "normal"
+    SOFT = "soft"
+    HARD = "hard"
+
+
+class UserQuotaExceeded(Exception):
+    """Usuário atingiu o limite de tokens de uma janela"""
+
+    def __init__(self, message: str, retry_after_seconds: float):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass
+class QuotaDecision:
+    """Resultado da verificação de cota de uma mensagem"""
+    level: QuotaLevel
+    usage_ratio: float
+
+    @property
+    def degraded(self) -> bool:
+        return self.level == QuotaLevel.SOFT
+
+
+class UserQuotas:
+    """Uso de tokens por usuário em janelas deslizantes com limites suave e rígido"""
+
+    def __init__(
+        self,
+        limits: Dict[int, int],
+        soft_ratio: float = 0.7,
+        max_users: int = 10000,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            limits: Segundos da janela → tokens permitidos (0 = sem limite)
+            soft_ratio: Fração do limite a partir da qual o atendimento é degradado
+            max_users: Usuários acompanhados (os inativos há mais tempo saem primeiro)
+            enabled: Liga/desliga a verificação (o uso continua contabilizado)
+        """
+        self.limits = {window: limit for window, limit in sorted(limits.items()) if limit > 0}
+        self.soft_ratio = soft_ratio
+        self.max_users = max_users
+        self.enabled = enabled
+        self.horizon = max(self.limits) if self.limits else 0
+
+        # user_id → [(instante, tokens)], do mais antigo ao mais recente
+        self.usage: "OrderedDict[str, Deque[Tuple[float, int]]]" = OrderedDict()
+        self.checks = 0
+        self.degraded = 0
+        self.refused = 0
+
+    def _entries(self, user_id: str, now: float) -> Deque[Tuple[float, int]]:
+        entries = self.usage.get(user_id)
+        if entries is None:
+            return deque()
+        while entries and entries[0][0] <= now - self.horizon:
+            entries.popleft()
+        return entries
+
+    def tokens(self, user_id: str, window: int, now: float) -> int:
+        return sum(tokens for at, tokens in self._entries(user_id, now) if at > now - window)
+
+    def _retry_after(self, user_id: str, window: int, limit: int, now: float) -> float:
+        """Segundos até o uso na janela voltar para baixo do limite"""
+        used = self.tokens(user_id, window, now)
+        for at, tokens in self._entries(user_id, now):
+            if at <= now - window:
+                continue
+            used -= tokens
+            if used < limit:
+                return max(at + window - now, 1.0)
+        return float(window)
+
+    def check(self, user_id: str) -> QuotaDecision:
+        """
+        Verifica a cota antes de chamar o LLM
+
+        Raises:
+            UserQuotaExceeded: Se alguma janela atingiu o limite
+        """
+        if not self.enabled or not self.limits:
+            return QuotaDecision(QuotaLevel.NORMAL, 0.0)
+
+        self.checks += 1
+        now = time.monotonic()
+        ratios = {window: self.tokens(user_id, window, now) / limit for window, limit in self.limits.items()}
+        window, ratio = max(ratios.items(), key=lambda item: item[1])
+
+        if ratio >= 1.0:
+            self.refused += 1
+            retry_after = self._retry_after(user_id, window, self.limits[window], now)
+            logger.warning(
+                f"🚫 Cota de tokens esgotada para {user_id} "
+                f"(janela {window}s, {ratio:.0%}) | Liberação em {retry_after:.0f}s"
+            )
+            raise UserQuotaExceeded(
+                f"Limite de uso atingido para {user_id} na janela de {window}s",
+                retry_after_seconds=retry_after,
+            )
+
+        if ratio >= self.soft_ratio:
+            self.degraded += 1
+            logger.info(f"🐢 Cota de {user_id} em {ratio:.0%} (janela {window}s): atendimento reduzido")
+            return QuotaDecision(QuotaLevel.SOFT, ratio)
+
+        return QuotaDecision(QuotaLevel.NORMAL, ratio)
+
+    def record(self, user_id: str, tokens: int) -> None:
+        """Contabiliza os tokens usados por uma execução do usuário"""
+        if tokens <= 0 or not self.horizon:
+            return
+        entries = self.usage.pop(user_id, None) or deque()
+        entries.append((time.monotonic(), tokens))
+        # Mais recente no fim: os primeiros são os inativos há mais tempo
+        self.usage[user_id] = entries
+        while len(self.usage) > self.max_users:
+            self.usage.popitem(last=False)
+
+    def top_consumers(self, limit: int = 10) -> List[Dict]:
+        """Usuários com mais tokens na maior janela"""
+        now = time.monotonic()
+        consumers = []
+        for user_id in list(self.usage):
+            by_window = {window: self.tokens(user_id, window, now) for window in self.limits}
+            if not any(by_window.values()):
+                del self.usage[user_id]
+                continue
+            ratio = max(by_window[window] / limit for window, limit in self.limits.items())
+            consumers.append({
+                "user_id": user_id,
+                "tokens": {f"{window}s": tokens for window, tokens in by_window.items()},
+                "usage_ratio": round(ratio, 3),
+                "level": (
+                    QuotaLevel.HARD if ratio >= 1.0
+                    else QuotaLevel.SOFT if ratio >= self.soft_ratio
+                    else QuotaLevel.NORMAL
+                ).value,
+            })
+        consumers.sort(key=lambda item: max(item["tokens"].values()), reverse=True)
+        return consumers[:limit]
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "limits": {f"{window}s": limit for window, limit in self.limits.items()},
+            "soft_ratio": self.soft_ratio,
+            "users_tracked": len(self.usage),
+            "checks": self.checks,
+            "degraded": self.degraded,
+            "refused": self.refused,
+            "top_consumers": self.top_consumers(),
+        }
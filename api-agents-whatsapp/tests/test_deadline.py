@@ -0,0 +1,51 @@
+"""Testes da execução de contingência (hedging)"""
+import asyncio
+
+import pytest
+
+from api_agents_whatsapp.agent_pool import AgentPool, AgentPoolExhausted
+from api_agents_whatsapp.deadline import HedgedRunner, HedgeUnavailable
+
+
+@pytest.mark.asyncio
+async def test_lease_without_wait_fails_fast_when_pool_is_busy():
+    pool = AgentPool(size=0, model_id="modelo-rapido")
+
+    with pytest.raises(AgentPoolExhausted):
+        async with pool.lease([], wait=False):
+            pass
+    assert pool.get_status()["exhausted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_is_skipped_without_idle_agent():
+    runner = HedgedRunner(hedge_after_seconds=0.01)
+
+    async def primary():
+        await asyncio.sleep(0.05)
+        return "principal"
+
+    async def hedge():
+        raise HedgeUnavailable("Nenhum agente livre")
+
+    outcome = await runner.run(primary, hedge)
+
+    assert outcome.output == "principal" and outcome.winner == "primary"
+    assert not outcome.hedged
+    assert runner.get_status()["skipped"] == 1
+    assert runner.get_status()["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_primary_error_is_raised_when_fallback_is_skipped():
+    runner = HedgedRunner(hedge_after_seconds=1.0)
+
+    async def primary():
+        raise RuntimeError("falha do provedor")
+
+    async def hedge():
+        raise HedgeUnavailable("Nenhum agente livre")
+
+    with pytest.raises(RuntimeError, match="falha do provedor"):
+        await runner.run(primary, hedge)
+    assert runner.get_status()["skipped"] == 1
@@ -0,0 +1,90 @@
+"""Testes do fast-path (respostas locais sem LLM)"""
+import pytest
+
+from api_agents_whatsapp.fast_path import FastPathCategory, FastPathResponder
+from api_agents_whatsapp.models import AgentRequest
+from api_agents_whatsapp.session_memory import SessionMemory
+
+
+@pytest.fixture
+def responder():
+    return FastPathResponder()
+
+
+@pytest.mark.parametrize("message", [
+    "oi boa noite, como funciona o auxílio gás",
+    "obrigado, mas e a escala 6x1?",
+    "bom dia! e o vale transporte?",
+    "valeu, e sobre o salário mínimo?",
+    "oi, quero saber do leite",
+])
+def test_greeting_or_thanks_with_a_question_goes_to_agent(responder, message):
+    assert responder.classify(message).category is None
+
+
+@pytest.mark.parametrize("message, category", [
+    ("oi boa noite, tudo bem?", FastPathCategory.GREETING),
+    ("oi estou aqui", FastPathCategory.GREETING),
+    ("obrigado pela ajuda", FastPathCategory.THANKS),
+    ("obrigadoo", FastPathCategory.THANKS),
+    ("tenho que ir tchau", FastPathCategory.FAREWELL),
+    ("👍🙏", FastPathCategory.EMOJI),
+])
+def test_social_messages_are_answered_locally(responder, message, category):
+    assert responder.classify(message).category == category
+
+
+@pytest.mark.parametrize("message", [
+    "vai chover amanha",
+    "me conta uma piada",
+    "me indica um filme sobre planetas",  # "planetas" não é "pl"
+])
+def test_off_topic(responder, message):
+    assert responder.classify(message).category == FastPathCategory.OFF_TOPIC
+
+
+@pytest.mark.parametrize("message", [
+    "a deputada votou contra?",
+    "o que é a PEC 45",
+    "sou a favor da aposentadoria especial",
+])
+def test_legislative_markers_match_whole_words_or_stems(responder, message):
+    result = responder.classify(message)
+    assert result.category is None and result.source == "regras"
+
+
+@pytest.mark.parametrize("message", [
+    "o que acham de legalizar o jogo do bicho?",
+    "vão proibir as apostas de futebol?",
+    "e a regulamentação das bets?",
+    "quem ganhou a loteria vai pagar menos?",
+])
+def test_gambling_and_football_topics_go_to_agent(responder, message):
+    assert responder.classify(message).category is None
+
+
+@pytest.mark.parametrize("message", ["beleza", "perfeito", "show", "top", "tudo bem", "👍", "obrigado"])
+def test_reply_after_assistant_turn_goes_to_agent(responder, message):
+    result = responder.classify(message, in_conversation=True)
+
+    assert result.category is None
+    assert result.source == "conversa"
+
+
+def test_try_respond_counts_conversation_fall_through(responder):
+    request = AgentRequest(user_message="perfeito", user_id="5511", session_id="sess_1")
+
+    assert responder.try_respond(request, in_conversation=True) is None
+    assert responder.try_respond(request) is not None
+    assert responder.get_status()["fall_through_in_conversation"] == 1
+
+
+def test_session_memory_recent_reply_window():
+    memory = SessionMemory()
+    request = AgentRequest(user_message="quais projetos de saúde?", user_id="5511", session_id="sess_1")
+
+    assert not memory.has_recent_reply(request, within_seconds=900)
+
+    memory.record(request, "Encontrei 3 projetos. Quer que eu detalhe algum?")
+    assert memory.has_recent_reply(request, within_seconds=900)
+    assert not memory.has_recent_reply(request, within_seconds=-1)
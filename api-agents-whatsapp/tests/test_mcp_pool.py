@@ -0,0 +1,103 @@
+"""Testes do pool de conexões MCP (sem servidor: conexões falsas na fila)"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from api_agents_whatsapp.mcp_pool import MCPPoolManager, PooledConnection
+
+
+def make_conn(pool, initialized=True):
+    """Conexão sem servidor: tools falso com o registro de chamadas compartilhadas"""
+    conn = PooledConnection(pool.name, pool.url, pool.catalog)
+    if initialized:
+        conn.tools = SimpleNamespace(initialized=True, active_calls=set())
+    return conn
+
+
+def make_manager(idle_by_pool):
+    manager = MCPPoolManager()
+    for name, pool in manager.pools.items():
+        for _ in range(idle_by_pool.get(name, 0)):
+            pool.idle.put_nowait(make_conn(pool))
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_lease_all_releases_connections():
+    manager = make_manager({"projetos_lei": 1, "users": 1})
+
+    async with manager.lease_all():
+        assert all(pool.idle.qsize() == 0 for pool in manager.pools.values())
+
+    assert all(pool.idle.qsize() == 1 for pool in manager.pools.values())
+
+
+@pytest.mark.asyncio
+async def test_lease_all_cancelled_while_waiting_returns_acquired_connections():
+    # projetos_lei empresta na hora; users não tem conexão livre e fica esperando
+    manager = make_manager({"projetos_lei": 1})
+
+    async def lease():
+        async with manager.lease_all():
+            pytest.fail("lease_all não deveria concluir sem conexão de users")
+
+    task = asyncio.create_task(lease())
+    await asyncio.sleep(0.05)
+    assert manager.pools["projetos_lei"].idle.qsize() == 0
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert manager.pools["projetos_lei"].idle.qsize() == 1
+    assert manager.pools["users"].idle.qsize() == 0
+
+
+@pytest.mark.asyncio
+async def test_lease_all_cancelled_while_reconnecting_returns_connection():
+    manager = make_manager({"projetos_lei": 1, "users": 1})
+    reconnecting = asyncio.Event()
+
+    async def slow_reconnect(conn):
+        reconnecting.set()
+        await asyncio.sleep(10)
+
+    users = manager.pools["users"]
+    users.idle.get_nowait()
+    users.idle.put_nowait(make_conn(users, initialized=False))
+    users._reconnect = slow_reconnect
+
+    async def lease():
+        async with manager.lease_all():
+            pass
+
+    task = asyncio.create_task(lease())
+    await reconnecting.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert all(pool.idle.qsize() == 1 for pool in manager.pools.values())
+
+
+@pytest.mark.asyncio
+async def test_release_waits_for_shared_call_on_the_session():
+    manager = make_manager({"projetos_lei": 1})
+    pool = manager.pools["projetos_lei"]
+    conn = await pool.acquire()
+    finish = asyncio.Event()
+    shared = asyncio.create_task(finish.wait())
+    conn.tools.active_calls.add(shared)
+
+    pool.release(conn)
+    await asyncio.sleep(0)
+    assert pool.idle.qsize() == 0
+    assert pool.get_status()["deferred_releases"] == 1
+
+    finish.set()
+    await shared
+    await asyncio.sleep(0)
+    assert pool.idle.qsize() == 1
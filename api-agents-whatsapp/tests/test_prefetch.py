@@ -0,0 +1,102 @@
+"""Testes da pré-busca: nada usa a sessão MCP depois que ela volta ao pool"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from agno.tools.function import ToolResult
+
+from api_agents_whatsapp.mcp_pool import MCPPoolManager, PooledConnection
+from api_agents_whatsapp.models import AgentRequest
+from api_agents_whatsapp.prefetch import PREFETCH_TOOL, ToolPrefetcher
+from api_agents_whatsapp.tool_cache import ToolResultCache
+
+
+@pytest.mark.asyncio
+async def test_cancel_waits_for_pending_mcp_calls():
+    cache = ToolResultCache(tool_ttls={PREFETCH_TOOL: 300})
+    running = set()
+    started = asyncio.Event()
+
+    async def remote(tema):
+        running.add(tema)
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        finally:
+            # Simula a limpeza da sessão MCP ao interromper a chamada
+            await asyncio.sleep(0.01)
+            running.discard(tema)
+
+    async def entrypoint(_prefetch=False, **args):
+        return await cache.call("projetos_lei", PREFETCH_TOOL, args, lambda: remote(args["tema"]), prefetch=_prefetch)
+
+    prefetcher = ToolPrefetcher(cache)
+    request = AgentRequest(
+        user_message="quais as novidades?",
+        user_id="5585999999999@c.us",
+        session_id="sess",
+        user_preferences={"topics": ["saúde", "educação"]},
+    )
+    handle = prefetcher.start(request, [SimpleNamespace(name=PREFETCH_TOOL, entrypoint=entrypoint)])
+    await started.wait()
+    await asyncio.sleep(0)
+    assert running == {"saúde", "educação"}
+
+    await handle.cancel()
+
+    assert not running
+    assert all(task.done() for task in handle.tasks)
+    assert prefetcher.get_status()["cancelled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesced_call_keeps_initiator_connection_out_of_the_pool():
+    # A pré-busca inicia a chamada na sessão da requisição A; a requisição B se junta a ela
+    manager = MCPPoolManager()
+    pool = manager.pools["projetos_lei"]
+    conn = PooledConnection(pool.name, pool.url, pool.catalog)
+    conn.tools = SimpleNamespace(initialized=True, active_calls=set())
+    pool.idle.put_nowait(conn)
+    cache = manager.tool_cache
+    cache.tool_ttls[PREFETCH_TOOL] = 300
+
+    started, finish = asyncio.Event(), asyncio.Event()
+    session_calls = []
+
+    async def mcp_entrypoint(**args):
+        session_calls.append(args["tema"])
+        started.set()
+        await finish.wait()
+        return ToolResult(content="projetos de saúde")
+
+    leased = await pool.acquire()
+    entrypoint = cache.wrap("projetos_lei", PREFETCH_TOOL, mcp_entrypoint, active_calls=leased.tools.active_calls)
+    request = AgentRequest(
+        user_message="quais as novidades?",
+        user_id="5585999999999@c.us",
+        session_id="sess",
+        user_preferences={"topics": ["saúde"]},
+    )
+    handle = ToolPrefetcher(cache).start(request, [SimpleNamespace(name=PREFETCH_TOOL, entrypoint=entrypoint)])
+    await started.wait()
+
+    other_request = asyncio.create_task(
+        cache.call("projetos_lei", PREFETCH_TOOL, {"tema": "saúde"}, lambda: pytest.fail("não deveria chamar"))
+    )
+    await asyncio.sleep(0)
+
+    # Fim da requisição A: pré-busca cancelada e conexão devolvida
+    await handle.cancel()
+    pool.release(leased)
+    await asyncio.sleep(0)
+
+    assert not other_request.done()
+    assert pool.idle.qsize() == 0  # a sessão ainda é usada pela chamada compartilhada
+
+    finish.set()
+    result = await other_request
+    await asyncio.sleep(0)
+
+    assert result.content == "projetos de saúde"
+    assert session_calls == ["saúde"]
+    assert pool.idle.qsize() == 1
@@ -0,0 +1,82 @@
+"""Testes do agendador do LLM (fila justa, vagas e cancelamento)"""
+import asyncio
+
+import pytest
+
+from api_agents_whatsapp.scheduler import RateLimitScheduler
+
+
+async def hold_slot(scheduler, user_id, entered, release):
+    async with scheduler.slot(user_id, estimated_tokens=100):
+        entered.set()
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_queued_ticket_cancelled_while_holder_releases():
+    # O prazo da requisição cancela a espera; a vaga é liberada antes da limpeza do slot
+    scheduler = RateLimitScheduler(max_concurrent=1)
+
+    async with scheduler.slot("5511", estimated_tokens=100):
+        waiter = asyncio.create_task(hold_slot(scheduler, "5521", asyncio.Event(), asyncio.Event()))
+        await asyncio.sleep(0)
+        scheduler.queues["5521"][0].future.cancel()
+    # Saída do contexto libera a vaga já com o ticket cancelado na fila
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+
+    # A vaga não vazou: uma nova execução começa na hora
+    next_entered = asyncio.Event()
+    next_release = asyncio.Event()
+    follower = asyncio.create_task(hold_slot(scheduler, "5531", next_entered, next_release))
+    await asyncio.wait_for(next_entered.wait(), timeout=1)
+    next_release.set()
+    await follower
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_never_exhaust_concurrency():
+    scheduler = RateLimitScheduler(max_concurrent=2)
+
+    for _ in range(5):
+        entered, release = asyncio.Event(), asyncio.Event()
+        holders = [
+            asyncio.create_task(hold_slot(scheduler, f"h{i}", entered, release))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold_slot(scheduler, "fila", asyncio.Event(), asyncio.Event()))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*holders)
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_users():
+    scheduler = RateLimitScheduler(max_concurrent=1)
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold_slot(scheduler, "bloqueio", entered, release))
+    await entered.wait()
+
+    order = []
+
+    async def run(user_id):
+        async with scheduler.slot(user_id, estimated_tokens=10):
+            order.append(user_id)
+
+    tasks = [asyncio.create_task(run(u)) for u in ["lote", "lote", "lote", "outro"]]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+    assert order == ["lote", "outro", "lote", "lote"]
@@ -0,0 +1,61 @@
+"""Testes do cache semântico (quase-iguais não podem reaproveitar a resposta)"""
+import pytest
+
+from api_agents_whatsapp.semantic_cache import SemanticAnswerCache
+from api_agents_whatsapp.text_vectors import HashingVectorizer
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(HashingVectorizer(), max_entries=16)
+
+
+def store(cache, message, topics=None, mode="text"):
+    cache.set(
+        message,
+        mode,
+        response_text=f"resposta: {message}",
+        auxiliary_text="",
+        should_send_audio=False,
+        latency_seconds=2.0,
+        topics=topics,
+    )
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("o que diz o projeto que quer proibir celular nas escolas",
+     "o que diz o projeto que quer liberar celular nas escolas"),
+    ("como votou o deputado fulano na reforma",
+     "como votou o deputado ciclano na reforma"),
+    ("quais as regras da aposentadoria rural",
+     "quais as regras da aposentadoria especial"),
+    ("o que é a PEC 45?", "o que é a PEC 46?"),
+])
+def test_near_miss_is_not_a_hit(cache, cached, asked):
+    store(cache, cached)
+    assert cache.get(asked, "text") is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("quais projetos sobre educação?", "quais são os projetos sobre educação"),
+    ("o que é a PEC 45?", "O que é a PEC 45"),
+    ("tem projeto sobre celulares nas escolas?", "tem projeto sobre celular nas escolas"),
+])
+def test_rephrased_question_is_a_hit(cache, cached, asked):
+    store(cache, cached)
+    entry = cache.get(asked, "text")
+    assert entry is not None and entry.message == cached
+
+
+def test_answers_are_scoped_by_topics_and_mode(cache):
+    store(cache, "quais as novidades do congresso", topics=["educação", "saúde"])
+
+    assert cache.get("quais as novidades do congresso", "text", topics=["meio ambiente"]) is None
+    assert cache.get("quais as novidades do congresso", "text") is None
+    assert cache.get("quais as novidades do congresso", "audio", topics=["Saúde", "educação"]) is None
+    assert cache.get("quais as novidades do congresso", "text", topics=["Saúde", "educação"]) is not None
+
+
+def test_threshold_grows_with_message_length(cache):
+    assert cache._threshold("text", "pec 45") == cache.thresholds["text"]
+    assert cache._threshold("text", " ".join(["palavra"] * 25)) == pytest.approx(0.97)
@@ -0,0 +1,75 @@
+"""Testes do AgentService sem LLM: memória de sessão e cache semântico"""
+from types import SimpleNamespace
+
+import pytest
+
+from api_agents_whatsapp.models import AgentRequest
+from api_agents_whatsapp.services import AgentService
+
+
+ANSWER = "A PEC 45 trata da reforma tributária e unifica impostos sobre consumo."
+
+
+def make_request(message, session_id="sess_1", recent_history=None):
+    return AgentRequest(
+        user_message=message,
+        user_id="5585999999999@c.us",
+        session_id=session_id,
+        recent_history=recent_history,
+    )
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AgentService()
+
+    async def fake_run_agent(request, prompt, quota, trace):
+        content = SimpleNamespace(response_text=ANSWER, auxiliary_text="", should_send_audio=False)
+        return SimpleNamespace(output=SimpleNamespace(content=content))
+
+    monkeypatch.setattr(service, "_run_agent", fake_run_agent)
+    return service
+
+
+def turns(service, session_id="sess_1"):
+    state = service.session_memory.sessions.get(session_id)
+    return [(t.user_message, t.agent_response) for t in state.turns] if state else []
+
+
+@pytest.mark.asyncio
+async def test_fast_path_reply_is_recorded_in_session_memory(service):
+    response, _ = service._local_response(make_request("oi"))
+
+    assert response is not None
+    assert turns(service) == [("oi", response.response_text)]
+
+    # A saudação perguntou o tema: "beleza" agora é resposta a ela e vai ao agente
+    response, _ = service._local_response(make_request("beleza"))
+    assert response is None
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_hit_is_recorded_in_session_memory(service):
+    service.semantic_cache.set("o que é a PEC 45?", "text", ANSWER, "", False, latency_seconds=2.0)
+
+    response, _ = service._local_response(make_request("o que é a PEC 45?"))
+
+    assert response.response_text == ANSWER
+    assert turns(service) == [("o que é a PEC 45?", ANSWER)]
+
+
+@pytest.mark.asyncio
+async def test_answer_without_session_history_is_cached(service):
+    await service.process_message(make_request("o que é a PEC 45?"))
+
+    assert service.semantic_cache.get("o que é a PEC 45?", "text") is not None
+
+
+@pytest.mark.asyncio
+async def test_answer_built_with_session_history_is_not_cached(service):
+    history = [{"user_message": "sou professora", "agent_response": "Anotado! Vou priorizar educação."}]
+
+    await service.process_message(make_request("o que é a PEC 45?", recent_history=history))
+
+    assert service.semantic_cache.get("o que é a PEC 45?", "text") is None
+    assert turns(service)[-1] == ("o que é a PEC 45?", ANSWER)
@@ -0,0 +1,123 @@
+"""Testes do cache de ferramentas MCP (single-flight e cancelamento)"""
+import asyncio
+
+import pytest
+from agno.tools.function import ToolResult
+
+from api_agents_whatsapp.tool_cache import ToolResultCache
+
+
+@pytest.fixture
+def cache():
+    return ToolResultCache(tool_ttls={"buscar_projetos_recentes": 300})
+
+
+class SlowRemote:
+    """Chamada remota que só termina quando release() é chamado"""
+
+    def __init__(self, content="projetos"):
+        self.content = content
+        self.calls = 0
+        self.cancelled = False
+        self.started = asyncio.Event()
+        self.done = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        try:
+            await self.done.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.content, Exception):
+            raise self.content
+        return ToolResult(content=self.content)
+
+    def release(self):
+        self.done.set()
+
+
+def call(cache, remote, **kwargs):
+    return asyncio.create_task(
+        cache.call("projetos_lei", "buscar_projetos_recentes", {"tema": "saúde"}, remote, **kwargs)
+    )
+
+
+@pytest.mark.asyncio
+async def test_cancelling_owner_does_not_cancel_coalesced_waiter(cache):
+    remote = SlowRemote()
+    owner = call(cache, remote)
+    await remote.started.wait()
+    waiter = call(cache, remote)
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    remote.release()
+
+    result = await waiter
+    assert result.content == "projetos"
+    assert remote.calls == 1 and not remote.cancelled
+    assert cache.get("projetos_lei", "buscar_projetos_recentes", {"tema": "saúde"}) is not None
+
+
+@pytest.mark.asyncio
+async def test_cancelling_only_caller_cancels_remote_call(cache):
+    remote = SlowRemote()
+    owner = call(cache, remote)
+    await remote.started.wait()
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    await asyncio.sleep(0)
+
+    assert remote.cancelled
+    assert not cache.inflight
+
+    # Nova chamada não herda a task cancelada
+    retry = SlowRemote()
+    task = call(cache, retry)
+    await retry.started.wait()
+    retry.release()
+    assert (await task).content == "projetos"
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_cached(cache):
+    remote = SlowRemote(content=RuntimeError("MCP indisponível"))
+    owner = call(cache, remote)
+    await remote.started.wait()
+    waiter = call(cache, remote)
+    await asyncio.sleep(0)
+    remote.release()
+
+    for task in (owner, waiter):
+        with pytest.raises(RuntimeError):
+            await task
+    assert not cache.entries and not cache.inflight
+    assert cache.stats["projetos_lei.buscar_projetos_recentes"].errors == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_call_stays_registered_on_the_session_until_done(cache):
+    remote = SlowRemote()
+    active_calls = set()
+    owner = call(cache, remote, active_calls=active_calls)
+    await remote.started.wait()
+    waiter = call(cache, remote)
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+
+    # Quem iniciou já saiu, mas a chamada segue usando a sessão dele
+    assert len(active_calls) == 1
+
+    remote.release()
+    await waiter
+    await asyncio.sleep(0)
+    assert not active_calls
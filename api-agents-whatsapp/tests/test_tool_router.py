@@ -0,0 +1,41 @@
+"""Testes do roteador de ferramentas (perfis fixos e ordem estável)"""
+from types import SimpleNamespace
+
+from agno.tools.function import Function
+
+from api_agents_whatsapp.tool_router import TOOL_GROUPS, ToolRouter
+
+
+def make_toolkits(reverse=False):
+    names = sorted({name for group in TOOL_GROUPS.values() for name in group} | {"ferramenta_nova"})
+    if reverse:
+        names.reverse()
+    functions = {name: Function(name=name, description=name) for name in names}
+    return [SimpleNamespace(functions=functions)]
+
+
+def names(selection):
+    return [f.name for f in selection.tools]
+
+
+def test_same_profile_gives_identical_tool_list_regardless_of_intent():
+    router = ToolRouter()
+    plain = router.select("quais projetos sobre educação?", make_toolkits())
+    news = router.select("saiu alguma notícia sobre educação?", make_toolkits(reverse=True))
+
+    assert plain.profile == news.profile == "consulta"
+    assert names(plain) == names(news) == sorted(names(plain))
+    assert "buscar_noticias_tema" in names(plain)
+    assert "ferramenta_nova" in names(plain)
+    assert "registrar_opiniao" not in names(plain)
+
+
+def test_opinion_and_fallback_share_the_full_profile():
+    router = ToolRouter(max_message_chars=50)
+    opinion = router.select("eu acho que a escala 6x1 deveria acabar", make_toolkits())
+    long_message = router.select("quais projetos " * 10, make_toolkits(reverse=True))
+
+    assert opinion.profile == long_message.profile == "completo"
+    assert not opinion.fallback and long_message.fallback
+    assert names(opinion) == names(long_message)
+    assert router.get_status()["profiles"] == {"consulta": 0, "completo": 2}
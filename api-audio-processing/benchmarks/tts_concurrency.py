@@ -0,0 +1,226 @@
+"""
+Benchmark: throughput do AudioService por nível de concorrência
+
+Sobe um servidor HTTP local que imita a OpenAI (TTS e Whisper) e o S3
+(head_bucket, put_object) com latência fixa, e dispara N requisições
+text_to_speech / speech_to_text com concorrência crescente. Sem
+chamadas bloqueantes, o throughput cresce com a concorrência até os
+limites dos pools (OPENAI_MAX_CONNECTIONS, S3_MAX_WORKERS).
+
+Relatório por nível: throughput, latência p50/p95 e o maior atraso do
+event loop (um relógio de 10ms rodando junto: chamadas síncronas no
+loop aparecem como atrasos da ordem da latência das chamadas; em
+concorrência alta parte do atraso vem das threads do servidor local,
+que rodam no mesmo processo).
+
+Por padrão cada requisição TTS tem um texto inédito (sempre síntese);
+--phrases N repete N frases para medir o cache TTS; com --s3-expire o
+S3 falso apaga os objetos após cada nível (lifecycle), e o áudio volta
+do disco sem nova síntese.
+
+Uso:
+    uv run python benchmarks/tts_concurrency.py
+    uv run python benchmarks/tts_concurrency.py --concurrency 1 4 16 64 --requests 128
+    uv run python benchmarks/tts_concurrency.py --operation stt --openai-latency 0.5
+    uv run python benchmarks/tts_concurrency.py --phrases 10
+    uv run python benchmarks/tts_concurrency.py --phrases 10 --s3-expire
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+
+AUDIO_BYTES = b"\xff\xf3" * 16 * 1024  # ~32KiB de "MP3"
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def fake_server(openai_latency: float, s3_latency: float) -> ThreadingHTTPServer:
+    """OpenAI (/v1/audio/*) e S3 (path-style, objetos em memória) com latência fixa"""
+    objects = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body=b"", content_type="application/octet-stream", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _drain(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_POST(self):
+            self._drain()
+            time.sleep(openai_latency)
+            if self.path.endswith("/audio/speech"):
+                self._reply(200, AUDIO_BYTES, "audio/mpeg")
+            elif self.path.endswith("/audio/transcriptions"):
+                body = json.dumps({"text": "olá, quais projetos sobre educação?"}).encode()
+                self._reply(200, body, "application/json")
+            else:
+                self._reply(404)
+
+        def do_PUT(self):
+            objects[self.path] = self._drain()
+            time.sleep(s3_latency)
+            self._reply(200, headers={"ETag": '"bench"'})
+
+        def do_GET(self):
+            time.sleep(s3_latency)
+            if self.path in objects:
+                self._reply(200, objects[self.path], "audio/mpeg")
+            else:
+                self._reply(404)
+
+        def do_HEAD(self):
+            time.sleep(s3_latency)
+            # Bucket (/nome) sempre existe; objetos só depois do PUT
+            exists = self.path.count("/") == 1 or self.path in objects
+            self._reply(200 if exists else 404)
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256  # Padrão 5: conexões novas em rajada seriam recusadas
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.objects = objects
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Maior atraso do event loop em relação ao intervalo do relógio"""
+    worst = 0.0
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started_at - interval)
+    return worst
+
+
+async def run_level(service, operation, total, concurrency, audio_path, phrases=0):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    run_id = uuid.uuid4().hex[:8]
+
+    async def one(index):
+        text = (
+            f"Resumo do projeto de lei número {index % phrases}."
+            if phrases
+            else f"Resumo do projeto de lei número {index} ({run_id})."
+        )
+        async with semaphore:
+            started_at = time.perf_counter()
+            if operation == "tts":
+                await service.text_to_speech(text, voice="nova")
+            else:
+                await service.speech_to_text(audio_path)
+            latencies.append(time.perf_counter() - started_at)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    wall_seconds = time.perf_counter() - started_at
+    stop.set()
+    return latencies, wall_seconds, await lag
+
+
+async def main_async(args):
+    server = fake_server(args.openai_latency, args.s3_latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["S3_ENDPOINT_URL"] = base_url
+    if args.s3_workers:
+        os.environ["S3_MAX_WORKERS"] = str(args.s3_workers)
+    if args.openai_connections:
+        os.environ["OPENAI_MAX_CONNECTIONS"] = str(args.openai_connections)
+
+    import logging
+    logging.disable(logging.INFO)
+    from api_audio_processing.config import settings
+    from api_audio_processing.services import AudioService
+
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
+        tmp.write(AUDIO_BYTES)
+    cache_dir = tempfile.mkdtemp(prefix="tts-cache-")
+    settings.cache_dir = Path(cache_dir)
+    service = AudioService()
+    print(
+        f"Operação: {args.operation} | Latência OpenAI {args.openai_latency * 1000:.0f}ms, "
+        f"S3 {args.s3_latency * 1000:.0f}ms | Pools: OpenAI {settings.openai_max_connections} "
+        f"conexões, S3 {settings.s3_max_workers} threads"
+    )
+    print(f"{'conc.':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'atraso loop ms':>15}")
+    try:
+        await run_level(service, args.operation, 4, 4, tmp.name)  # Aquecimento (conexões, credenciais)
+        for concurrency in args.concurrency:
+            total = max(args.requests, concurrency)
+            latencies, wall_seconds, lag = await run_level(
+                service, args.operation, total, concurrency, tmp.name, args.phrases
+            )
+            print(
+                f"{concurrency:>6} {total / wall_seconds:>8.1f} "
+                f"{statistics.median(latencies) * 1000:>9.1f} "
+                f"{percentile(latencies, 0.95) * 1000:>9.1f} {lag * 1000:>15.1f}"
+            )
+            if args.s3_expire:
+                # Objetos removidos do S3 e marcadores vencidos
+                server.objects.clear()
+                service.tts_markers.verified_at.clear()
+        if args.operation == "tts":
+            stats = service.get_tts_cache_stats()
+            print(
+                f"Cache TTS: confirmados={stats['verified_hits']} s3={stats['s3_hits']} "
+                f"disco={stats['disk_hits']} sínteses={stats['misses']} agrupadas={stats['coalesced']}"
+            )
+    finally:
+        await service.shutdown()
+        server.shutdown()
+        os.remove(tmp.name)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operation", choices=["tts", "stt"], default="tts")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=64, help="Requisições por nível")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Segundos por chamada à OpenAI")
+    parser.add_argument("--s3-latency", type=float, default=0.05, help="Segundos por put_object")
+    parser.add_argument("--phrases", type=int, default=0, help="Frases distintas repetidas (0 = todas inéditas)")
+    parser.add_argument("--s3-expire", action="store_true", help="Apaga os objetos do S3 falso após cada nível")
+    parser.add_argument("--s3-workers", type=int, help="Sobrescreve S3_MAX_WORKERS")
+    parser.add_argument("--openai-connections", type=int, help="Sobrescreve OPENAI_MAX_CONNECTIONS")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
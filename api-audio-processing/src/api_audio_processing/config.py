@@ -27,6 +27,10 @@ class Settings(BaseSettings):
     openai_tts_model: str = "tts-1"
     openai_tts_voice: str = "shimmer"
     openai_whisper_model: str = "whisper-1"
+    openai_timeout_seconds: float = 60.0
+    openai_max_retries: int = 2
+    openai_max_connections: int = 50  # Requisições simultâneas à OpenAI (TTS + Whisper)
+    openai_max_keepalive_connections: int = 20
 
     # AWS S3 / LocalStack
     aws_access_key_id: str = "test"
@@ -34,11 +38,19 @@ class Settings(BaseSettings):
     aws_region: str = "us-east-1"
     s3_endpoint_url: str = "http://localhost:4566"  # LocalStack
     s3_bucket_name: str = "audio-processing"
+    s3_max_workers: int = 16  # Threads (e conexões) dedicadas às chamadas do boto3
 
     # Cache / Temp
     temp_dir: Path = Path("./data/temp")
     cache_dir: Path = Path("./data/cache")
 
+    # Cache TTS endereçado por conteúdo (hash de texto, voz, velocidade e modelo)
+    tts_cache_enabled: bool = True
+    tts_cache_max_bytes: int = 512 * 1024 * 1024  # Áudios em disco (cache_dir/tts)
+    tts_cache_s3_prefix: str = "tts/cache"
+    tts_cache_verify_seconds: int = 3600  # Áudio confirmado no S3 dispensa head_object por esse tempo
+    tts_cache_max_markers: int = 100000  # Marcadores de presença em memória
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
@@ -2,6 +2,7 @@
 API de processamento de áudio - Text to Speech / Speech to Text
 """
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
 import tempfile
@@ -21,16 +22,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Inicializar serviço
+audio_service = AudioService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Fecha os clientes da OpenAI e do S3 no encerramento"""
+    yield
+    await audio_service.shutdown()
+
+
 # Inicializar FastAPI
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description="API para conversão de áudio bidirecional",
+    lifespan=lifespan,
 )
 
-# Inicializar serviço
-audio_service = AudioService()
-
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -111,6 +121,12 @@ async def speech_to_text(file: UploadFile = File(...)):
             os.remove(tmp_path)
 
 
+@app.get("/tts-cache", tags=["Health"])
+async def tts_cache_status():
+    """Cache TTS: acertos em disco e no S3, sínteses e ocupação do disco"""
+    return audio_service.get_tts_cache_stats()
+
+
 @app.get("/health", tags=["Health"])
 async def health():
     """Status da API"""
@@ -119,6 +135,7 @@ async def health():
         "s3_bucket": settings.s3_bucket_name,
         "openai_model_tts": settings.openai_tts_model,
         "openai_model_stt": settings.openai_whisper_model,
+        "pools": audio_service.get_stats(),
     }
 
 
@@ -18,6 +18,7 @@ class TextToSpeechResponse(BaseModel):
     duration_seconds: Optional[float] = None
     voice: str
     text_length: int
+    cache: Optional[str] = None  # verified, s3, disk (reenviado do disco) ou None (sintetizado agora)
 
 
 class SpeechToTextResponse(BaseModel):
@@ -1,17 +1,33 @@
 """
 Serviços para processamento de áudio
+
+Nenhuma chamada bloqueia o event loop do uvicorn:
+- OpenAI (TTS e Whisper) → cliente assíncrono (AsyncOpenAI) com pool de
+  conexões limitado (OPENAI_MAX_CONNECTIONS)
+- S3 → boto3 (síncrono) em um pool de threads dedicado (S3_MAX_WORKERS),
+  com o pool de conexões do botocore do mesmo tamanho
+
+Áudios TTS repetidos saem do cache endereçado por conteúdo (tts_cache):
+um S3 hit só confirma a existência (head_object), sem baixar o áudio.
 """
+import asyncio
+import functools
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
 from pathlib import Path
 import uuid
 from datetime import datetime
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from .config import settings
 from .models import TextToSpeechResponse, SpeechToTextResponse
+from .tts_cache import DiskLRUCache, PresenceMarkers, TTSCacheStats, tts_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +36,41 @@ class AudioService:
     """Serviço principal de processamento de áudio"""
 
     def __init__(self):
-        self.openai_client = OpenAI(api_key=settings.openai_api_key)
+        self.openai_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.openai_timeout_seconds,
+            max_retries=settings.openai_max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_keepalive_connections,
+                ),
+            ),
+        )
         self.s3_client = boto3.client(
             "s3",
             endpoint_url=settings.s3_endpoint_url,
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key,
             region_name=settings.aws_region,
+            # Uma conexão por thread do pool: nenhuma thread espera conexão livre
+            config=Config(max_pool_connections=settings.s3_max_workers),
+        )
+        self.s3_executor = ThreadPoolExecutor(
+            max_workers=settings.s3_max_workers,
+            thread_name_prefix="s3",
+        )
+        self.s3_inflight = 0
+        self.s3_calls = 0
+        self.tts_disk = DiskLRUCache(settings.cache_dir / "tts", max_bytes=settings.tts_cache_max_bytes)
+        self.tts_markers = PresenceMarkers(
+            ttl_seconds=settings.tts_cache_verify_seconds,
+            max_entries=settings.tts_cache_max_markers,
         )
+        self.tts_stats = TTSCacheStats()
+        # Chave do áudio → busca/síntese em andamento (pedidos iguais esperam a mesma)
+        self._tts_inflight: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self):
@@ -38,6 +81,24 @@ class AudioService:
             logger.info(f"Criando bucket {settings.s3_bucket_name}")
             self.s3_client.create_bucket(Bucket=settings.s3_bucket_name)
 
+    async def _run_s3(self, method: Callable[..., Any], **kwargs) -> Any:
+        """Executa uma chamada do boto3 no pool de threads do S3"""
+        loop = asyncio.get_running_loop()
+        self.s3_inflight += 1
+        self.s3_calls += 1
+        try:
+            return await loop.run_in_executor(self.s3_executor, functools.partial(method, **kwargs))
+        finally:
+            self.s3_inflight -= 1
+
+    async def shutdown(self):
+        """Fecha o cliente da OpenAI e o pool de threads do S3 (lifespan)"""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await self.openai_client.close()
+        self.s3_executor.shutdown(wait=True)
+
     async def text_to_speech(
         self, text: str, voice: str = "alloy", speed: float = 1.0
     ) -> TextToSpeechResponse:
@@ -47,44 +108,123 @@ class AudioService:
         logger.info(f"Gerando áudio para: {text[:50]}...")
 
         try:
-            # Chamada ao OpenAI TTS
-            response = self.openai_client.audio.speech.create(
-                model=settings.openai_tts_model,
-                voice=voice,
-                input=text,
-                speed=speed,
-            )
-
-            # Gerar nome único para o arquivo
-            audio_id = str(uuid.uuid4())
-            audio_key = f"tts/{datetime.now().strftime('%Y%m%d')}/{audio_id}.mp3"
+            if settings.tts_cache_enabled:
+                key = tts_cache_key(text, voice, speed, settings.openai_tts_model)
+                audio_key = f"{settings.tts_cache_s3_prefix}/{key}.mp3"
+                cache = await self._cached_audio(key, audio_key, text, voice, speed)
+            else:
+                # Gerar nome único para o arquivo
+                audio_id = str(uuid.uuid4())
+                audio_key = f"tts/{datetime.now().strftime('%Y%m%d')}/{audio_id}.mp3"
+                await self._synthesize(audio_key, text, voice, speed)
+                cache = None
 
-            # Upload para S3
-            self.s3_client.put_object(
-                Bucket=settings.s3_bucket_name,
-                Key=audio_key,
-                Body=response.content,
-                ContentType="audio/mpeg",
-            )
+            audio_url = await self.get_download_url(audio_key)
 
-            audio_url = self.s3_client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": settings.s3_bucket_name, "Key": audio_key},
-                ExpiresIn=3600,
-            )
-            
             logger.info(f"Áudio salvo em: {audio_url}")
 
             return TextToSpeechResponse(
                 audio_url=audio_url,
                 voice=voice,
                 text_length=len(text),
+                cache=cache,
             )
 
         except Exception as e:
             logger.error(f"Erro ao gerar áudio: {str(e)}")
             raise
 
+    async def _synthesize(self, audio_key: str, text: str, voice: str, speed: float) -> bytes:
+        """Gera o áudio na OpenAI e envia para o S3"""
+        # Chamada ao OpenAI TTS
+        response = await self.openai_client.audio.speech.create(
+            model=settings.openai_tts_model,
+            voice=voice,
+            input=text,
+            speed=speed,
+        )
+
+        await self._upload(audio_key, response.content)
+        return response.content
+
+    async def _upload(self, audio_key: str, data: bytes) -> None:
+        """Upload do áudio para o S3"""
+        await self._run_s3(
+            self.s3_client.put_object,
+            Bucket=settings.s3_bucket_name,
+            Key=audio_key,
+            Body=data,
+            ContentType="audio/mpeg",
+        )
+
+    async def _cached_audio(
+        self, key: str, audio_key: str, text: str, voice: str, speed: float
+    ) -> Optional[str]:
+        """
+        Garante o áudio no S3 pela chave determinística
+
+        Returns:
+            Camada que já tinha o áudio ("verified", "s3", "disk") ou None (sintetizado)
+        """
+        if self.tts_markers.fresh(key):
+            self.tts_stats.record("verified")
+            logger.info(f"✅ Áudio em cache (confirmado no S3): {key[:12]}")
+            return "verified"
+
+        task = self._tts_inflight.get(key)
+        if task is not None:
+            self.tts_stats.coalesced += 1
+        else:
+            task = asyncio.create_task(self._lookup_or_synthesize(key, audio_key, text, voice, speed))
+            self._tts_inflight[key] = task
+            task.add_done_callback(lambda _: self._tts_inflight.pop(key, None))
+        # shield: o cancelamento de um pedido não interrompe os demais
+        return await asyncio.shield(task)
+
+    async def _lookup_or_synthesize(
+        self, key: str, audio_key: str, text: str, voice: str, speed: float
+    ) -> Optional[str]:
+        try:
+            await self._run_s3(self.s3_client.head_object, Bucket=settings.s3_bucket_name, Key=audio_key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+        else:
+            self.tts_stats.record("s3")
+            self.tts_markers.mark(key)
+            logger.info(f"☁️  Áudio em cache (S3): {key[:12]}")
+            return "s3"
+
+        # Sumiu do S3 (lifecycle, limpeza), mas os bytes ainda estão no disco
+        if key in self.tts_disk:
+            data = await asyncio.get_running_loop().run_in_executor(None, self.tts_disk.read, key)
+            if data is not None and self.tts_disk.touch(key):
+                await self._upload(audio_key, data)
+                self.tts_stats.record("disk")
+                self.tts_markers.mark(key)
+                logger.info(f"💾 Áudio reenviado ao S3 a partir do disco: {key[:12]}")
+                return "disk"
+
+        self.tts_stats.record(None)
+        data = await self._synthesize(audio_key, text, voice, speed)
+        self.tts_markers.mark(key)
+        self._spawn(self._store_on_disk(key, lambda: self.tts_disk.write(key, data)))
+        return None
+
+    async def _store_on_disk(self, key: str, write: Callable[[], int]) -> None:
+        """Grava fora do event loop e registra no LRU (falha no disco não afeta a resposta)"""
+        try:
+            size = await asyncio.get_running_loop().run_in_executor(None, write)
+        except Exception as e:
+            logger.warning(f"⚠️  Falha ao gravar áudio no cache em disco: {e}")
+            return
+        self.tts_disk.add(key, size)
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
     async def speech_to_text(self, audio_file_path: str) -> SpeechToTextResponse:
         """
         Transcreve áudio para texto usando OpenAI Whisper
@@ -92,12 +232,12 @@ class AudioService:
         logger.info(f"Transcrevendo áudio: {audio_file_path}")
 
         try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model=settings.openai_whisper_model,
-                    file=audio_file,
-                    language="pt",  # Português
-                )
+            # O cliente assíncrono lê o arquivo sem bloquear o event loop
+            transcript = await self.openai_client.audio.transcriptions.create(
+                model=settings.openai_whisper_model,
+                file=Path(audio_file_path),
+                language="pt",  # Português
+            )
 
             logger.info(f"Transcrição concluída: {transcript.text[:50]}...")
 
@@ -110,17 +250,38 @@ class AudioService:
             logger.error(f"Erro ao transcrever: {str(e)}")
             raise
 
-    def get_download_url(self, s3_key: str) -> str:
+    async def get_download_url(self, s3_key: str) -> str:
         """
         Gera URL de download assinada (válida por 1 hora)
         """
         try:
-            url = self.s3_client.generate_presigned_url(
-                "get_object",
+            # Assinatura local, mas a resolução de credenciais pode ir à rede
+            url = await self._run_s3(
+                self.s3_client.generate_presigned_url,
+                ClientMethod="get_object",
                 Params={"Bucket": settings.s3_bucket_name, "Key": s3_key},
                 ExpiresIn=3600,
             )
             return url
         except Exception as e:
             logger.error(f"Erro ao gerar URL: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def get_stats(self) -> Dict:
+        """Limites e uso dos pools de conexão"""
+        return {
+            "openai_max_connections": settings.openai_max_connections,
+            "openai_max_keepalive_connections": settings.openai_max_keepalive_connections,
+            "s3_max_workers": settings.s3_max_workers,
+            "s3_inflight": self.s3_inflight,
+            "s3_calls": self.s3_calls,
+        }
+
+    def get_tts_cache_stats(self) -> Dict:
+        """Acertos por camada, marcadores de presença e ocupação do cache TTS em disco"""
+        return {
+            "enabled": settings.tts_cache_enabled,
+            **self.tts_stats.get_stats(),
+            "markers": self.tts_markers.get_stats(),
+            "disk": self.tts_disk.get_stats(),
+        }
@@ -0,0 +1,199 @@
+"""
+Cache de áudios TTS endereçado por conteúdo
+
+O mesmo (texto, voz, velocidade, modelo) sempre gera o mesmo áudio, então
+a chave é o hash desses campos e o objeto no S3 tem um nome determinístico.
+Ordem de busca:
+1. Marcador de presença (memória): áudio confirmado no S3 há menos de
+   TTS_CACHE_VERIFY_SECONDS → basta assinar a URL
+2. head_object na chave determinística do S3 (marcador vencido, áudio
+   gerado por outra réplica ou antes de reiniciar) → renova o marcador
+3. Objeto sumiu do S3 (lifecycle, limpeza) mas o áudio está no LRU em
+   disco (settings.cache_dir, limitado por TTS_CACHE_MAX_BYTES) → novo
+   upload a partir do disco, sem síntese
+4. Síntese na OpenAI + upload, só quando nenhuma camada tem o áudio; os
+   bytes gerados vão para o disco
+
+Pedidos simultâneos do mesmo áudio esperam uma única busca/síntese.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def tts_cache_key(text: str, voice: str, speed: float, model: str) -> str:
+    """Hash SHA-256 dos parâmetros que determinam o áudio"""
+    payload = json.dumps(
+        {"text": text, "voice": voice, "speed": round(float(speed), 3), "model": model},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """Áudios em disco com limite de tamanho (remove os usados há mais tempo)"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        """
+        Args:
+            directory: Pasta dos arquivos (um .mp3 por chave)
+            max_bytes: Tamanho máximo somado dos arquivos
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        # chave → tamanho, do usado há mais tempo ao mais recente
+        self.index: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+        self._load()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def _load(self) -> None:
+        """Reconstrói o índice a partir dos arquivos (ordem pela última utilização)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.directory.glob("*.mp3"), key=lambda path: path.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self.index[path.stem] = size
+            self.total_bytes += size
+        self._evict()
+        if self.index:
+            logger.info(f"💾 Cache TTS em disco: {len(self.index)} áudios ({self.total_bytes / 1024 / 1024:.1f} MB)")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Bytes do áudio (pode rodar fora do event loop); None se o arquivo sumiu"""
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def touch(self, key: str) -> bool:
+        """Marca o áudio como usado agora; False se não estiver no cache"""
+        if key not in self.index:
+            return False
+        self.index.move_to_end(key)
+        try:
+            # mtime guarda a ordem do LRU entre reinícios
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            self._forget(key)
+            return False
+        return True
+
+    def write(self, key: str, data: bytes) -> int:
+        """
+        Grava o arquivo do áudio (escrita atômica)
+
+        Não altera o índice: pode rodar fora do event loop; em seguida
+        chame add() no loop.
+        """
+        temp_path = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        temp_path.write_bytes(data)
+        os.replace(temp_path, self._path(key))
+        return len(data)
+
+    def add(self, key: str, size: int) -> None:
+        """Registra um áudio gravado por write() e remove os mais antigos acima do limite"""
+        if key in self.index:
+            self.total_bytes -= self.index.pop(key)
+        self.index[key] = size
+        self.total_bytes += size
+        self._evict()
+
+    def _forget(self, key: str) -> None:
+        self.total_bytes -= self.index.pop(key, 0)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.index:
+            key, _ = next(iter(self.index.items()))
+            self._forget(key)
+            self._path(key).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "entries": len(self.index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class PresenceMarkers:
+    """Chaves confirmadas no S3 recentemente (dispensam o head_object)"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        """
+        Args:
+            ttl_seconds: Validade da confirmação; depois dela o S3 é consultado de novo
+            max_entries: Marcadores mantidos (os usados há mais tempo saem primeiro)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # chave → instante da confirmação, do usado há mais tempo ao mais recente
+        self.verified_at: "OrderedDict[str, float]" = OrderedDict()
+
+    def fresh(self, key: str) -> bool:
+        verified_at = self.verified_at.get(key)
+        if verified_at is None:
+            return False
+        if time.monotonic() - verified_at >= self.ttl_seconds:
+            del self.verified_at[key]
+            return False
+        self.verified_at.move_to_end(key)
+        return True
+
+    def mark(self, key: str) -> None:
+        self.verified_at.pop(key, None)
+        self.verified_at[key] = time.monotonic()
+        while len(self.verified_at) > self.max_entries:
+            self.verified_at.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {
+            "entries": len(self.verified_at),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+class TTSCacheStats:
+    """Contadores por camada do cache TTS"""
+
+    LAYERS = ("verified", "s3", "disk")
+
+    def __init__(self):
+        self.hits: Dict[str, int] = {layer: 0 for layer in self.LAYERS}
+        self.misses = 0
+        self.coalesced = 0
+
+    def record(self, layer: Optional[str]) -> None:
+        if layer in self.hits:
+            self.hits[layer] += 1
+        else:
+            self.misses += 1
+
+    def get_stats(self) -> Dict:
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            "requests": total,
+            **{f"{layer}_hits": count for layer, count in self.hits.items()},
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
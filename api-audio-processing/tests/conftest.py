@@ -0,0 +1,47 @@
+"""S3 e OpenAI falsos: os testes não acessam a rede nem precisam de chave"""
+import os
+import threading
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+
+class FakeS3:
+    """Cliente boto3 com objetos em memória; registra a thread de cada chamada"""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []  # (método, nome da thread)
+
+    def _record(self, method):
+        self.calls.append((method, threading.current_thread().name))
+
+    def head_bucket(self, Bucket):
+        self._record("head_bucket")
+
+    def create_bucket(self, Bucket):
+        self._record("create_bucket")
+
+    def head_object(self, Bucket, Key):
+        self._record("head_object")
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self._record("put_object")
+        self.objects[Key] = Body
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        self._record("generate_presigned_url")
+        return f"http://s3.test/{Params['Bucket']}/{Params['Key']}"
+
+    def count(self, method):
+        return sum(1 for name, _ in self.calls if name == method)
+
+
+# main.py cria um AudioService ao importar o pacote (head_bucket no LocalStack)
+with mock.patch("boto3.client", side_effect=lambda *args, **kwargs: FakeS3()):
+    import api_audio_processing  # noqa: E402,F401
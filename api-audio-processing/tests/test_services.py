@@ -0,0 +1,244 @@
+"""Testes do AudioService com S3 e OpenAI falsos: camadas do cache TTS e pools"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from botocore.exceptions import ClientError
+from openai import AsyncOpenAI
+
+from api_audio_processing import services
+from api_audio_processing.config import settings
+from api_audio_processing.services import AudioService
+from api_audio_processing.tts_cache import tts_cache_key
+from conftest import FakeS3
+
+TEXT = "Olá, mundo! Este é um teste de conversão de texto para áudio."
+
+
+class FakeSpeech:
+    """audio.speech da OpenAI; com gate, a síntese espera o evento"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = None
+
+    async def create(self, model, voice, input, speed):
+        self.calls.append(input)
+        if self.gate is not None:
+            await self.gate.wait()
+        return SimpleNamespace(content=f"mp3:{input}".encode())
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = FakeS3()
+    fake.client_kwargs = []
+
+    def client(*args, **kwargs):
+        fake.client_kwargs.append(kwargs)
+        return fake
+
+    monkeypatch.setattr(services.boto3, "client", client)
+    return fake
+
+
+@pytest.fixture
+def speech():
+    return FakeSpeech()
+
+
+@pytest_asyncio.fixture
+async def service(monkeypatch, tmp_path, s3, speech):
+    monkeypatch.setattr(settings, "cache_dir", tmp_path)
+    service = AudioService()
+    monkeypatch.setattr(service.openai_client.audio.speech, "create", speech.create)
+    yield service
+    await service.shutdown()
+
+
+def cache_key(text=TEXT):
+    return tts_cache_key(text, "alloy", 1.0, settings.openai_tts_model)
+
+
+def audio_key(text=TEXT):
+    return f"{settings.tts_cache_s3_prefix}/{cache_key(text)}.mp3"
+
+
+async def speak(service, text=TEXT):
+    response = await service.text_to_speech(text, voice="alloy", speed=1.0)
+    # Gravação no disco roda em segundo plano depois da síntese
+    await asyncio.gather(*service._background)
+    return response
+
+
+async def wait_for(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condição não atingida")
+
+
+def expire_markers(service):
+    service.tts_markers.verified_at.clear()
+
+
+@pytest.mark.asyncio
+async def test_miss_synthesizes_and_stores_on_s3_and_disk(service, s3, speech):
+    response = await speak(service)
+
+    assert response.cache is None
+    assert response.audio_url.endswith(audio_key())
+    assert speech.calls == [TEXT]
+    assert s3.objects[audio_key()] == f"mp3:{TEXT}".encode()
+    assert service.tts_disk.read(cache_key()) == f"mp3:{TEXT}".encode()
+    assert service.get_tts_cache_stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fresh_marker_skips_head_object(service, s3, speech):
+    await speak(service)
+
+    response = await speak(service)
+
+    assert response.cache == "verified"
+    assert s3.count("head_object") == 1
+    assert speech.calls == [TEXT]
+    stats = service.get_tts_cache_stats()
+    assert (stats["verified_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_expired_marker_is_confirmed_by_head_object(service, s3, speech):
+    await speak(service)
+    expire_markers(service)
+
+    response = await speak(service)
+
+    assert response.cache == "s3"
+    assert s3.count("head_object") == 2
+    assert s3.count("put_object") == 1
+    assert speech.calls == [TEXT]
+    # Confirmado no S3: o próximo pedido volta a sair do marcador
+    assert (await speak(service)).cache == "verified"
+
+
+@pytest.mark.asyncio
+async def test_audio_lost_on_s3_is_reuploaded_from_disk(service, s3, speech):
+    await speak(service)
+    s3.objects.clear()
+    expire_markers(service)
+
+    response = await speak(service)
+
+    assert response.cache == "disk"
+    assert s3.objects[audio_key()] == f"mp3:{TEXT}".encode()
+    assert s3.count("put_object") == 2
+    assert speech.calls == [TEXT]
+    assert service.get_tts_cache_stats()["disk_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_audio_missing_from_every_layer_is_synthesized_again(service, s3, speech, tmp_path):
+    await speak(service)
+    s3.objects.clear()
+    expire_markers(service)
+    for path in (tmp_path / "tts").glob("*.mp3"):
+        path.unlink()
+
+    response = await speak(service)
+
+    assert response.cache is None
+    assert speech.calls == [TEXT, TEXT]
+    assert service.get_tts_cache_stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unexpected_s3_error_is_raised_without_synthesis(service, s3, speech, monkeypatch):
+    def forbidden(Bucket, Key):
+        raise ClientError({"Error": {"Code": "403", "Message": "Forbidden"}}, "HeadObject")
+
+    monkeypatch.setattr(s3, "head_object", forbidden)
+
+    with pytest.raises(ClientError):
+        await service.text_to_speech(TEXT)
+
+    assert speech.calls == []
+    assert service._tts_inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_synthesis(service, s3, speech):
+    speech.gate = asyncio.Event()
+    requests = [asyncio.create_task(service.text_to_speech(TEXT)) for _ in range(3)]
+    await wait_for(lambda: speech.calls)
+
+    speech.gate.set()
+    responses = await asyncio.gather(*requests)
+
+    assert [response.cache for response in responses] == [None, None, None]
+    assert speech.calls == [TEXT]
+    assert s3.count("head_object") == 1
+    assert s3.count("put_object") == 1
+    assert service.tts_stats.coalesced == 2
+    assert service._tts_inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_does_not_cancel_shared_synthesis(service, s3, speech):
+    speech.gate = asyncio.Event()
+    first = asyncio.create_task(service.text_to_speech(TEXT))
+    second = asyncio.create_task(service.text_to_speech(TEXT))
+    await wait_for(lambda: speech.calls)
+
+    first.cancel()
+    speech.gate.set()
+
+    assert (await second).cache is None
+    assert first.cancelled()
+    assert audio_key() in s3.objects
+
+
+@pytest.mark.asyncio
+async def test_s3_calls_run_on_dedicated_thread_pool(service, s3, monkeypatch):
+    head_object = s3.head_object
+
+    def slow_head_object(Bucket, Key):
+        time.sleep(0.2)
+        return head_object(Bucket=Bucket, Key=Key)
+
+    monkeypatch.setattr(s3, "head_object", slow_head_object)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    clock = asyncio.create_task(ticker())
+    await speak(service)
+    clock.cancel()
+
+    # O head_object lento não parou o event loop
+    assert ticks >= 10
+    threads = {method: thread for method, thread in s3.calls if method != "head_bucket"}
+    assert set(threads) == {"head_object", "put_object", "generate_presigned_url"}
+    assert all(thread.startswith("s3_") for thread in threads.values())
+    assert service.get_stats()["s3_calls"] == 3
+    assert service.get_stats()["s3_inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_clients_are_async_and_pools_sized_from_settings(service, s3):
+    assert isinstance(service.openai_client, AsyncOpenAI)
+    assert s3.client_kwargs[0]["config"].max_pool_connections == settings.s3_max_workers
+    assert service.s3_executor._max_workers == settings.s3_max_workers
+
+    await service.shutdown()
+
+    assert service.openai_client.is_closed()
+    with pytest.raises(RuntimeError):
+        service.s3_executor.submit(print)
@@ -0,0 +1,143 @@
+"""Testes do cache TTS: chave, LRU em disco e marcadores de presença"""
+import os
+
+import pytest
+
+from api_audio_processing import tts_cache
+from api_audio_processing.tts_cache import DiskLRUCache, PresenceMarkers, TTSCacheStats, tts_cache_key
+
+
+def store(cache, key, data):
+    cache.add(key, cache.write(key, data))
+
+
+def test_key_depends_on_every_audio_parameter():
+    key = tts_cache_key("olá", "alloy", 1.0, "tts-1")
+
+    assert key == tts_cache_key("olá", "alloy", 1, "tts-1")
+    assert key == tts_cache_key("olá", "alloy", 1.0001, "tts-1")
+    assert key != tts_cache_key("olá", "shimmer", 1.0, "tts-1")
+    assert key != tts_cache_key("olá", "alloy", 1.25, "tts-1")
+    assert key != tts_cache_key("olá", "alloy", 1.0, "tts-1-hd")
+    assert key != tts_cache_key("olá!", "alloy", 1.0, "tts-1")
+
+
+def test_disk_cache_reads_what_was_written(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=100)
+
+    store(cache, "a", b"audio-a")
+
+    assert "a" in cache
+    assert cache.read("a") == b"audio-a"
+    assert cache.get_stats() == {"entries": 1, "bytes": 7, "max_bytes": 100, "evictions": 0}
+    # Só o .mp3 fica na pasta (o temporário da escrita atômica foi renomeado)
+    assert [path.name for path in tmp_path.iterdir()] == ["a.mp3"]
+
+
+def test_disk_cache_evicts_least_recently_used_above_max_bytes(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=10)
+    store(cache, "a", b"aaaa")
+    store(cache, "b", b"bbbb")
+    assert cache.touch("a")
+
+    store(cache, "c", b"cccc")
+
+    assert list(cache.index) == ["a", "c"]
+    assert "b" not in cache
+    assert not (tmp_path / "b.mp3").exists()
+    assert cache.total_bytes == 8
+    assert cache.evictions == 1
+
+
+def test_disk_cache_rewrite_replaces_size(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=10)
+    store(cache, "a", b"aaaa")
+
+    store(cache, "a", b"aaaaaaaa")
+
+    assert cache.total_bytes == 8
+    assert cache.evictions == 0
+
+
+def test_disk_cache_entry_larger_than_limit_is_not_kept(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=4)
+
+    store(cache, "a", b"aaaaa")
+
+    assert "a" not in cache
+    assert cache.total_bytes == 0
+    assert not (tmp_path / "a.mp3").exists()
+
+
+def test_disk_cache_reload_keeps_lru_order_and_limit(tmp_path):
+    for age, key in enumerate(["novo", "medio", "velho"]):
+        path = tmp_path / f"{key}.mp3"
+        path.write_bytes(b"xxxx")
+        mtime = 1_000_000 - age * 100
+        os.utime(path, (mtime, mtime))
+
+    cache = DiskLRUCache(tmp_path, max_bytes=8)
+
+    assert list(cache.index) == ["medio", "novo"]
+    assert cache.total_bytes == 8
+    assert cache.evictions == 1
+    assert not (tmp_path / "velho.mp3").exists()
+
+
+def test_disk_cache_forgets_file_removed_behind_its_back(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=100)
+    store(cache, "a", b"aaaa")
+    (tmp_path / "a.mp3").unlink()
+
+    assert cache.read("a") is None
+    assert not cache.touch("a")
+    assert "a" not in cache
+    assert cache.total_bytes == 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(tts_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_marker_is_fresh_until_ttl(clock):
+    markers = PresenceMarkers(ttl_seconds=60, max_entries=10)
+    assert not markers.fresh("a")
+
+    markers.mark("a")
+    clock[0] += 59
+    assert markers.fresh("a")
+
+    clock[0] += 1
+    assert not markers.fresh("a")
+    assert "a" not in markers.verified_at
+
+
+def test_marker_limit_drops_least_recently_used(clock):
+    markers = PresenceMarkers(ttl_seconds=60, max_entries=2)
+    markers.mark("a")
+    markers.mark("b")
+    assert markers.fresh("a")
+
+    markers.mark("c")
+
+    assert list(markers.verified_at) == ["a", "c"]
+    assert not markers.fresh("b")
+
+
+def test_stats_count_hits_per_layer_and_misses():
+    stats = TTSCacheStats()
+    for layer in ["verified", "verified", "s3", "disk", None]:
+        stats.record(layer)
+
+    assert stats.get_stats() == {
+        "requests": 5,
+        "verified_hits": 2,
+        "s3_hits": 1,
+        "disk_hits": 1,
+        "misses": 1,
+        "coalesced": 0,
+        "hit_rate": 0.8,
+    }
@@ -32,6 +32,44 @@ class Settings(BaseSettings):
     # Message Batching
     message_batch_timeout_seconds: int = 5  # Timeout total
     message_inter_timeout_seconds: int = 5  # Timeout entre mensagens
+    
+    # Agendamento de flushes por custo
+    flush_workers: int = 8  # Processamentos simultâneos
+    flush_aging_seconds: float = 10.0  # Atraso virtual por nível de custo
+    long_audio_threshold_seconds: int = 60
+    audio_bytes_per_second: int = 2000  # Estimativa para áudio opus do WhatsApp
+    
+    # Prefetch de contexto (perfil, sessão, histórico) durante a janela
+    prefetch_refresh_seconds: int = 20  # Atualiza contexto em janelas longas
+    prefetch_max_age_seconds: int = 60  # Idade máxima aceita no processamento
+    prefetch_history_limit: int = 5  # Trocas recentes enviadas ao agente
+    
+    # Cache de respostas do agente
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: int = 3600
+    response_cache_max_entries: int = 1000
+    response_cache_max_message_chars: int = 200  # Só mensagens curtas
+    
+    # Controle de Admissão
+    admission_max_buffered_messages: int = 500  # Total em todos os buffers
+    admission_max_pending_flushes: int = 50  # Buffers em processamento
+    admission_user_rate_per_minute: int = 20
+    admission_user_burst: int = 5
+    admission_fair_share_threshold: float = 0.5  # Carga a partir da qual aplica fair share
+    admission_retry_after_seconds: int = 15
+    admission_shed_message: str = "Estamos com muitas mensagens, responderemos em breve! 🙏"
+    
+    # Encerramento gracioso
+    shutdown_drain_timeout_seconds: int = 20  # Prazo para drenar buffers
+    pending_buffers_poll_seconds: int = 30  # Busca de buffers persistidos por outra instância
+    
+    # Timeout da API de Agentes (enviado como prazo em X-Request-Deadline-Ms)
+    agent_timeout_seconds: float = 30.0
+    agent_deadline_margin_seconds: float = 2.0  # Folga para a resposta de contingência chegar
+    
+    # Circuit Breaker (API de Agentes)
+    agent_breaker_failure_threshold: int = 5
+    agent_breaker_reset_seconds: int = 30
 
 
 settings = Settings()
\ No newline at end of file
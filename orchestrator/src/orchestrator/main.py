@@ -10,11 +10,12 @@ Responsável por:
 """
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .routes import router
+from .routes import router, message_service
 
 # Configurar logging
 logging.basicConfig(
@@ -23,11 +24,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("🚀 Orquestrador iniciando...")
+    logger.info(f"📡 WhatsApp Service: {settings.whatsapp_service_url}")
+    logger.info(f"🎵 Audio API: {settings.audio_api_url}")
+    logger.info(f"🤖 Agent API: {settings.agent_api_url}")
+    await message_service.startup()
+    
+    yield
+    
+    logger.info("🛑 Orquestrador encerrando...")
+    await message_service.shutdown()
+
+
 # Inicializar FastAPI
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description="Orquestrador de mensagens WhatsApp - Integra áudio, agentes e MCPs",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -43,19 +60,6 @@ app.add_middleware(
 app.include_router(router)
 
 
-@app.on_event("startup")
-async def startup():
-    logger.info("🚀 Orquestrador iniciando...")
-    logger.info(f"📡 WhatsApp Service: {settings.whatsapp_service_url}")
-    logger.info(f"🎵 Audio API: {settings.audio_api_url}")
-    logger.info(f"🤖 Agent API: {settings.agent_api_url}")
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    logger.info("🛑 Orquestrador encerrando...")
-
-
 def main():
     """Ponto de entrada"""
     uvicorn.run(
@@ -1,5 +1,6 @@
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from datetime import datetime
 
 from .models import IncomingMessageRequest
@@ -28,6 +29,9 @@ async def receive_message(request: IncomingMessageRequest):
     
     NÃO processa imediatamente!
     Aguarda timeout ou mais mensagens.
+    
+    Sob sobrecarga retorna 429 (limite do usuário) ou 503 (sobrecarga
+    geral) com header Retry-After para o WhatsApp Service recuar.
     """
     logger.info(f"📨 POST /process-message de {request.user_id}")
     
@@ -39,9 +43,34 @@ async def receive_message(request: IncomingMessageRequest):
         media=request.media
     )
     
+    if result["status"] == "rejected":
+        return JSONResponse(
+            status_code=result["http_status"],
+            content=result,
+            headers={"Retry-After": str(result["retry_after_seconds"])}
+        )
+    
     return result
 
 
+@router.get("/admission-status")
+async def get_admission_status():
+    """Obtém sinais de carga e contadores do controle de admissão"""
+    return message_service.admission_service.get_status()
+
+
+@router.get("/response-cache-status")
+async def get_response_cache_status():
+    """Obtém taxa de acerto e latência economizada pelo cache de respostas"""
+    return message_service.agent_service.cache.get_stats()
+
+
+@router.get("/scheduler-status")
+async def get_scheduler_status():
+    """Obtém fila e histogramas de latência por classe de custo"""
+    return message_service.scheduler.get_status()
+
+
 @router.get("/buffer-status/{user_id}")
 async def get_buffer_status(user_id: str):
     """Obtém status do buffer de um usuário"""
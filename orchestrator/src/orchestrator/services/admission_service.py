@@ -0,0 +1,213 @@
+"""
+Serviço de Controle de Admissão
+
+Decide se uma mensagem recebida pode entrar no buffer.
+Sinais usados:
+1. Total de mensagens em buffer (todos os usuários)
+2. Flushes pendentes (buffers em processamento)
+3. Estado do circuit breaker da API de Agentes
+4. Limite de taxa por usuário (token bucket) + fair share sob carga
+
+Quando recusa, o WhatsApp Service recebe 429/503 com Retry-After
+e o usuário recebe UMA resposta degradada por episódio de descarte.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .circuit_breaker import CircuitBreaker
+from .message_buffer_service import MessageBufferService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AdmissionDecision:
+    """Resultado da verificação de admissão"""
+    admitted: bool
+    status_code: int = 200
+    reason: Optional[str] = None
+    retry_after_seconds: int = 0
+    notify_user: bool = False
+
+
+class TokenBucket:
+    """Token bucket simples (reposição contínua)"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+
+    def try_consume(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self) -> int:
+        self._refill()
+        if self.tokens >= 1 or self.rate_per_second <= 0:
+            return 0
+        return int((1 - self.tokens) / self.rate_per_second) + 1
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class AdmissionService:
+    """Controle de admissão e descarte de carga na borda do orquestrador"""
+
+    def __init__(
+        self,
+        buffer_service: MessageBufferService,
+        agent_breaker: CircuitBreaker,
+        max_buffered_messages: int = 500,
+        max_pending_flushes: int = 50,
+        user_rate_per_minute: int = 20,
+        user_burst: int = 5,
+        fair_share_threshold: float = 0.5,
+        retry_after_seconds: int = 15,
+        cleanup_interval_seconds: float = 60.0
+    ):
+        self.buffer_service = buffer_service
+        self.agent_breaker = agent_breaker
+        self.max_buffered_messages = max_buffered_messages
+        self.max_pending_flushes = max_pending_flushes
+        self.user_rate_per_minute = user_rate_per_minute
+        self.user_burst = user_burst
+        self.fair_share_threshold = fair_share_threshold
+        self.retry_after_seconds = retry_after_seconds
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.last_cleanup_at = time.monotonic()
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.shed_notified: Dict[str, float] = {}
+        self.accepting = True
+        self.admitted_count = 0
+        self.rejected_count: Dict[str, int] = {}
+
+    def _get_bucket(self, user_id: str) -> TokenBucket:
+        if user_id not in self.buckets:
+            self.buckets[user_id] = TokenBucket(
+                rate_per_second=self.user_rate_per_minute / 60,
+                capacity=self.user_burst
+            )
+        return self.buckets[user_id]
+
+    def _load_ratio(self) -> float:
+        """Carga atual (0..1+) pelo sinal mais pressionado"""
+        return max(
+            self.buffer_service.total_buffered_messages() / max(self.max_buffered_messages, 1),
+            self.buffer_service.pending_flushes() / max(self.max_pending_flushes, 1),
+        )
+
+    def _fair_share(self) -> int:
+        """Mensagens em buffer permitidas por usuário sob carga"""
+        active_users = max(self.buffer_service.active_buffers(), 1)
+        return max(self.max_buffered_messages // active_users, 1)
+
+    def _reject(self, user_id: str, status_code: int, reason: str, retry_after: int) -> AdmissionDecision:
+        self.rejected_count[reason] = self.rejected_count.get(reason, 0) + 1
+
+        # Notificar o usuário apenas uma vez por episódio de descarte
+        notify_user = user_id not in self.shed_notified
+        if notify_user:
+            self.shed_notified[user_id] = time.time()
+
+        logger.warning(
+            f"🚦 Mensagem recusada [{user_id}] | Motivo: {reason} "
+            f"| Status: {status_code} | Retry-After: {retry_after}s"
+        )
+        return AdmissionDecision(
+            admitted=False,
+            status_code=status_code,
+            reason=reason,
+            retry_after_seconds=retry_after,
+            notify_user=notify_user,
+        )
+
+    def check(self, user_id: str) -> AdmissionDecision:
+        """
+        Verifica se a mensagem do usuário pode ser admitida
+
+        Ordem:
+        1. Orquestrador encerrando → 503
+        2. Circuit breaker aberto → 503
+        3. Sobrecarga global (buffer/flushes) → 503
+        4. Fair share excedido sob carga → 429
+        5. Limite de taxa do usuário → 429
+        """
+        # Limpeza amortizada: sem ela buckets/episódios crescem um por usuário
+        if time.monotonic() - self.last_cleanup_at >= self.cleanup_interval_seconds:
+            self.cleanup_idle()
+
+        if not self.accepting:
+            return self._reject(user_id, 503, "shutting_down", self.retry_after_seconds)
+
+        if self.agent_breaker.is_open:
+            return self._reject(
+                user_id, 503, "agent_unavailable",
+                int(self.agent_breaker.reset_timeout_seconds)
+            )
+
+        if self.buffer_service.total_buffered_messages() >= self.max_buffered_messages:
+            return self._reject(user_id, 503, "buffer_full", self.retry_after_seconds)
+
+        if self.buffer_service.pending_flushes() >= self.max_pending_flushes:
+            return self._reject(user_id, 503, "flush_backlog", self.retry_after_seconds)
+
+        if self._load_ratio() >= self.fair_share_threshold:
+            if self.buffer_service.buffered_messages(user_id) >= self._fair_share():
+                return self._reject(user_id, 429, "fair_share_exceeded", self.retry_after_seconds)
+
+        bucket = self._get_bucket(user_id)
+        if not bucket.try_consume():
+            return self._reject(user_id, 429, "user_rate_limited", bucket.seconds_until_token())
+
+        # Admitida: encerra episódio de descarte do usuário
+        self.shed_notified.pop(user_id, None)
+        self.admitted_count += 1
+        return AdmissionDecision(admitted=True)
+
+    def stop_accepting(self) -> None:
+        """Para de admitir novas mensagens (usado no encerramento)"""
+        self.accepting = False
+        logger.info("🚧 Admissão de novas mensagens encerrada")
+
+    def cleanup_idle(self, shed_episode_ttl_seconds: int = 3600) -> None:
+        """Remove buckets cheios (usuários inativos) e episódios antigos"""
+        self.last_cleanup_at = time.monotonic()
+        for user_id in [u for u, b in self.buckets.items() if b.is_full()]:
+            del self.buckets[user_id]
+
+        cutoff = time.time() - shed_episode_ttl_seconds
+        for user_id in [u for u, t in self.shed_notified.items() if t < cutoff]:
+            del self.shed_notified[user_id]
+
+    def get_status(self) -> Dict:
+        """Retorna sinais e contadores de admissão"""
+        self.cleanup_idle()
+        return {
+            "accepting": self.accepting,
+            "load_ratio": round(self._load_ratio(), 3),
+            "buffered_messages": self.buffer_service.total_buffered_messages(),
+            "max_buffered_messages": self.max_buffered_messages,
+            "pending_flushes": self.buffer_service.pending_flushes(),
+            "max_pending_flushes": self.max_pending_flushes,
+            "agent_breaker": self.agent_breaker.get_status(),
+            "admitted": self.admitted_count,
+            "rejected": self.rejected_count,
+            "users_in_shed_episode": len(self.shed_notified),
+        }
@@ -1,8 +1,12 @@
+import asyncio
 import logging
+import time
 import httpx
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Set
 
 from ..config import settings
+from .circuit_breaker import CircuitBreaker
+from .response_cache_service import AgentResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +14,27 @@ logger = logging.getLogger(__name__)
 class AgentService:
     """Integração com API de Agentes (API 3)"""
     
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            name="agent_api",
+            failure_threshold=settings.agent_breaker_failure_threshold,
+            reset_timeout_seconds=settings.agent_breaker_reset_seconds
+        )
+        self.cache = AgentResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            max_message_chars=settings.response_cache_max_message_chars
+        )
+        self.background_tasks: Set[asyncio.Task] = set()
+    
     async def process_message(
         self,
         user_message: str,
         user_id: str,
         session_id: str,
-        user_preferences: Optional[Dict] = None
+        user_preferences: Optional[Dict] = None,
+        recent_history: Optional[List[Dict]] = None,
+        user_profile: Optional[Dict] = None
     ) -> Optional[Dict]:
         """
         Processa mensagem do usuário através do agente
@@ -24,7 +43,40 @@ class AgentService:
         1. Envia mensagem para API 3
         2. Agente processa com MCPs
         3. Retorna resposta textual e indicação de áudio
+        
+        Mensagens curtas repetidas são respondidas pelo cache (exceto
+        opiniões/dados pessoais e continuações da conversa, que precisam
+        ir ao agente); a troca é registrada na memória de sessão da API
+        de Agentes. Sem histórico recente a entrada é compartilhada entre
+        cidadãos, exceto se a resposta citar o perfil (user_profile).
         """
+        cache_key = None
+        shared = not recent_history
+        if settings.response_cache_enabled:
+            if self.cache.is_cacheable(user_message):
+                cache_key = self.cache.make_key(
+                    self.cache.scope(user_id, recent_history),
+                    user_message,
+                    user_preferences
+                )
+                cached = self.cache.get(cache_key)
+                if cached:
+                    logger.info(f"⚡ Resposta do agente via cache: {user_message[:50]}...")
+                    cached["user_id"] = user_id
+                    cached["session_id"] = session_id
+                    task = asyncio.create_task(self._record_session_turn(
+                        user_id, session_id, user_message, cached.get("response_text", "")
+                    ))
+                    self.background_tasks.add(task)
+                    task.add_done_callback(self.background_tasks.discard)
+                    return cached
+            else:
+                self.cache.record_bypass()
+        
+        if not self.breaker.allow_request():
+            logger.warning("⚠️  API de Agentes indisponível (circuit breaker aberto)")
+            return None
+        
         try:
             logger.info(f"🤖 Processando mensagem com agente: {user_message[:50]}...")
             
@@ -33,24 +85,76 @@ class AgentService:
                 "user_id": user_id,
                 "session_id": session_id,
                 "message_type": "text",
-                "user_preferences": user_preferences or {}
+                "user_preferences": user_preferences or {},
+                "recent_history": recent_history or []
             }
             
+            started_at = time.monotonic()
             async with httpx.AsyncClient() as client:
+                # Prazo informado à API: responde (mesmo que parcialmente) antes do timeout
+                deadline_ms = int((settings.agent_timeout_seconds - settings.agent_deadline_margin_seconds) * 1000)
                 response = await client.post(
                     f"{settings.agent_api_url}/process-message",
                     json=payload,
-                    timeout=30.0
+                    headers={"X-Request-Deadline-Ms": str(deadline_ms)},
+                    timeout=settings.agent_timeout_seconds
                 )
             
             if response.status_code == 200:
                 result = response.json()
+                self.breaker.record_success()
                 logger.info(f"✅ Agente respondeu: {result.get('response_text', '')[:50]}...")
+                # Respostas de contingência (prazo esgotado) não vão para o cache
+                if cache_key and not result.get("partial"):
+                    if shared and self.cache.mentions_profile(result.get("response_text", ""), user_profile):
+                        logger.info("🔒 Resposta cita o perfil do usuário, não será compartilhada")
+                    else:
+                        self.cache.set(cache_key, result, time.monotonic() - started_at)
                 return result
+            elif response.status_code == 429:
+                # Cota de tokens do usuário esgotada: a API está saudável
+                self.breaker.record_success()
+                retry_after = response.headers.get("Retry-After", "?")
+                logger.warning(f"🚫 Cota do usuário {user_id} esgotada (Retry-After: {retry_after}s)")
+                return {
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "response_text": response.json().get("detail", ""),
+                    "auxiliary_text": "",
+                    "should_send_audio": False,
+                    "partial": True,
+                }
             else:
+                self.breaker.record_failure()
                 logger.error(f"❌ Erro ao processar com agente: {response.text}")
                 return None
                 
         except Exception as e:
+            self.breaker.record_failure()
             logger.error(f"❌ Erro na integração com agente: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    async def _record_session_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        user_message: str,
+        response_text: str
+    ) -> None:
+        """Registra na memória de sessão da API de Agentes uma troca respondida pelo cache"""
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{settings.agent_api_url}/session-memory/turns",
+                    json={
+                        "user_id": user_id,
+                        "session_id": session_id,
+                        "user_message": user_message,
+                        "agent_response": response_text,
+                    },
+                    timeout=5.0
+                )
+            if response.status_code >= 400:
+                logger.warning(f"⚠️  Troca do cache não registrada na memória: {response.status_code}")
+        except Exception as e:
+            logger.warning(f"⚠️  Troca do cache não registrada na memória: {e}")
@@ -0,0 +1,102 @@
+"""
+Circuit breaker simples para serviços downstream
+
+Estados:
+1. CLOSED → chamadas normais
+2. OPEN → falhas consecutivas atingiram o limite, chamadas recusadas
+3. HALF_OPEN → após o tempo de espera, libera UMA chamada de teste por
+   vez (uma falha reabre o circuito, um sucesso fecha); as demais são
+   recusadas até o resultado, para não mandar a carga toda a um serviço
+   que ainda está se recuperando
+"""
+import logging
+import time
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Estados do circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker por contagem de falhas consecutivas"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.consecutive_failures = 0
+        self.opened_at: float = 0.0
+        # Início da chamada de teste em andamento (HALF_OPEN); 0 = nenhuma
+        self.trial_started_at: float = 0.0
+        self._state = CircuitState.CLOSED
+
+    @property
+    def state(self) -> CircuitState:
+        """Estado atual (OPEN vira HALF_OPEN após o tempo de espera)"""
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self.opened_at >= self.reset_timeout_seconds
+        ):
+            self._state = CircuitState.HALF_OPEN
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == CircuitState.OPEN
+
+    def allow_request(self) -> bool:
+        """Verifica se a chamada pode ser feita (em HALF_OPEN, só uma de teste)"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.OPEN:
+            return False
+
+        now = time.monotonic()
+        # Teste sem resultado (ex: chamada cancelada) expira após o tempo de espera
+        if self.trial_started_at and now - self.trial_started_at < self.reset_timeout_seconds:
+            return False
+        self.trial_started_at = now
+        logger.info(f"🔎 Circuit breaker [{self.name}] liberando chamada de teste")
+        return True
+
+    def record_success(self) -> None:
+        if self._state != CircuitState.CLOSED:
+            logger.info(f"✅ Circuit breaker [{self.name}] fechado")
+        self.consecutive_failures = 0
+        self.trial_started_at = 0.0
+        self._state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.trial_started_at = 0.0
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self._state != CircuitState.OPEN:
+                logger.warning(
+                    f"⚠️  Circuit breaker [{self.name}] aberto "
+                    f"| Falhas consecutivas: {self.consecutive_failures}"
+                )
+            self._state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def get_status(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "trial_in_flight": bool(self.trial_started_at),
+        }
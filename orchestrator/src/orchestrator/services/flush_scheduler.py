@@ -0,0 +1,203 @@
+"""
+Agendador de processamento de buffers (flushes)
+
+Lotes são classificados pelo custo estimado:
+1. text → apenas texto
+2. short_audio → áudio curto para transcrever
+3. tts → resposta em áudio solicitada (síntese)
+4. long_audio → áudio longo para transcrever
+
+Um número fixo de workers executa os lotes em ordem de prioridade.
+Aging: cada classe recebe um atraso virtual (rank × aging_seconds),
+então lotes baratos passam na frente, mas um lote caro que espera
+há mais tempo acaba sendo executado.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FlushClass(str, Enum):
+    """Classes de custo dos lotes"""
+    TEXT = "text"
+    SHORT_AUDIO = "short_audio"
+    TTS = "tts"
+    LONG_AUDIO = "long_audio"
+
+
+# Quanto maior o rank, mais caro (e menor a prioridade inicial)
+FLUSH_CLASS_RANK = {
+    FlushClass.TEXT: 0,
+    FlushClass.SHORT_AUDIO: 1,
+    FlushClass.TTS: 2,
+    FlushClass.LONG_AUDIO: 3,
+}
+
+LATENCY_BUCKETS_SECONDS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300]
+
+
+class LatencyHistogram:
+    """Histograma cumulativo de latência"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS_SECONDS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 3),
+            "avg_seconds": round(self.sum / self.count, 3) if self.count else 0.0,
+            "buckets": {f"le_{b}": c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+@dataclass(order=True)
+class FlushJob:
+    """Lote aguardando execução"""
+    score: float
+    seq: int
+    flush_class: FlushClass = field(compare=False)
+    user_id: str = field(compare=False)
+    factory: Callable[[], Awaitable[None]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    task: Optional[asyncio.Task] = field(default=None, compare=False)
+
+
+class FlushScheduler:
+    """Fila de prioridade com aging para processamento de buffers"""
+
+    def __init__(self, workers: int = 8, aging_seconds: float = 10.0):
+        self.workers = workers
+        self.aging_seconds = aging_seconds
+        self.queue: List[FlushJob] = []
+        self.seq = itertools.count()
+        self.available = asyncio.Condition()
+        self.worker_tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.wait_histograms = {c: LatencyHistogram() for c in FlushClass}
+        self.latency_histograms = {c: LatencyHistogram() for c in FlushClass}
+
+    def start(self) -> None:
+        """Inicia os workers"""
+        if self.worker_tasks:
+            return
+        self.worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"✅ FlushScheduler iniciado | Workers: {self.workers}")
+
+    async def stop(self) -> None:
+        """Para os workers (processamentos em andamento são cancelados)"""
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks = []
+
+    async def submit(
+        self,
+        flush_class: FlushClass,
+        factory: Callable[[], Awaitable[None]],
+        user_id: str = ""
+    ) -> None:
+        """Agenda um lote e aguarda sua conclusão"""
+        now = time.monotonic()
+        job = FlushJob(
+            score=now + FLUSH_CLASS_RANK[flush_class] * self.aging_seconds,
+            seq=next(self.seq),
+            flush_class=flush_class,
+            user_id=user_id,
+            factory=factory,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=now,
+        )
+
+        async with self.available:
+            heapq.heappush(self.queue, job)
+            self.available.notify()
+
+        logger.info(
+            f"📋 Lote agendado [{user_id}] | Classe: {flush_class.value} "
+            f"| Fila: {len(self.queue)}"
+        )
+
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            # Quem agendou desistiu (ex: encerramento) → cancelar execução
+            if job.task and not job.task.done():
+                job.task.cancel()
+            raise
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            async with self.available:
+                while not self.queue:
+                    await self.available.wait()
+                job = heapq.heappop(self.queue)
+
+            if job.future.done():
+                continue  # cancelado enquanto aguardava na fila
+
+            started_at = time.monotonic()
+            self.wait_histograms[job.flush_class].observe(started_at - job.enqueued_at)
+            self.running += 1
+
+            try:
+                job.task = asyncio.create_task(job.factory())
+                await job.task
+                if not job.future.done():
+                    job.future.set_result(None)
+            except asyncio.CancelledError:
+                if job.task and not job.task.done():
+                    job.task.cancel()
+                if not job.future.done():
+                    job.future.cancel()
+                if not job.task or not job.task.cancelled():
+                    raise  # o próprio worker foi cancelado
+            except Exception as e:
+                logger.error(f"❌ Erro no lote [{job.user_id}]: {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self.running -= 1
+                self.latency_histograms[job.flush_class].observe(
+                    time.monotonic() - job.enqueued_at
+                )
+
+    def queued_count(self) -> int:
+        return sum(1 for job in self.queue if not job.future.done())
+
+    def get_status(self) -> Dict:
+        """Fila atual e histogramas de latência por classe"""
+        queued_by_class = {c.value: 0 for c in FlushClass}
+        for job in self.queue:
+            if not job.future.done():
+                queued_by_class[job.flush_class.value] += 1
+
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued_count(),
+            "queued_by_class": queued_by_class,
+            "aging_seconds": self.aging_seconds,
+            "queue_wait": {c.value: h.to_dict() for c, h in self.wait_histograms.items()},
+            "latency": {c.value: h.to_dict() for c, h in self.latency_histograms.items()},
+        }
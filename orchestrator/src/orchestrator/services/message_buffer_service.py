@@ -11,7 +11,7 @@ Fluxo:
 """
 import asyncio
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -39,8 +39,40 @@ class BufferedMessage:
     chatId: str
     timestamp: datetime
     media: Optional[dict] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "message_type": self.message_type.value,
+            "message": self.message,
+            "chatId": self.chatId,
+            "timestamp": self.timestamp,
+            "media": self.media,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BufferedMessage":
+        return cls(
+            user_id=data["user_id"],
+            message_type=MessageType(data["message_type"]),
+            message=data["message"],
+            chatId=data["chatId"],
+            timestamp=data["timestamp"],
+            media=data.get("media"),
+        )
 
 
+@dataclass
+class UserContext:
+    """Contexto do usuário pré-carregado durante a janela do buffer"""
+    user: Any
+    session_id: str
+    recent_history: List[dict]
+    fetched_at: datetime
+    
+    def age_seconds(self) -> float:
+        return (datetime.utcnow() - self.fetched_at).total_seconds()
+
 
 class MessageBuffer:
     """Buffer de mensagens por sessão"""
@@ -58,6 +90,9 @@ class MessageBuffer:
         self.timer_task: Optional[asyncio.Task] = None
         self.last_message_time = datetime.utcnow()
         self.is_processing = False
+        # Prefetch de perfil/sessão/histórico enquanto a janela está aberta
+        self.context: Optional[UserContext] = None
+        self.prefetch_task: Optional[asyncio.Task] = None
     
     def add_message(self, message: BufferedMessage) -> bool:
         """
@@ -117,6 +152,8 @@ class MessageBufferService:
         self.inter_message_timeout_seconds = inter_message_timeout_seconds
         self.timers: Dict[str, asyncio.Task] = {}
         self.processing_callbacks: Dict[str, callable] = {}
+        # Lotes entregues ao callback mas ainda não iniciados (ex: na fila do scheduler)
+        self.inflight: Dict[str, List[BufferedMessage]] = {}
     
     def get_or_create_buffer(self, user_id: str) -> MessageBuffer:
         """Obtém ou cria buffer para usuário"""
@@ -220,6 +257,7 @@ class MessageBufferService:
         
         buffer.is_processing = True
         messages = buffer.get_messages()
+        self.inflight[user_id] = messages
         
         try:
             # Chamar callback registrado
@@ -232,8 +270,101 @@ class MessageBufferService:
             logger.error(f"❌ Erro ao processar buffer [{user_id}]: {e}")
         finally:
             buffer.is_processing = False
-            if user_id in self.timers:
+            self.inflight.pop(user_id, None)
+            if self.timers.get(user_id) is asyncio.current_task():
                 del self.timers[user_id]
+                # Mensagens restauradas durante o processamento
+                if buffer.messages:
+                    self.timers[user_id] = asyncio.create_task(
+                        self._process_after_timeout(user_id)
+                    )
+    
+    def mark_flush_started(self, user_id: str) -> None:
+        """
+        Marca o lote do usuário como iniciado
+        
+        A partir daqui o agente pode responder a qualquer momento, então
+        o lote não é mais persistido na drenagem (evita resposta dupla
+        após reiniciar).
+        """
+        self.inflight.pop(user_id, None)
+    
+    async def drain(self, timeout_seconds: float) -> Dict[str, List[BufferedMessage]]:
+        """
+        Esvazia todos os buffers no encerramento
+        
+        Fluxo:
+        1. Cancela timers de buffers ainda aguardando
+        2. Força processamento de todos os buffers não vazios
+        3. Aguarda processamentos em andamento até o prazo
+        4. Retorna mensagens cujo processamento não chegou a começar
+           (para persistir); lotes já iniciados não são repetidos
+        """
+        tasks = []
+        
+        for user_id, buffer in self.buffers.items():
+            if buffer.is_processing:
+                # Processamento em andamento roda dentro do timer
+                if user_id in self.timers:
+                    tasks.append(self.timers[user_id])
+                continue
+            
+            if user_id in self.timers:
+                self.timers.pop(user_id).cancel()
+            
+            if buffer.messages:
+                task = asyncio.create_task(self._trigger_processing(user_id))
+                self.timers[user_id] = task
+                tasks.append(task)
+        
+        logger.info(
+            f"🚰 Drenando buffers | Processamentos: {len(tasks)} "
+            f"| Prazo: {timeout_seconds}s"
+        )
+        
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout_seconds)
+        
+        # Capturar mensagens não iniciadas antes de cancelar
+        unfinished: Dict[str, List[BufferedMessage]] = {
+            user_id: list(messages) for user_id, messages in self.inflight.items()
+        }
+        for user_id, buffer in self.buffers.items():
+            if buffer.messages:
+                unfinished.setdefault(user_id, []).extend(buffer.get_messages())
+        
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        logger.info(
+            f"🚰 Drenagem concluída | Concluídos: {len(tasks) - len(pending)} "
+            f"| Não concluídos: {len(unfinished)} usuário(s)"
+        )
+        return unfinished
+    
+    def restore_messages(self, user_id: str, messages: List[BufferedMessage]) -> None:
+        """
+        Recoloca mensagens persistidas no buffer e inicia timer
+        
+        Com processamento em andamento, o timer atual é o próprio flush:
+        ele não é cancelado e inicia um novo timer ao terminar.
+        """
+        buffer = self.get_or_create_buffer(user_id)
+        buffer.messages = messages + buffer.messages
+        buffer.last_message_time = datetime.utcnow()
+        logger.info(f"♻️  {len(messages)} mensagem(ns) restaurada(s) [{user_id}]")
+        
+        if buffer.is_processing:
+            return
+        
+        if user_id in self.timers:
+            self.timers.pop(user_id).cancel()
+        self.timers[user_id] = asyncio.create_task(
+            self._process_after_timeout(user_id)
+        )
     
     def register_processing_callback(
         self,
@@ -244,6 +375,23 @@ class MessageBufferService:
         self.processing_callbacks[user_id] = callback
         logger.info(f"✅ Callback registrado para {user_id}")
     
+    def total_buffered_messages(self) -> int:
+        """Total de mensagens aguardando em todos os buffers"""
+        return sum(len(b.messages) for b in self.buffers.values())
+    
+    def buffered_messages(self, user_id: str) -> int:
+        """Mensagens aguardando no buffer do usuário"""
+        buffer = self.buffers.get(user_id)
+        return len(buffer.messages) if buffer else 0
+    
+    def active_buffers(self) -> int:
+        """Buffers com mensagens aguardando"""
+        return sum(1 for b in self.buffers.values() if b.messages)
+    
+    def pending_flushes(self) -> int:
+        """Buffers sendo processados no momento"""
+        return sum(1 for b in self.buffers.values() if b.is_processing)
+    
     def get_buffer_status(self, user_id: str) -> Dict:
         """Retorna status do buffer"""
         buffer = self.buffers.get(user_id)
@@ -1,7 +1,8 @@
+import asyncio
 import logging
 import httpx
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set
 from pymongo import MongoClient
 import json
 
@@ -10,7 +11,9 @@ from ..models_db import SessionDB
 from .user_service import UserService
 from .audio_service import AudioService
 from .agent_service import AgentService
-from .message_buffer_service import MessageBufferService, BufferedMessage
+from .message_buffer_service import MessageBufferService, BufferedMessage, UserContext
+from .admission_service import AdmissionService
+from .flush_scheduler import FlushScheduler, FlushClass
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,7 @@ class MessageService:
         self.client = MongoClient(settings.mongodb_url)
         self.db = self.client[settings.mongodb_db]
         self.sessions_collection = self.db["sessions"]
+        self.pending_buffers_collection = self.db["pending_buffers"]
         self.user_service = UserService()
         self.audio_service = AudioService()
         self.agent_service = AgentService()
@@ -32,10 +36,105 @@ class MessageService:
             inter_message_timeout_seconds=settings.message_inter_timeout_seconds
         )
         
+        # Controle de admissão (descarte de carga)
+        self.admission_service = AdmissionService(
+            buffer_service=self.buffer_service,
+            agent_breaker=self.agent_service.breaker,
+            max_buffered_messages=settings.admission_max_buffered_messages,
+            max_pending_flushes=settings.admission_max_pending_flushes,
+            user_rate_per_minute=settings.admission_user_rate_per_minute,
+            user_burst=settings.admission_user_burst,
+            fair_share_threshold=settings.admission_fair_share_threshold,
+            retry_after_seconds=settings.admission_retry_after_seconds
+        )
+        
+        # Agendador de flushes por custo estimado (com aging)
+        self.scheduler = FlushScheduler(
+            workers=settings.flush_workers,
+            aging_seconds=settings.flush_aging_seconds
+        )
+        
+        self.restore_task: Optional[asyncio.Task] = None
+        self.background_tasks: Set[asyncio.Task] = set()
+        
         logger.info(f"✅ MessageBufferService inicializado")
         logger.info(f"   - Timeout inicial: {settings.message_batch_timeout_seconds}s")
         logger.info(f"   - Timeout entre mensagens: {settings.message_inter_timeout_seconds}s")
     
+    async def startup(self) -> None:
+        """
+        Inicialização (lifespan)
+        
+        Restaura buffers persistidos por um processo anterior e continua
+        verificando periodicamente (deploys com instâncias sobrepostas).
+        """
+        self.scheduler.start()
+        await self.restore_pending_buffers()
+        self.restore_task = asyncio.create_task(self._poll_pending_buffers())
+    
+    async def shutdown(self) -> None:
+        """
+        Encerramento gracioso (lifespan)
+        
+        Fluxo:
+        1. Para de admitir novas mensagens
+        2. Força processamento de todos os buffers não vazios
+        3. Aguarda processamentos em andamento até o prazo
+        4. Persiste os lotes que não chegaram a ser iniciados para o
+           próximo processo (lotes já iniciados não são repetidos)
+        """
+        logger.info("🛑 Drenando buffers antes de encerrar...")
+        self.admission_service.stop_accepting()
+        
+        if self.restore_task:
+            self.restore_task.cancel()
+        
+        unfinished = await self.buffer_service.drain(
+            timeout_seconds=settings.shutdown_drain_timeout_seconds
+        )
+        await self.scheduler.stop()
+        
+        for user_id, messages in unfinished.items():
+            self.pending_buffers_collection.insert_one({
+                "user_id": user_id,
+                "messages": [m.to_dict() for m in messages],
+                "persisted_at": datetime.utcnow()
+            })
+            logger.info(f"💾 Buffer persistido [{user_id}] | {len(messages)} mensagem(ns)")
+    
+    async def restore_pending_buffers(self) -> int:
+        """Recoloca no buffer mensagens persistidas no encerramento"""
+        restored = 0
+        
+        while True:
+            doc = self.pending_buffers_collection.find_one_and_delete({})
+            if not doc:
+                break
+            
+            user_id = doc["user_id"]
+            if user_id not in self.buffer_service.processing_callbacks:
+                self.buffer_service.register_processing_callback(
+                    user_id,
+                    self._process_buffered_messages
+                )
+            
+            messages = [BufferedMessage.from_dict(m) for m in doc["messages"]]
+            self.buffer_service.restore_messages(user_id, messages)
+            restored += 1
+        
+        if restored:
+            logger.info(f"♻️  {restored} buffer(s) restaurado(s) de encerramento anterior")
+        return restored
+    
+    async def _poll_pending_buffers(self) -> None:
+        """Verifica periodicamente buffers persistidos por outra instância"""
+        while True:
+            await asyncio.sleep(settings.pending_buffers_poll_seconds)
+            try:
+                await self.restore_pending_buffers()
+            except Exception as e:
+                logger.error(f"❌ Erro ao restaurar buffers persistidos: {e}")
+    
     async def receive_message(
         self,
         user_id: str,
@@ -48,7 +147,24 @@ class MessageService:
         Recebe mensagem e adiciona ao buffer
         
         NÃO processa imediatamente - aguarda timeout
+        
+        Sob sobrecarga, recusa a mensagem (status "rejected") e envia
+        uma resposta degradada ao usuário uma única vez.
         """
+        decision = self.admission_service.check(user_id)
+        if not decision.admitted:
+            if decision.notify_user:
+                task = asyncio.create_task(self._send_shed_response(chatId=user_id))
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+            return {
+                "status": "rejected",
+                "reason": decision.reason,
+                "http_status": decision.status_code,
+                "retry_after_seconds": decision.retry_after_seconds,
+                "message": "Mensagem recusada por sobrecarga, tente novamente mais tarde"
+            }
+        
         logger.info(
             f"\n{'='*70}\n"
             f"📨 MENSAGEM RECEBIDA (BUFFER)\n"
@@ -74,6 +190,9 @@ class MessageService:
             media=media
         )
         
+        # Pré-carregar contexto do usuário enquanto a janela está aberta
+        self._schedule_prefetch(user_id)
+        
         # Retornar status do buffer
         return {
             "status": "buffered",
@@ -87,12 +206,54 @@ class MessageService:
         messages: List[BufferedMessage]
     ) -> None:
         """
-        Processa todas as mensagens do buffer
+        Agenda o processamento das mensagens do buffer
         
         Chamado quando:
         - Timeout inicial expira (30s)
         - OU timeout entre mensagens expira (15s sem novas mensagens)
+        
+        O lote é classificado por custo estimado e executado pelo
+        scheduler; retorna quando o processamento termina.
         """
+        flush_class = self._classify_batch(user_id, messages)
+        await self.scheduler.submit(
+            flush_class,
+            lambda: self._run_flush(user_id, messages),
+            user_id=user_id
+        )
+    
+    def _classify_batch(self, user_id: str, messages: List[BufferedMessage]) -> FlushClass:
+        """
+        Estima o custo do lote
+        
+        - Áudio → duração estimada pelo tamanho da mídia
+        - Resposta em áudio (preferência pré-carregada) → tts
+        """
+        audio_seconds = 0.0
+        for msg in messages:
+            if msg.message_type.value != "chat" and msg.media and msg.media.get("data"):
+                audio_bytes = len(msg.media["data"]) * 3 / 4  # base64 → bytes
+                audio_seconds += audio_bytes / settings.audio_bytes_per_second
+        
+        if audio_seconds > settings.long_audio_threshold_seconds:
+            return FlushClass.LONG_AUDIO
+        
+        buffer = self.buffer_service.buffers.get(user_id)
+        if buffer and buffer.context and buffer.context.user.prefer_audio:
+            return FlushClass.TTS
+        
+        if audio_seconds > 0:
+            return FlushClass.SHORT_AUDIO
+        
+        return FlushClass.TEXT
+    
+    async def _run_flush(
+        self,
+        user_id: str,
+        messages: List[BufferedMessage]
+    ) -> None:
+        """Processa todas as mensagens do buffer"""
+        self.buffer_service.mark_flush_started(user_id)
         logger.info(
             f"\n{'='*70}\n"
             f"🎯 PROCESSANDO BUFFER ({len(messages)} mensagens)\n"
@@ -101,11 +262,10 @@ class MessageService:
         )
         
         try:
-            # 1. Verificar/criar usuário
-            user = await self.user_service.get_or_create_user(user_id)
-            
-            # 2. Obter/criar sessão
-            session_id = await self.get_or_create_session(user_id)
+            # 1-2. Usuário e sessão (pré-carregados durante a janela do buffer)
+            context = await self._get_user_context(user_id)
+            user = context.user
+            session_id = context.session_id
             
             # 3. Agrupar mensagens em texto único
             combined_text = await self._combine_messages(user_id, messages)
@@ -120,7 +280,9 @@ class MessageService:
                 user_preferences={
                     "prefer_audio": user.prefer_audio,
                     "topics": user.topics_of_interest
-                }
+                },
+                recent_history=context.recent_history,
+                user_profile={"name": user.name, "location": user.location}
             )
             
             if not agent_response:
@@ -180,6 +342,97 @@ class MessageService:
         except Exception as e:
             logger.error(f"❌ Erro ao processar buffer: {e}")
     
+    def _schedule_prefetch(self, user_id: str) -> None:
+        """
+        Dispara prefetch do contexto do usuário em background
+        
+        - Primeira mensagem da rajada → busca perfil, sessão e histórico
+        - Janela longa → atualiza contexto mais antigo que o limite
+        """
+        buffer = self.buffer_service.buffers.get(user_id)
+        if not buffer or buffer.is_processing:
+            return
+        if buffer.prefetch_task and not buffer.prefetch_task.done():
+            return
+        if buffer.context and buffer.context.age_seconds() < settings.prefetch_refresh_seconds:
+            return
+        
+        buffer.prefetch_task = asyncio.create_task(self._prefetch_context(user_id))
+    
+    async def _prefetch_context(self, user_id: str) -> Optional[UserContext]:
+        """Busca perfil, sessão ativa e histórico recente e guarda no buffer"""
+        try:
+            context = await self._fetch_user_context(user_id)
+            buffer = self.buffer_service.get_or_create_buffer(user_id)
+            buffer.context = context
+            logger.info(
+                f"📦 Contexto pré-carregado [{user_id}] "
+                f"| Sessão: {context.session_id} | Histórico: {len(context.recent_history)}"
+            )
+            return context
+        except Exception as e:
+            logger.error(f"❌ Erro no prefetch de contexto [{user_id}]: {e}")
+            return None
+    
+    async def _fetch_user_context(self, user_id: str) -> UserContext:
+        """Busca perfil, sessão ativa e histórico recente no MongoDB"""
+        user = await self.user_service.get_or_create_user(user_id)
+        session_id = await self.get_or_create_session(user_id)
+        recent_history = await self.get_recent_history(session_id)
+        return UserContext(
+            user=user,
+            session_id=session_id,
+            recent_history=recent_history,
+            fetched_at=datetime.utcnow()
+        )
+    
+    async def _get_user_context(self, user_id: str) -> UserContext:
+        """
+        Obtém contexto para o processamento do buffer
+        
+        Usa o contexto pré-carregado (aguardando prefetch em andamento);
+        busca na hora apenas se ausente ou antigo demais. O contexto é
+        consumido aqui, pois o agente pode alterar o perfil do usuário.
+        """
+        context = None
+        buffer = self.buffer_service.buffers.get(user_id)
+        
+        if buffer:
+            if buffer.prefetch_task and not buffer.prefetch_task.done():
+                await buffer.prefetch_task
+            context = buffer.context
+            buffer.context = None
+            buffer.prefetch_task = None
+        
+        if context and context.age_seconds() <= settings.prefetch_max_age_seconds:
+            logger.info(f"⚡ Usando contexto pré-carregado ({context.age_seconds():.1f}s)")
+            return context
+        
+        return await self._fetch_user_context(user_id)
+    
+    async def get_recent_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Obtém as últimas trocas da sessão (texto do usuário + resposta do agente)"""
+        limit = limit or settings.prefetch_history_limit
+        session = self.sessions_collection.find_one(
+            {"session_id": session_id},
+            {"messages": {"$slice": -limit}}
+        )
+        
+        if not session:
+            return []
+        
+        return [
+            {
+                "user_message": "\n".join(
+                    m.get("data", "")
+                    for m in entry.get("user_messages", [])
+                    if m.get("type") == "chat"
+                ),
+                "agent_response": entry.get("agent_response", "")
+            }
+            for entry in session.get("messages", [])
+        ]
+    
     async def _combine_messages(
         self,
         user_id: str,
@@ -256,6 +509,16 @@ class MessageService:
             logger.error(f"❌ Erro ao enviar para WhatsApp: {e}")
             return False
     
+    async def _send_shed_response(self, chatId: str) -> None:
+        """Envia resposta rápida avisando que há muitas mensagens"""
+        await self._send_to_whatsapp({
+            "chatId": chatId,
+            "message": settings.admission_shed_message,
+            "mediaUrl": None,
+            "mimeType": None,
+            "auxiliaryText": None
+        })
+    
     async def _send_error_response(self, user_id: str, chatId: str, session_id: str) -> Dict:
         """Envia resposta de erro"""
         error_message = {
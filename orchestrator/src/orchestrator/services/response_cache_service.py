@@ -0,0 +1,192 @@
+"""
+Cache de respostas do agente
+
+Muitas mensagens se repetem ("oi", "bom dia", "o que é a PEC 45?").
+A chave combina:
+1. Escopo: sem histórico recente (pergunta sem contexto) a entrada é
+   compartilhada entre cidadãos; com histórico, é do usuário e inclui
+   um resumo da última troca, pois a resposta depende da conversa
+2. Texto combinado normalizado (minúsculas, sem acentos/pontuação)
+3. Campos de preferência que alteram a resposta (prefer_audio, tópicos)
+
+NÃO usam o cache:
+- Mensagens com opinião ou dados pessoais (o agente precisa
+  registrá-las via MCP)
+- Continuações da conversa ("sim", "e o segundo?", "me explica
+  melhor"), que só fazem sentido com a resposta anterior
+"""
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Marcadores de opinião ou autodescrição (normalizados, sem acentos)
+OPINION_MARKERS = [
+    "eu acho", "acho que", "na minha opiniao", "eu penso", "penso que",
+    "sou contra", "sou a favor", "concordo", "discordo", "eu gosto",
+    "nao gosto", "eu apoio", "nao apoio", "absurdo", "vergonha",
+    "meu nome", "me chamo", "tenho anos", "moro em", "eu moro",
+]
+
+# Palavras que remetem à troca anterior (normalizadas, palavra inteira)
+FOLLOW_UP_WORDS = {
+    "sim", "nao", "ok", "certo", "beleza", "pode", "claro", "exato",
+    "isso", "isto", "esse", "essa", "esses", "essas", "este", "esta",
+    "disso", "desse", "dessa", "nisso", "nesse", "nessa", "aquele", "aquela",
+    "ele", "ela", "eles", "elas", "dele", "dela", "deles", "delas",
+    "primeiro", "primeira", "segundo", "segunda", "terceiro", "terceira",
+    "ultimo", "ultima", "anterior", "outro", "outra", "melhor", "detalhe",
+    "detalhes", "continua", "continue", "resume", "resumo", "exemplo",
+}
+
+# Início de pergunta encadeada ("e o segundo?", "e sobre saúde?")
+FOLLOW_UP_PREFIXES = ("e o ", "e a ", "e os ", "e as ", "e sobre ", "e quanto ", "e se ")
+
+
+@dataclass
+class CachedResponse:
+    """Resposta armazenada com metadados de expiração"""
+    response: Dict
+    created_at: float
+    latency_seconds: float
+    hits: int = 0
+
+
+class AgentResponseCache:
+    """Cache LRU com TTL para respostas do agente"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+        max_message_chars: int = 200
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_message_chars = max_message_chars
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.saved_latency_seconds = 0.0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Minúsculas, sem acentos, sem pontuação e espaços repetidos"""
+        text = unicodedata.normalize("NFKD", text.lower())
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        text = re.sub(r"[^\w\s]", " ", text)
+        return " ".join(text.split())
+
+    @staticmethod
+    def scope(user_id: str, recent_history: Optional[List[Dict]] = None) -> str:
+        """
+        Escopo da chave
+        
+        - Sem histórico → "" (compartilhado entre cidadãos)
+        - Com histórico → usuário + resumo da última troca
+        """
+        if not recent_history:
+            return ""
+        last = recent_history[-1]
+        raw = f"{last.get('user_message', '')}|{last.get('agent_response', '')}"
+        return f"{user_id}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]}"
+
+    def make_key(self, scope: str, text: str, user_preferences: Optional[Dict] = None) -> str:
+        """Chave a partir do escopo + texto normalizado + preferências relevantes"""
+        preferences = user_preferences or {}
+        topics = sorted(self.normalize(t) for t in preferences.get("topics") or [])
+        raw = "|".join([
+            scope,
+            self.normalize(text),
+            str(bool(preferences.get("prefer_audio"))),
+            ",".join(topics),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, text: str) -> bool:
+        """Apenas mensagens curtas, sem opinião/dados pessoais e que não continuam a conversa"""
+        if len(text) > self.max_message_chars:
+            return False
+        normalized = self.normalize(text)
+        # "tenho 30 anos" → "tenho anos"
+        without_digits = " ".join(w for w in normalized.split() if not w.isdigit())
+        if any(marker in without_digits for marker in OPINION_MARKERS):
+            return False
+        return not self.is_follow_up(normalized)
+
+    @staticmethod
+    def is_follow_up(normalized: str) -> bool:
+        """Mensagem que remete à troca anterior (anáfora, confirmação, "e o ...?")"""
+        if FOLLOW_UP_WORDS & set(normalized.split()):
+            return True
+        return f"{normalized} ".startswith(FOLLOW_UP_PREFIXES)
+
+    def mentions_profile(self, response_text: str, user_profile: Optional[Dict] = None) -> bool:
+        """Resposta cita nome ou cidade do usuário (não pode ser compartilhada)"""
+        words = set(self.normalize(response_text).split())
+        for value in (user_profile or {}).values():
+            if not isinstance(value, str):
+                continue
+            # "Maria Silva" → "Olá, Maria!" também conta
+            if any(len(w) >= 3 and w in words for w in self.normalize(value).split()):
+                return True
+        return False
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retorna resposta armazenada (ou None se ausente/expirada)"""
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        entry.hits += 1
+        self.hits += 1
+        self.saved_latency_seconds += entry.latency_seconds
+        return dict(entry.response)
+
+    def set(self, key: str, response: Dict, latency_seconds: float) -> None:
+        """Armazena resposta, removendo a menos usada se cheio"""
+        self.entries[key] = CachedResponse(
+            response=dict(response),
+            created_at=time.monotonic(),
+            latency_seconds=latency_seconds,
+        )
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def get_stats(self) -> Dict:
+        """Retorna métricas de uso do cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_latency_seconds": round(self.saved_latency_seconds, 2),
+        }
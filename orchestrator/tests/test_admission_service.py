@@ -0,0 +1,129 @@
+"""Testes do controle de admissão (sem MongoDB: buffers preenchidos direto)"""
+from datetime import datetime
+
+from orchestrator.services.admission_service import AdmissionService
+from orchestrator.services.circuit_breaker import CircuitBreaker
+from orchestrator.services.message_buffer_service import (
+    BufferedMessage,
+    MessageBufferService,
+    MessageType,
+)
+
+
+def make_admission(**kwargs):
+    buffer_service = MessageBufferService()
+    breaker = CircuitBreaker("agent_api", failure_threshold=1, reset_timeout_seconds=60)
+    options = dict(
+        max_buffered_messages=10,
+        max_pending_flushes=5,
+        user_rate_per_minute=60,
+        user_burst=100,
+        fair_share_threshold=0.5,
+    )
+    options.update(kwargs)
+    return AdmissionService(buffer_service=buffer_service, agent_breaker=breaker, **options)
+
+
+def buffer_messages(admission, user_id, count):
+    buffer = admission.buffer_service.get_or_create_buffer(user_id)
+    for i in range(count):
+        buffer.messages.append(BufferedMessage(
+            user_id=user_id,
+            message_type=MessageType.CHAT,
+            message=f"mensagem {i}",
+            chatId=user_id,
+            timestamp=datetime.utcnow(),
+        ))
+
+
+def test_admits_under_normal_load():
+    admission = make_admission()
+
+    decision = admission.check("5511")
+
+    assert decision.admitted
+    assert admission.admitted_count == 1
+
+
+def test_fair_share_sheds_only_the_heavy_user():
+    admission = make_admission()
+    # Carga 6/10 ≥ 0.5 → cada um dos 2 usuários ativos pode ter até 5 mensagens
+    buffer_messages(admission, "pesado", 5)
+    buffer_messages(admission, "leve", 1)
+
+    heavy = admission.check("pesado")
+    light = admission.check("leve")
+
+    assert not heavy.admitted
+    assert heavy.status_code == 429
+    assert heavy.reason == "fair_share_exceeded"
+    assert light.admitted
+
+
+def test_fair_share_not_applied_below_threshold():
+    admission = make_admission()
+    buffer_messages(admission, "pesado", 4)
+
+    assert admission.check("pesado").admitted
+
+
+def test_global_overload_returns_503():
+    admission = make_admission()
+    buffer_messages(admission, "a", 5)
+    buffer_messages(admission, "b", 5)
+
+    decision = admission.check("c")
+
+    assert decision.status_code == 503
+    assert decision.reason == "buffer_full"
+
+
+def test_open_breaker_rejects():
+    admission = make_admission()
+    admission.agent_breaker.record_failure()
+
+    decision = admission.check("5511")
+
+    assert decision.status_code == 503
+    assert decision.reason == "agent_unavailable"
+
+
+def test_user_rate_limit():
+    admission = make_admission(user_burst=2, user_rate_per_minute=1)
+
+    assert admission.check("5511").admitted
+    assert admission.check("5511").admitted
+    decision = admission.check("5511")
+
+    assert decision.reason == "user_rate_limited"
+    assert decision.retry_after_seconds > 0
+
+
+def test_user_notified_once_per_shed_episode():
+    admission = make_admission()
+    admission.stop_accepting()
+
+    first = admission.check("5511")
+    second = admission.check("5511")
+
+    assert first.notify_user
+    assert not second.notify_user
+
+    # Mensagem admitida encerra o episódio → próximo descarte notifica de novo
+    admission.accepting = True
+    assert admission.check("5511").admitted
+    admission.stop_accepting()
+    assert admission.check("5511").notify_user
+
+
+def test_cleanup_removes_idle_buckets_and_old_episodes():
+    admission = make_admission(user_burst=1, cleanup_interval_seconds=0)
+    admission.check("ativo")
+    admission.buckets["inativo"] = admission._get_bucket("inativo")
+    admission.shed_notified["antigo"] = 0.0
+
+    admission.check("outro")
+
+    assert "inativo" not in admission.buckets
+    assert "ativo" in admission.buckets
+    assert "antigo" not in admission.shed_notified
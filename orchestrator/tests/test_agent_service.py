@@ -0,0 +1,69 @@
+"""Testes do cache de respostas no AgentService (API de Agentes falsa via httpx)"""
+import httpx
+import pytest
+
+from orchestrator.services import agent_service as agent_module
+from orchestrator.services.agent_service import AgentService
+
+
+@pytest.fixture
+def agent_api(monkeypatch):
+    """Substitui a API de Agentes; responde com o texto de `reply` e conta as chamadas"""
+    state = {"calls": 0, "reply": "A PEC 45 trata da reforma tributária."}
+    real_client = httpx.AsyncClient
+
+    def handler(request):
+        if request.url.path == "/session-memory/turns":
+            return httpx.Response(200, json={})
+        state["calls"] += 1
+        return httpx.Response(200, json={"response_text": state["reply"], "should_send_audio": False})
+
+    monkeypatch.setattr(
+        agent_module.httpx, "AsyncClient",
+        lambda *a, **kw: real_client(transport=httpx.MockTransport(handler))
+    )
+    return state
+
+
+async def ask(service, user_id, text, history=None, profile=None):
+    return await service.process_message(
+        user_message=text,
+        user_id=user_id,
+        session_id=f"sess_{user_id}",
+        recent_history=history,
+        user_profile=profile,
+    )
+
+
+@pytest.mark.asyncio
+async def test_context_free_answer_is_reused_for_another_citizen(agent_api):
+    service = AgentService()
+
+    await ask(service, "5511", "o que é a PEC 45?")
+    response = await ask(service, "5521", "o que é a PEC 45?")
+
+    assert agent_api["calls"] == 1
+    assert response["user_id"] == "5521"
+
+
+@pytest.mark.asyncio
+async def test_answer_citing_profile_is_not_shared(agent_api):
+    service = AgentService()
+    agent_api["reply"] = "Olá, Maria! Como posso ajudar?"
+
+    await ask(service, "5511", "oi", profile={"name": "Maria", "location": None})
+    await ask(service, "5521", "oi", profile={"name": "João", "location": None})
+
+    assert agent_api["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_follow_up_goes_to_the_agent(agent_api):
+    service = AgentService()
+    history = [{"user_message": "projetos de saúde", "agent_response": "1. PL 1 ... 2. PL 2 ..."}]
+
+    await ask(service, "5511", "e o segundo?", history=history)
+    await ask(service, "5511", "e o segundo?", history=history)
+
+    assert agent_api["calls"] == 2
+    assert service.cache.bypassed == 2
@@ -0,0 +1,78 @@
+"""Testes do circuit breaker (estados e chamada de teste em HALF_OPEN)"""
+import time
+
+from orchestrator.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def open_breaker(reset_timeout_seconds=0.05):
+    breaker = CircuitBreaker("teste", failure_threshold=2, reset_timeout_seconds=reset_timeout_seconds)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("teste", failure_threshold=2, reset_timeout_seconds=60)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("teste", failure_threshold=2, reset_timeout_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    # Demais chamadas aguardam o resultado da chamada de teste
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+    assert breaker.get_status()["trial_in_flight"]
+
+
+def test_half_open_trial_success_closes():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+
+def test_trial_without_result_expires():
+    # Chamada de teste cancelada não registra resultado: outra é liberada após o tempo de espera
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
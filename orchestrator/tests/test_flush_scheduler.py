@@ -0,0 +1,106 @@
+"""Testes do agendador de flushes (prioridade por custo com aging)"""
+import asyncio
+
+import pytest
+
+from orchestrator.services.flush_scheduler import FlushClass, FlushScheduler
+
+
+class Recorder:
+    """Fábricas de lote que registram a ordem de execução"""
+
+    def __init__(self):
+        self.order = []
+
+    def job(self, name, wait=None):
+        async def run():
+            self.order.append(name)
+            if wait is not None:
+                await wait.wait()
+        return run
+
+
+async def occupy_single_worker(scheduler, recorder):
+    """Segura o único worker para que os próximos lotes fiquem na fila"""
+    release = asyncio.Event()
+    task = asyncio.create_task(scheduler.submit(FlushClass.TEXT, recorder.job("bloqueio", release)))
+    await asyncio.sleep(0.01)
+    return release, task
+
+
+@pytest.mark.asyncio
+async def test_cheap_batches_run_first():
+    scheduler = FlushScheduler(workers=1, aging_seconds=10)
+    scheduler.start()
+    recorder = Recorder()
+    release, blocker = await occupy_single_worker(scheduler, recorder)
+
+    jobs = [
+        asyncio.create_task(scheduler.submit(FlushClass.LONG_AUDIO, recorder.job("long_audio"))),
+        asyncio.create_task(scheduler.submit(FlushClass.TTS, recorder.job("tts"))),
+        asyncio.create_task(scheduler.submit(FlushClass.TEXT, recorder.job("text"))),
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(blocker, *jobs)
+    await scheduler.stop()
+
+    assert recorder.order == ["bloqueio", "text", "tts", "long_audio"]
+
+
+@pytest.mark.asyncio
+async def test_aging_lets_an_old_expensive_batch_go_first():
+    scheduler = FlushScheduler(workers=1, aging_seconds=0.02)
+    scheduler.start()
+    recorder = Recorder()
+    release, blocker = await occupy_single_worker(scheduler, recorder)
+
+    # long_audio atrasa 3 × 0.02s; após esperar mais que isso, passa na frente do texto novo
+    long_audio = asyncio.create_task(scheduler.submit(FlushClass.LONG_AUDIO, recorder.job("long_audio")))
+    await asyncio.sleep(0.1)
+    text = asyncio.create_task(scheduler.submit(FlushClass.TEXT, recorder.job("text")))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(blocker, long_audio, text)
+    await scheduler.stop()
+
+    assert recorder.order == ["bloqueio", "long_audio", "text"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_batch_is_skipped():
+    scheduler = FlushScheduler(workers=1, aging_seconds=10)
+    scheduler.start()
+    recorder = Recorder()
+    release, blocker = await occupy_single_worker(scheduler, recorder)
+
+    cancelled = asyncio.create_task(scheduler.submit(FlushClass.TEXT, recorder.job("cancelado")))
+    kept = asyncio.create_task(scheduler.submit(FlushClass.TEXT, recorder.job("mantido")))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    assert scheduler.queued_count() == 1
+
+    release.set()
+    await asyncio.gather(blocker, kept)
+    await scheduler.stop()
+
+    assert recorder.order == ["bloqueio", "mantido"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_reports_error_and_worker_continues():
+    scheduler = FlushScheduler(workers=1, aging_seconds=10)
+    scheduler.start()
+    recorder = Recorder()
+
+    async def fail():
+        raise RuntimeError("agente indisponível")
+
+    with pytest.raises(RuntimeError):
+        await scheduler.submit(FlushClass.TEXT, fail)
+    await scheduler.submit(FlushClass.TEXT, recorder.job("seguinte"))
+    await scheduler.stop()
+
+    assert recorder.order == ["seguinte"]
+    assert scheduler.get_status()["latency"]["text"]["count"] == 2
+    assert scheduler.running == 0
@@ -0,0 +1,134 @@
+"""Testes da drenagem e restauração de buffers (sem MongoDB)"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from orchestrator.services.message_buffer_service import (
+    BufferedMessage,
+    MessageBufferService,
+    MessageType,
+)
+
+
+def make_message(user_id, text):
+    return BufferedMessage(
+        user_id=user_id,
+        message_type=MessageType.CHAT,
+        message=text,
+        chatId=user_id,
+        timestamp=datetime.utcnow(),
+    )
+
+
+class Flush:
+    """Callback de processamento; started=True simula o flush já em execução"""
+
+    def __init__(self, service, started=True, block=True):
+        self.service = service
+        self.started = started
+        self.block = block
+        self.calls = []
+        self.entered = asyncio.Event()
+
+    async def __call__(self, user_id, messages):
+        if self.started:
+            self.service.mark_flush_started(user_id)
+        self.calls.append([m.message for m in messages])
+        self.entered.set()
+        if self.block:
+            await asyncio.sleep(60)
+
+
+async def start_processing(service, user_id, flush, text="oi"):
+    service.register_processing_callback(user_id, flush)
+    service.get_or_create_buffer(user_id).messages.append(make_message(user_id, text))
+    service.timers[user_id] = asyncio.create_task(service._trigger_processing(user_id))
+    await flush.entered.wait()
+
+
+@pytest.mark.asyncio
+async def test_drain_processes_waiting_buffers():
+    service = MessageBufferService()
+    flush = Flush(service, block=False)
+    await service.add_message("5511", "5511", "chat", "bom dia")
+    service.register_processing_callback("5511", flush)
+
+    unfinished = await service.drain(timeout_seconds=1)
+
+    assert flush.calls == [["bom dia"]]
+    assert unfinished == {}
+    assert "5511" not in service.timers
+
+
+@pytest.mark.asyncio
+async def test_drain_does_not_persist_started_flush():
+    # O agente pode já ter respondido: persistir geraria resposta duplicada
+    service = MessageBufferService()
+    flush = Flush(service, started=True)
+    await start_processing(service, "5511", flush)
+
+    unfinished = await service.drain(timeout_seconds=0.05)
+
+    assert unfinished == {}
+    assert not service.buffers["5511"].is_processing
+
+
+@pytest.mark.asyncio
+async def test_drain_persists_batch_that_never_started():
+    # Lote ainda na fila do scheduler quando o prazo acaba
+    service = MessageBufferService()
+    flush = Flush(service, started=False)
+    await start_processing(service, "5511", flush, text="e a PEC 45?")
+
+    unfinished = await service.drain(timeout_seconds=0.05)
+
+    assert [m.message for m in unfinished["5511"]] == ["e a PEC 45?"]
+
+
+@pytest.mark.asyncio
+async def test_restore_replaces_waiting_timer():
+    service = MessageBufferService(initial_timeout_seconds=1, inter_message_timeout_seconds=0)
+    flush = Flush(service, block=False)
+    service.register_processing_callback("5511", flush)
+    await service.add_message("5511", "5511", "chat", "nova")
+    old_timer = service.timers["5511"]
+
+    service.restore_messages("5511", [make_message("5511", "antiga")])
+    await asyncio.sleep(0)
+
+    assert old_timer.cancelled() or old_timer.done()
+    await asyncio.wait_for(flush.entered.wait(), timeout=3)
+    await asyncio.sleep(0.01)
+    assert flush.calls == [["antiga", "nova"]]
+    assert "5511" not in service.timers
+
+
+@pytest.mark.asyncio
+async def test_restore_during_processing_keeps_flush_and_runs_after():
+    service = MessageBufferService(initial_timeout_seconds=1, inter_message_timeout_seconds=0)
+    release = asyncio.Event()
+    calls = []
+
+    async def flush(user_id, messages):
+        calls.append([m.message for m in messages])
+        if len(calls) == 1:
+            await release.wait()
+
+    service.register_processing_callback("5511", flush)
+    service.get_or_create_buffer("5511").messages.append(make_message("5511", "primeira"))
+    flush_task = asyncio.create_task(service._trigger_processing("5511"))
+    service.timers["5511"] = flush_task
+    await asyncio.sleep(0)
+
+    service.restore_messages("5511", [make_message("5511", "restaurada")])
+    await asyncio.sleep(0)
+
+    assert not flush_task.cancelled()
+    assert service.timers["5511"] is flush_task
+
+    release.set()
+    await flush_task
+    next_timer = service.timers["5511"]
+    await asyncio.wait_for(next_timer, timeout=3)
+    assert calls == [["primeira"], ["restaurada"]]
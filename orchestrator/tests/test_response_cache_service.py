@@ -0,0 +1,95 @@
+"""Testes do cache de respostas do agente (chave, escopo e bypass)"""
+import pytest
+
+from orchestrator.services.response_cache_service import AgentResponseCache
+
+
+HISTORY_PEC = [{"user_message": "o que é a PEC 45?", "agent_response": "A PEC 45 trata da reforma tributária."}]
+HISTORY_PL = [{"user_message": "e o PL 2630?", "agent_response": "O PL 2630 trata das fake news."}]
+
+
+def test_key_ignores_case_accents_and_punctuation():
+    cache = AgentResponseCache()
+
+    assert cache.make_key("", "O que é a PEC 45?") == cache.make_key("", "o que e a pec 45")
+
+
+def test_key_depends_on_preferences():
+    cache = AgentResponseCache()
+
+    text_key = cache.make_key("", "oi", {"prefer_audio": False})
+    audio_key = cache.make_key("", "oi", {"prefer_audio": True})
+
+    assert text_key != audio_key
+
+
+def test_context_free_questions_are_shared_between_citizens():
+    cache = AgentResponseCache()
+
+    first = cache.make_key(cache.scope("5511"), "o que é a PEC 45?")
+    second = cache.make_key(cache.scope("5521"), "o que é a PEC 45?")
+
+    assert first == second
+
+
+def test_key_changes_with_the_last_turn():
+    cache = AgentResponseCache()
+
+    after_pec = cache.make_key(cache.scope("5511", HISTORY_PEC), "quanto custa?")
+    after_pl = cache.make_key(cache.scope("5511", HISTORY_PL), "quanto custa?")
+    other_user = cache.make_key(cache.scope("5521", HISTORY_PEC), "quanto custa?")
+
+    assert len({after_pec, after_pl, other_user}) == 3
+
+
+@pytest.mark.parametrize("message", [
+    "sim",
+    "Sim!",
+    "e o segundo?",
+    "me explica melhor",
+    "e sobre saúde?",
+    "quem votou nisso?",
+    "ok",
+])
+def test_follow_ups_bypass_the_cache(message):
+    assert not AgentResponseCache().is_cacheable(message)
+
+
+@pytest.mark.parametrize("message", [
+    "oi",
+    "bom dia",
+    "o que é a PEC 45?",
+    "quais projetos sobre saúde estão em votação?",
+])
+def test_standalone_messages_are_cacheable(message):
+    assert AgentResponseCache().is_cacheable(message)
+
+
+@pytest.mark.parametrize("message", ["eu acho isso um absurdo", "tenho 30 anos", "meu nome é Ana"])
+def test_opinions_and_personal_data_bypass_the_cache(message):
+    assert not AgentResponseCache().is_cacheable(message)
+
+
+def test_response_mentioning_profile_is_detected():
+    cache = AgentResponseCache()
+    profile = {"name": "Maria Silva", "location": "Fortaleza"}
+
+    assert cache.mentions_profile("Olá, Maria! Como posso ajudar?", profile)
+    assert cache.mentions_profile("Em Fortaleza há audiências públicas.", profile)
+    assert not cache.mentions_profile("Olá! Como posso ajudar?", profile)
+    assert not cache.mentions_profile("Olá! Como posso ajudar?", {"name": None, "location": None})
+
+
+def test_get_set_ttl_and_eviction():
+    cache = AgentResponseCache(max_entries=1, ttl_seconds=60)
+
+    cache.set("a", {"response_text": "A"}, latency_seconds=2.0)
+    assert cache.get("a") == {"response_text": "A"}
+
+    cache.set("b", {"response_text": "B"}, latency_seconds=1.0)
+    assert cache.get("a") is None
+    assert cache.evictions == 1
+
+    cache.ttl_seconds = -1
+    assert cache.get("b") is None
+    assert cache.get_stats()["saved_latency_seconds"] == 2.0
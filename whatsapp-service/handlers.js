@@ -4,6 +4,8 @@ export class MessageHandlers {
   constructor(config = {}) {
     // A URL do orquestrador é a única dependência externa necessária.
     this.orchestratorUrl = config.orchestratorUrl;
+    // Tentativas ao receber 429/503 do orquestrador (respeitando Retry-After)
+    this.maxForwardAttempts = config.maxForwardAttempts || 3;
     console.log("[Config] URL do Orquestrador:", this.orchestratorUrl);
 
     if (!this.orchestratorUrl) {
@@ -107,14 +109,28 @@ export class MessageHandlers {
         return;
     }
 
-    try {
-      await axios.post(this.orchestratorUrl, payload, {
-        timeout: 10000, // 10 segundos de timeout
-        headers: { "Content-Type": "application/json" }
-      });
-      console.log(`[🚀 Encaminhado] Mensagem ${payload.messageId} enviada para o orquestrador.`);
-    } catch (error) {
-      console.error(`[❌ Webhook] Erro ao enviar para o orquestrador (${this.orchestratorUrl}):`, error.message);
+    for (let attempt = 1; attempt <= this.maxForwardAttempts; attempt++) {
+      try {
+        await axios.post(this.orchestratorUrl, payload, {
+          timeout: 10000, // 10 segundos de timeout
+          headers: { "Content-Type": "application/json" }
+        });
+        console.log(`[🚀 Encaminhado] Mensagem ${payload.messageId} enviada para o orquestrador.`);
+        return;
+      } catch (error) {
+        const status = error.response?.status;
+
+        // 429/503: orquestrador sobrecarregado, recua conforme Retry-After
+        if ((status === 429 || status === 503) && attempt < this.maxForwardAttempts) {
+          const retryAfter = parseInt(error.response.headers?.["retry-after"], 10) || 15;
+          console.warn(`[⏳ Backoff] Orquestrador recusou (${status}). Nova tentativa em ${retryAfter}s (${attempt}/${this.maxForwardAttempts}).`);
+          await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+          continue;
+        }
+
+        console.error(`[❌ Webhook] Erro ao enviar para o orquestrador (${this.orchestratorUrl}):`, error.message);
+        return;
+      }
     }
   }
 }
\ No newline at end of file